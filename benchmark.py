@@ -0,0 +1,365 @@
+"""
+benchmark.py
+Benchmarks for the hot paths in coltrane: building tones, generating and spelling scales, building
+and identifying chords, and fuzzy scale name lookups. Each benchmark runs a realistic mix (all
+roots x all scales, all chord qualities, typo-laden scale names) and reports operations per second
+along with the peak memory allocated during one run and the number of memory blocks it left
+allocated. Inputs are fixed (typos use a seeded random generator), so results are comparable
+between runs and machines with the same Python version.
+
+Usage:
+    python benchmark.py                         run every benchmark
+    python benchmark.py -k scale                run benchmarks whose name contains "scale"
+    python benchmark.py --save baseline.json    save the results as a baseline
+    python benchmark.py --compare baseline.json compare with a baseline, exiting with status 1 if
+                                                any benchmark got slower than the threshold
+"""
+
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+import coltrane
+
+
+BENCHMARKS = []
+
+def benchmark(name, requires = ()):
+    """Registers a benchmark. The decorated function does any setup and returns (run, ops), where
+    run() performs ops operations. requires names optional modules the benchmark needs; it is
+    skipped if any of them can't be imported"""
+    def register(f):
+        BENCHMARKS.append((name, f, requires))
+        return f
+    return register
+
+def missing(modules):
+    """Gets the first of some modules that can't be imported, or None"""
+    for module in modules:
+        try:
+            __import__(module)
+        except ImportError:
+            return module
+    return None
+
+
+ROOTS = ["C", "Db", "D", "Eb", "E", "F", "F#", "Gb", "G", "Ab", "A", "Bb", "B"]
+SCALES = coltrane.ScaleTable.names()
+QUALITIES = list(coltrane.Chord.quality_intervals)
+
+def typos(words, count, seed=0):
+    """Makes misspelled copies of words by deleting, swapping, replacing or inserting letters"""
+    rand = random.Random(seed)
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    result = []
+    for i in range(count):
+        word = list(rand.choice(words))
+        for edit in range(rand.randint(1, 2)):
+            p = rand.randrange(len(word))
+            kind = rand.randrange(4)
+            if kind == 0 and len(word) > 3:
+                del word[p]
+            elif kind == 1 and p < len(word) - 1:
+                word[p], word[p + 1] = word[p + 1], word[p]
+            elif kind == 2:
+                word[p] = rand.choice(letters)
+            else:
+                word.insert(p, rand.choice(letters))
+        result.append("".join(word))
+    return result
+
+
+#=================================================================================================#
+
+
+@benchmark("Tone from name")
+def toneFromName():
+    names = [name + str(octave) for name in coltrane.Tone.tones for octave in range(9)]
+    def run():
+        for name in names:
+            coltrane.Tone(name)
+    return run, len(names)
+
+@benchmark("Tone from value")
+def toneFromValue():
+    values = list(range(108))
+    def run():
+        for v in values:
+            coltrane.Tone(v)
+            coltrane.Tone(v, prefer_sharp=True)
+    return run, 2 * len(values)
+
+@benchmark("Tone transposition")
+def toneTransposition():
+    tones = [coltrane.Tone(v) for v in range(108)]
+    def run():
+        for tone in tones:
+            tone.getSharpened()
+            tone.getFlattened()
+            tone.getTransposed(7)
+    return run, 3 * len(tones)
+
+@benchmark("ToneCollection.generate")
+def generate():
+    cases = [(coltrane.Tone(root), coltrane.Scale.stepsFor(name)) for root in ROOTS for name in SCALES]
+    def run():
+        for root, steps in cases:
+            coltrane.ToneCollection.generate(root, steps)
+    return run, len(cases)
+
+@benchmark("Scale.cleanScale")
+def cleanScale():
+    cases = [(coltrane.ToneCollection.generate(coltrane.Tone(root), coltrane.Scale.stepsFor(name)).tones,
+              root) for root in ROOTS for name in SCALES]
+    def run():
+        for tones, root in cases:
+            coltrane.Scale.cleanScale(list(tones), root=root)
+    return run, len(cases)
+
+@benchmark("Scale construction")
+def scaleConstruction():
+    cases = [(root, name) for root in ROOTS for name in SCALES]
+    def run():
+        for root, name in cases:
+            if name in coltrane.DiatonicMode.modes:
+                coltrane.DiatonicScale(root, name)
+            else:
+                coltrane.NonDiatonicScale(root, name)
+    return run, len(cases)
+
+@benchmark("Scale.smartParse")
+def smartParse():
+    cases = [(root, name) for root in ROOTS for name in SCALES]
+    coltrane.ScaleTable.warm(ROOTS)
+    def run():
+        for root, name in cases:
+            coltrane.Scale.smartParse(root, name)
+    return run, len(cases)
+
+@benchmark("Chord construction")
+def chordConstruction():
+    cases = [(root, quality) for root in ROOTS for quality in QUALITIES]
+    def run():
+        for root, quality in cases:
+            coltrane.Chord(root, quality)
+    return run, len(cases)
+
+@benchmark("Chord.identify")
+def identify():
+    cases = [coltrane.Chord(root, quality).tones for root in ROOTS for quality in QUALITIES]
+    def run():
+        for tones in cases:
+            coltrane.Chord.identify(tones)
+    return run, len(cases)
+
+@benchmark("ScaleFinder.find")
+def findScales():
+    cases = [coltrane.Chord(root, quality).tones for root in ROOTS for quality in QUALITIES]
+    def run():
+        for tones in cases:
+            coltrane.ScaleFinder.find(tones, limit=10)
+    return run, len(cases)
+
+@benchmark("ChordScale.scalesFor")
+def scalesForChords():
+    cases = [coltrane.Chord(root, quality) for root in ROOTS for quality in QUALITIES]
+    def run():
+        for chord in cases:
+            coltrane.ChordScale.scalesFor(chord, limit=10)
+    return run, len(cases)
+
+@benchmark("ChordSymbol.parse (uncached)")
+def parseSymbols():
+    symbols = [root + quality for root in ROOTS for quality in QUALITIES]
+    symbols += [s + "/" + bass for s in symbols[::7] for bass in ("E", "Bb")]
+    coltrane.ChordSymbol.parse("C")
+    def run():
+        coltrane.ChordSymbol._parsed.clear()
+        for symbol in symbols:
+            coltrane.ChordSymbol.parse(symbol)
+    return run, len(symbols)
+
+@benchmark("ChordProgression parsing")
+def progressions():
+    lines = ["| Cmaj7 A7 | Dm7 G7 | Em7 A7b9 | Dm7 G7 | Cmaj7 / C7 | Fmaj7 Bb7 | Em7 A7 | Dm7 G7 |",
+             "| Bbmaj7 | Bbm7 Eb7 | Abmaj7 | Am7-5 D7b9 | Gm7 | C7 | Cm7 | F7 |"] * 50
+    chords = sum(len(p) for p in coltrane.ChordProgression.stream(lines))
+    def run():
+        for progression in coltrane.ChordProgression.stream(lines):
+            pass
+    return run, chords
+
+@benchmark("AudioRenderer (seconds of audio)", requires=["numpy"])
+def renderAudio():
+    renderer = coltrane.AudioRenderer()
+    progression = coltrane.ChordProgression("| Dm7 G7 | Cmaj7 | Am7 D7 | Gmaj7 E7 |")
+    notes = list(renderer.progressionNotes(progression))
+    def run():
+        for chunk in renderer.iterChunks(notes):
+            pass
+    return run, len(progression.bars) * 2
+
+@benchmark("FrequencyQuantizer.segment (frames)", requires=["numpy"])
+def quantizeFrequencies():
+    rand = random.Random(0)
+    pitch, frequencies = 57.0, []
+    for i in range(100000):
+        pitch = min(max(pitch + rand.gauss(0, 0.2), 36), 84)
+        frequencies.append(0.0 if rand.random() < 0.05 else 440 * 2 ** ((pitch - 57) / 12))
+    quantizer = coltrane.FrequencyQuantizer(hysteresis=20, minLength=3)
+    def run():
+        quantizer.segment(frequencies)
+    return run, len(frequencies)
+
+@benchmark("FrequencyQuantizer (detuned)", requires=["numpy"])
+def quantizeDetuned():
+    # A melody played 30 cents sharp, so no frame is close enough to its tone to settle the held
+    # tone on its own and hysteresis has to be followed through every note change
+    rand = random.Random(0)
+    frequencies = []
+    for note in range(8000):
+        pitch = rand.randrange(50, 70) + 0.3
+        frequencies.extend(440 * 2 ** ((pitch + rand.gauss(0, 0.03) - 57) / 12) for i in range(20))
+    quantizer = coltrane.FrequencyQuantizer(hysteresis=25)
+    def run():
+        quantizer.quantize(frequencies)
+    return run, len(frequencies)
+
+@benchmark("Scale.fuzzyParse (uncached)")
+def fuzzyParseUncached():
+    names = typos(SCALES, 200)
+    index = coltrane.FuzzyIndex.forScales()
+    def run():
+        index.search.cache_clear()
+        for name in names:
+            coltrane.Scale.fuzzyParse(name)
+    return run, len(names)
+
+@benchmark("Scale.fuzzyParse (cached)")
+def fuzzyParseCached():
+    names = typos(SCALES, 200)
+    for name in names:
+        coltrane.Scale.fuzzyParse(name)
+    def run():
+        for name in names:
+            coltrane.Scale.fuzzyParse(name)
+    return run, len(names)
+
+
+#=================================================================================================#
+
+
+def measure(run, ops, repeat=5, min_time=0.2):
+    """Times a benchmark and measures its memory use
+
+    Args:
+        run (function): Performs ops operations
+        ops (int): The number of operations per call of run
+        repeat (int, optional): The number of timings to take; the fastest is used
+        min_time (float, optional): The minimum length of each timing, in seconds
+
+    Returns:
+        dict: ops_per_sec, peak_bytes (the most memory allocated at once during one run) and
+        retained_blocks (the memory blocks still allocated after one run)
+    """
+    run()
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for i in range(loops):
+            run()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            break
+        loops *= 2
+    best = elapsed
+    for i in range(repeat - 1):
+        start = time.perf_counter()
+        for j in range(loops):
+            run()
+        best = min(best, time.perf_counter() - start)
+
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    run()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    gc.collect()
+    retained = sys.getallocatedblocks() - blocks
+
+    return {
+        "ops_per_sec"       : ops * loops / best,
+        "peak_bytes"        : peak,
+        "retained_blocks"   : retained,
+    }
+
+def compare(results, baseline, threshold):
+    """Prints each benchmark's speed relative to a baseline and returns the names of those that
+    are slower by more than threshold (a fraction, e.g. 0.1 for 10%)"""
+    regressions = []
+    print()
+    print("%-32s %14s %14s %8s" % ("benchmark", "baseline/s", "current/s", "change"))
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old = baseline[name]["ops_per_sec"]
+        new = result["ops_per_sec"]
+        change = new / old - 1
+        flag = ""
+        if change < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print("%-32s %14.0f %14.0f %+7.1f%%%s" % (name, old, new, change * 100, flag))
+    return regressions
+
+def main(args):
+    parser = argparse.ArgumentParser(description="Benchmarks for coltrane's hot paths")
+    parser.add_argument("-k", dest="pattern", default="",
+                        help="only run benchmarks whose name contains this (case-insensitive)")
+    parser.add_argument("--repeat", type=int, default=5, help="timings per benchmark")
+    parser.add_argument("--save", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="FILE", help="compare the results with a baseline")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown counted as a regression (default 0.1, i.e. 10%%)")
+    options = parser.parse_args(args)
+
+    results = {}
+    print("%-32s %14s %12s %10s" % ("benchmark", "ops/sec", "peak bytes", "retained"))
+    for name, setup, requires in BENCHMARKS:
+        if options.pattern.lower() not in name.lower():
+            continue
+        module = missing(requires)
+        if module is not None:
+            print("%-32s %14s" % (name, "skipped (no " + module + ")"))
+            continue
+        run, ops = setup()
+        result = measure(run, ops, options.repeat)
+        results[name] = result
+        print("%-32s %14.0f %12d %10d" % (name, result["ops_per_sec"], result["peak_bytes"],
+                                          result["retained_blocks"]))
+
+    if options.save:
+        with open(options.save, "w") as f:
+            json.dump({
+                "python"    : platform.python_version(),
+                "machine"   : platform.machine(),
+                "results"   : results,
+            }, f, indent=4)
+
+    if options.compare:
+        with open(options.compare) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, options.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -6,7 +6,18 @@ Alex Schor
 5/18/2020
 """
 
-from fuzzywuzzy import process as fwp
+import heapq
+import mmap
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque, namedtuple
+from functools import lru_cache, wraps
+from itertools import combinations
+from operator import add, sub
+from time import perf_counter
 
 
 #=================================================================================================#
@@ -15,7 +26,14 @@ class Tone:
     """
     A class representing a Tone object. Contains a tone name (C#, Db, etc.) and a "value" (the
     number of half steps above C0). The default equality operation (==) does not consider enharmonic
-    tones equivalent (E# != Db), but the .equals() method does (E#.equals(Db) is true)."""
+    tones equivalent (E# != Db), but the .equals() method does (E#.equals(Db) is true).
+
+    Tones are immutable, hashable and interned: constructing a Tone from a name, a value or another
+    Tone returns a cached object, so the tones generated by scales and chords are shared rather
+    than allocated each time. Methods that change a tone (setOctave, setLetter, getSharpened, etc.)
+    return the resulting Tone instead of modifying it. So that the cache stays small, names may
+    have at most maxAccidentals sharps and flats and values must be between minValue and maxValue;
+    anything else raises a ValueError."""
 
     letters = ["C", "D", "E", "F", "G", "A", "B"]
 
@@ -57,11 +75,19 @@ class Tone:
         11: ("B" ,  "Cb"    )
     }
 
-    name = ""
-    value = None
+    _interned = {}
+    _parsed = {}
+    _fromValue = {}
+
+    maxAccidentals = 3
+    minValue = -128
+    maxValue = 255
+
+    __slots__ = ("name", "value")
 
-    def __init__(self, n, v = None, prefer_sharp = False):
-        """Initializes a Tone object
+    def __new__(cls, n, v = None, prefer_sharp = False):
+        """Returns the Tone object for a given name or value. Tones are immutable and interned, so
+        constructing the same tone twice returns the same cached object rather than a new one.
         
         Args:
             n (str, int, Tone): The tone's name or value. Providing one will assume the other. If
@@ -81,20 +107,51 @@ class Tone:
 
         """
         if isinstance(n, Tone):
-            self.name = n.name
-            self.value = n.value
+            return n
     
         elif v is not None and isinstance(v, int):
-            self.name = Tone(n).name
-            self.value = v
+            return Tone._intern(Tone(n).name, v)
     
         elif isinstance(n, str):
-            self.name, self.value = Tone.nameToValue(n, clean_name=True)
-
+            tone = Tone._parsed.get(n)
+            if tone is None:
+                tone = Tone._intern(*Tone.nameToValue(n, clean_name=True))
+                Tone._parsed[n] = tone
+            return tone
     
         elif isinstance(n, int):
-            self.value = n
-            self.name = Tone.valueToName(n, prefer_sharp)
+            tone = Tone._fromValue.get((n, prefer_sharp))
+            if tone is None:
+                tone = Tone._intern(Tone.valueToName(n, prefer_sharp), n)
+                Tone._fromValue[(n, prefer_sharp)] = tone
+            return tone
+
+        raise ValueError("Invalid Type: expected n to be Tone, string or int but instead was "
+                         + str(type(n)))
+
+    def _intern(name, value):
+        """Gets the unique Tone object with the given name and value, creating it if needed. The
+        name is not parsed, so it may contain accidentals that Tone.tones does not list (e.g. C##)
+        
+        Args:
+            name (str): The name of the tone, without an octave number
+            value (int): The tone's integer value (half steps above C0)
+        
+        Returns:
+            Tone: The interned tone
+        """
+        tone = Tone._interned.get((name, value))
+        if tone is None:
+            if not Tone.minValue <= value <= Tone.maxValue:
+                raise ValueError("Tone value " + str(value) + " is out of range ("
+                                 + str(Tone.minValue) + " to " + str(Tone.maxValue) + ")")
+            tone = object.__new__(Tone)
+            object.__setattr__(tone, "name", name)
+            object.__setattr__(tone, "value", value)
+            tone = Tone._interned.setdefault((name, value), tone)
+            if Stats.enabled:
+                Stats.count("Tone.created")
+        return tone
 
     def nameToValue(s, clean_name=False):
         """Gets the tone value (half steps above C0) given a tone name as a string
@@ -106,8 +163,11 @@ class Tone:
         
         Returns:
             int: the tone value
+
+        Raises:
+            KeyError: If the name isn't a tone name
+            ValueError: If the name has more than maxAccidentals sharps and flats
         """
-        # TODO: add support for double sharps and flats
         # TODO: add support for two-digit octave numbers
         
         octave = 0
@@ -115,7 +175,16 @@ class Tone:
             octave = int(s[-1])
             s = s[:-1]
 
-        value = Tone.tones[s] + octave * 12
+        if s in Tone.tones:
+            value = Tone.tones[s] + octave * 12
+        elif s[0] in Tone.letters and not s[1:].strip("#b"):
+            if len(s) - 1 > Tone.maxAccidentals:
+                raise ValueError("Too many accidentals in tone name " + repr(s[:10]))
+            # Names with other accidentals (e.g. C##, Fbb) are kept in the octave of their letter,
+            # as with Cb and E# above
+            value = (Tone.tones[s[0]] + s.count("#") - s.count("b")) % 12 + octave * 12
+        else:
+            raise KeyError(s)
         if clean_name:
             return s, value
         else:
@@ -166,11 +235,14 @@ class Tone:
 
 
     def setLetter(self, letter):
-        """Sets the letter of the tone to the given letter while preserving its pitch by adding
-        sharps or flats
+        """Respells the tone with the given letter while preserving its pitch by adding sharps or
+        flats. Tones are immutable, so this returns the respelled tone rather than changing this one
         
         Args:
             letter (str): the new letter for the tone
+
+        Returns:
+            Tone: The tone with the same value, spelled with the given letter
         """
 
         lValue = Tone.nameToValue(letter)
@@ -181,16 +253,11 @@ class Tone:
         elif (diff < -6):
             diff = 12 + diff
 
-        self.name = letter
         if diff > 0:
-            while diff > 0:
-                self.name += "#"
-                diff -= 1
-        elif diff < 0:
-            while diff < 0:
-                self.name += "b"
-                diff +=1
-
+            name = letter + "#" * diff
+        else:
+            name = letter + "b" * -diff
+        return Tone._intern(name, self.value)
 
 
     def getName(self):
@@ -227,22 +294,32 @@ class Tone:
             return (other.value - self.value)
 
     def getSharpened(self):
-        """Sharpens the tone (raises by a half-step) and returns a new Tone object
+        """Sharpens the tone (raises by a half-step) and returns the resulting Tone object
         
         Returns:
-            Tone: A new tone, equal to the old tone raised by one half-step
+            Tone: The tone equal to the old tone raised by one half-step
         """
-        new = Tone(self.value + 1, prefer_sharp = True)
-        return new
+        return Tone(self.value + 1, prefer_sharp = True)
 
     def getFlattened(self):
-        """Flattens the tone (lowers by a half-step) and returns a new Tone object
+        """Flattens the tone (lowers by a half-step) and returns the resulting Tone object
+        
+        Returns:
+            Tone: The tone equal to the old tone lowered by one half-step
+        """
+        return Tone(self.value - 1, prefer_sharp = False)
+
+    def getTransposed(self, interval, prefer_sharp = False):
+        """Transposes the tone by the given number of half-steps (e.g. C4.getTransposed(3) => Eb4)
+        
+        Args:
+            interval (int): The number of half-steps to transpose by (negative values go down)
+            prefer_sharp (bool, optional): See valueToName
         
         Returns:
-            Tone: A new tone, equal to the old tone lowered by one half-step
+            Tone: The transposed tone
         """
-        new = Tone(self.value - 1, prefer_sharp = False)
-        return new
+        return Tone(self.value + interval, prefer_sharp = prefer_sharp)
 
     def getOctave(self):
         """Returns the octave number of the tone (e.g. C4 => 4)
@@ -253,13 +330,34 @@ class Tone:
         return self.value // 12
 
     def setOctave(self, octave):
-        """Transposes the tone into the given octave number
+        """Transposes the tone into the given octave number. Tones are immutable, so this returns
+        the transposed tone rather than changing this one
         
         Args:
             octave (int): The octave number to transpose to
+
+        Returns:
+            Tone: The tone with the same name in the given octave
         """
         curOctave = self.getOctave()
-        self.value += 12*(octave - curOctave)
+        return Tone._intern(self.name, self.value + 12*(octave - curOctave))
+
+    def getFrequency(self, a4 = 440.0, tuning = None):
+        """Returns the frequency of the tone in Hz (e.g. A4 => 440.0, C4 => 261.63)
+
+        Args:
+            a4 (float, optional): The frequency of A4
+            tuning ([float], optional): 12 offsets from equal temperament in cents, indexed by
+            pitch class (C = 0), e.g. for a historical temperament. A is always tuned to a4, so
+            only the offsets relative to A's matter. Defaults to equal temperament
+
+        Returns:
+            float: The frequency
+        """
+        cents = 100 * (self.value - 57)
+        if tuning is not None:
+            cents += tuning[self.value % 12] - tuning[9]
+        return a4 * 2 ** (cents / 1200)
 
     def getAdjacentLetters(self):
         """Gets the adjacent letters (basically adjacent two tones in the Cmaj scale) (e.g F# => 
@@ -296,25 +394,21 @@ class Tone:
         Returns:
             [Tone]: the tones enharmonic to the given tone
         """
-        new = self.copy()
+        octave = self.getOctave() * 12
         toneNames = Tone.values[self.value % 12]
-        tones = list(Tone(n) for n in toneNames)
-        for n in tones:
-            n.setOctave(self.getOctave())
-        return tones
-        # return options
+        return list(Tone._intern(n, Tone.tones[n] + octave) for n in toneNames)
 
     def getEnharmonic(self):
         """Gets a Tone name enharmonic to the given tone. This only considers single flat
         and sharp tones (will never return C##). If no single sharp or flat tones are found, this
         returns a copy of the given tone unaltered.
         Returns:
-            Tone: A new Tone object
+            Tone: The enharmonic Tone object
         """
         for n in self.getEnharmonicTones():
             if not n.equals(self):
                 return n
-        return self.copy()
+        return self
 
     def getNatural(self):
         """Makes the tone natural, removing any accidentals from it (e.g. C# => C)
@@ -322,22 +416,18 @@ class Tone:
         Returns:
             Tone: The natural tone
         """
-        new = self.copy()
-        for i in range(new.name.count("#")):
-            new.name = new.name[:-1]
-            new.value -= 1
-        for i in range(new.name.count("b")):
-            new.name = new.name[:-1]
-            new.value +=1
-        return new
+        sharps = self.name.count("#")
+        flats = self.name.count("b")
+        return Tone._intern(self.name[0], self.value - sharps + flats)
 
     def copy(self):
-        """Makes a deep copy of the tone
+        """Returns the tone itself. Tones are immutable, so a copy is never needed; this is kept
+        for compatibility
         
         Returns:
-            Tone: A new Tone object
+            Tone: The same Tone object
         """
-        return Tone(self)
+        return self
 
     def equals(self, other, octmod = False):
         """Compates the tone to another tone. Considers enharmonic equivalents to be equal. (e.g.
@@ -361,17 +451,97 @@ class Tone:
         return self.getFullName()
 
     def __eq__(self, other):
+        if not isinstance(other, Tone):
+            return NotImplemented
         return (self.name == other.name) & (self.value == other.value)
 
+    def __hash__(self):
+        return hash((self.name, self.value))
+
+    def __setattr__(self, attr, value):
+        raise AttributeError("Tone objects are immutable")
+
+    def __delattr__(self, attr):
+        raise AttributeError("Tone objects are immutable")
+
+    def __reduce__(self):
+        return (Tone._intern, (self.name, self.value))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+#=================================================================================================#
+
+
+# Optional and slow-to-import dependencies are imported the first time they are needed, so that
+# importing coltrane stays fast and has no side effects.
+
+def _numpy():
+    """Imports NumPy, which is only needed for the batch operations in ToneArray"""
+    import numpy
+    return numpy
+
+def _fuzzywuzzy():
+    """Imports fuzzywuzzy's fuzz and process modules, which are only needed by FuzzyIndex"""
+    from fuzzywuzzy import fuzz, process
+    return fuzz, process
+
+def _rotateMask(mask, n):
+    """Transposes a 12-bit pitch-class mask (bit i set for pitch class i) up by n half-steps"""
+    n %= 12
+    return ((mask << n) | (mask >> (12 - n))) & 0xFFF
+
+def _bitCount(mask):
+    """Counts the pitch classes in a pitch-class mask"""
+    return bin(mask).count("1")
+
 
 #=================================================================================================#
 
 
 class ToneCollection(list):
-    tones = []
+    """A sequence of tones. Alongside the tones, a collection keeps mask, the 12-bit mask of its
+    pitch classes (bit i is set if a tone with pitch class i, C = 0, C# = 1, etc., is present), so
+    membership tests and set operations on pitch classes are a few bitwise operations. bits is the
+    same for exact tone values (bit value + bitOffset, which is never negative since tone values
+    are at least Tone.minValue), built the first time it is used. Both are updated whenever tones
+    is assigned, so a collection's tones should be replaced rather than modified in place."""
+
+    bitOffset = -Tone.minValue
+
+    _tones = []
+    mask = 0
+
     def __init__(self, tones):
         self.tones = list(Tone(n) for n in tones)
 
+    @property
+    def tones(self):
+        return self._tones
+
+    @tones.setter
+    def tones(self, tones):
+        self._tones = tones
+        mask = 0
+        for tone in tones:
+            mask |= 1 << (tone.value % 12)
+        self.mask = mask
+        self._bits = None
+        self._positions = None
+
+    @property
+    def bits(self):
+        if self._bits is None:
+            bits = 0
+            for tone in self._tones:
+                bits |= 1 << (tone.value + ToneCollection.bitOffset)
+            self._bits = bits
+        return self._bits
+
     def generate(root, steps=None, intervals=None):
         values = []
         if steps is not None:
@@ -391,17 +561,155 @@ class ToneCollection(list):
         return self.tones[i]
 
     def __eq__(self, other):
-        return self.tones == other.tones
+        return tuple(self.tones) == tuple(other.tones)
 
     def __iter__(self):
         for tone in self.tones:
             yield tone
 
+    def __len__(self):
+        return len(self.tones)
+
+    def __contains__(self, tone):
+        """Checks whether a tone (or an enharmonic equivalent, e.g. E# for F) is in the collection"""
+        tone = Tone(tone)
+        if not self.mask >> (tone.value % 12) & 1:
+            return False
+        return bool(self.bits >> (tone.value + ToneCollection.bitOffset) & 1)
+
+    def contains(self, tone, octmod = False):
+        """Checks whether a tone is in the collection
+        
+        Args:
+            tone (Tone, str, int): The tone
+            octmod (bool, optional): If true, a tone in any octave counts
+        
+        Returns:
+            bool: Whether the tone, or an enharmonic equivalent, is in the collection
+        """
+        if octmod:
+            return bool(self.mask >> (Tone(tone).value % 12) & 1)
+        return tone in self
+
     def index(self, tone, octmod = False):
-        for i, n in enumerate(self.tones):
-            if (n.equals(tone, octmod)):
-                return i
-        raise ValueError("Tone " + str(tone) + " not found in ToneCollection")
+        """Finds the first tone equal to a given one (see Tone.equals): the same name and value, or
+        with octmod the same pitch class, so enharmonic spellings only match with octmod
+        
+        Args:
+            tone (Tone, str, int): The tone
+            octmod (bool, optional): If true, the first tone with the same pitch class is found
+        
+        Returns:
+            int: The index of the tone
+        """
+        if self._positions is None:
+            positions = {}
+            for i, n in enumerate(self.tones):
+                positions.setdefault((n.name, n.value), i)
+                positions.setdefault(n.value % 12, i)
+            self._positions = positions
+        tone = Tone(tone)
+        i = self._positions.get(tone.value % 12 if octmod else (tone.name, tone.value))
+        if i is None:
+            raise ValueError("Tone " + str(tone) + " not found in ToneCollection")
+        return i
+
+    def intersection(self, other):
+        """Gets the tones whose pitch classes are also in another collection
+        
+        Args:
+            other ([Tone, str, int]): The other tones, or a ToneCollection
+        
+        Returns:
+            ToneCollection: This collection's tones with a pitch class in other
+        """
+        mask = self.mask & ToneCollection.pitchClassMask(other)
+        if mask == self.mask:
+            return ToneCollection(self.tones)
+        return ToneCollection([tone for tone in self.tones if mask >> (tone.value % 12) & 1])
+
+    def union(self, other):
+        """Gets the tones of this collection followed by those of another collection whose pitch
+        classes are not in this one
+        
+        Args:
+            other ([Tone, str, int]): The other tones, or a ToneCollection
+        
+        Returns:
+            ToneCollection: The tones
+        """
+        tones = list(self.tones)
+        mask = self.mask
+        for tone in other:
+            tone = Tone(tone)
+            if not mask >> (tone.value % 12) & 1:
+                tones.append(tone)
+                mask |= 1 << (tone.value % 12)
+        return ToneCollection(tones)
+
+    def difference(self, other):
+        """Gets the tones whose pitch classes are not in another collection
+        
+        Args:
+            other ([Tone, str, int]): The other tones, or a ToneCollection
+        
+        Returns:
+            ToneCollection: This collection's tones with a pitch class not in other
+        """
+        mask = self.mask & ~ToneCollection.pitchClassMask(other)
+        return ToneCollection([tone for tone in self.tones if mask >> (tone.value % 12) & 1])
+
+    def issubset(self, other):
+        """Checks whether every pitch class of this collection is in another"""
+        return not self.mask & ~ToneCollection.pitchClassMask(other)
+
+    def issuperset(self, other):
+        """Checks whether every pitch class of another collection is in this one"""
+        return not ToneCollection.pitchClassMask(other) & ~self.mask
+
+    def isdisjoint(self, other):
+        """Checks whether this collection shares no pitch classes with another"""
+        return not self.mask & ToneCollection.pitchClassMask(other)
+
+    def __and__(self, other):
+        return self.intersection(other)
+
+    def __or__(self, other):
+        return self.union(other)
+
+    def __sub__(self, other):
+        return self.difference(other)
+
+    def __le__(self, other):
+        return self.issubset(other)
+
+    def __ge__(self, other):
+        return self.issuperset(other)
+
+    def getSetClass(self):
+        """Gets the collection's set class (prime form, Forte name, interval vector, etc.)
+        
+        Returns:
+            SetClassInfo: The set class, from SetClass.lookup
+        """
+        return SetClass.lookup(self.mask)
+
+    def pitchClassMask(tones):
+        """Gets the 12-bit pitch-class mask of a sequence of tones, where bit i is set if a tone
+        with pitch class i (C = 0, C# = 1, etc.) is present
+        
+        Args:
+            tones ([Tone, str, int]): The tones, or a ToneCollection
+        
+        Returns:
+            int: The pitch-class mask
+        """
+        if isinstance(tones, ToneCollection):
+            return tones.mask
+        mask = 0
+        for tone in tones:
+            mask |= 1 << (Tone(tone).value % 12)
+        return mask
 
     def prettySequence(self, include_octaves = False, vertical = False):
         if vertical:
@@ -412,6 +720,256 @@ class ToneCollection(list):
 
 
 
+#=================================================================================================#
+
+
+class ToneArray:
+    """A NumPy array of tone values (half steps above C0) for operating on many tones at once.
+    Transposition, octave folding, intervals and pitch-class counts are whole-array operations, so
+    their cost grows with the length of the array rather than with the number of Python calls.
+    Names are only produced on request, via a 12-entry lookup table. Requires NumPy."""
+
+    def __init__(self, tones, dtype = None):
+        """Initializes a ToneArray
+        
+        Args:
+            tones (array, [Tone, str, int], ToneCollection, ToneArray): The tones. Arrays and lists
+            of ints are used as values directly; names are converted with fromNames
+            dtype (optional): The NumPy integer type to store the values as (default int32)
+        """
+        np = _numpy()
+        if dtype is None:
+            dtype = np.int32
+        if isinstance(tones, ToneArray):
+            values = tones.values
+        elif isinstance(tones, ToneCollection):
+            values = [tone.value for tone in tones]
+        else:
+            values = np.asarray(tones)
+            if values.dtype.kind == "U":
+                values = ToneArray.fromNames(values).values
+            elif values.dtype.kind not in "iu":
+                values = [Tone(tone).value for tone in tones]
+        self.values = np.asarray(values, dtype=dtype)
+
+    def fromNames(names):
+        """Converts an array of tone names (e.g. "C#4") to a ToneArray. Each distinct name is
+        parsed once
+        
+        Args:
+            names ([str]): The tone names
+        
+        Returns:
+            ToneArray: The tone values
+        """
+        np = _numpy()
+        unique, inverse = np.unique(np.asarray(names, dtype=str), return_inverse=True)
+        lookup = np.array([Tone(str(name)).value for name in unique], dtype=np.int32)
+        return ToneArray(lookup[inverse.reshape(-1)].reshape(np.shape(names)))
+
+    def fromFrequencies(frequencies, a4 = 440.0, tuning = None):
+        """Converts frequencies in Hz to the nearest tones. Unvoiced frames (zero, negative or NaN
+        frequencies) are left out; FrequencyQuantizer gives each frame's deviation in cents,
+        hysteresis and note segmentation
+        
+        Args:
+            frequencies (array): The frequencies
+            a4 (float, optional): The frequency of A4
+            tuning ([float], optional): 12 offsets from equal temperament in cents, indexed by
+            pitch class (see Tone.getFrequency)
+        
+        Returns:
+            ToneArray: The tones of the voiced frames
+        """
+        return FrequencyQuantizer(a4, tuning).quantize(frequencies).getTones()
+
+    def generate(roots, steps=None, intervals=None):
+        """Generates the tones of the same scale or chord shape from many roots at once, like
+        ToneCollection.generate
+        
+        Args:
+            roots ([Tone, str, int], ToneArray): The roots
+            steps ([int], optional): The steps between consecutive tones
+            intervals ([int], optional): The intervals above the root
+        
+        Returns:
+            ToneArray: A 2D array with one row per root
+        """
+        np = _numpy()
+        if steps is not None:
+            intervals = np.concatenate(([0], np.cumsum(steps)))
+        roots = ToneArray(roots).values
+        return ToneArray(roots[:, None] + np.asarray(intervals)[None, :])
+
+    def toToneCollection(self, prefer_sharp = False):
+        """Converts a 1D ToneArray to a ToneCollection
+        
+        Args:
+            prefer_sharp (bool, optional): See Tone.valueToName
+        
+        Returns:
+            ToneCollection: The tones
+        """
+        return ToneCollection(Tone(int(v), prefer_sharp=prefer_sharp) for v in self.values)
+
+    def getNames(self, prefer_sharp = False, include_octaves = False):
+        """Gets the name of every tone
+        
+        Args:
+            prefer_sharp (bool, optional): See Tone.valueToName
+            include_octaves (bool, optional): If true, octave numbers are appended (e.g. "C#4")
+        
+        Returns:
+            array: The names, as a NumPy string array with the same shape as the values
+        """
+        np = _numpy()
+        table = np.array([Tone.valueToName(v, prefer_sharp) for v in range(12)])
+        names = table[self.values % 12]
+        if include_octaves:
+            names = np.char.add(names, (self.values // 12).astype(str))
+        return names
+
+    def getPitchClasses(self):
+        """Gets the pitch class (0 to 11, C = 0) of every tone
+        
+        Returns:
+            array: The pitch classes
+        """
+        return self.values % 12
+
+    def getOctaves(self):
+        """Gets the octave number of every tone
+        
+        Returns:
+            array: The octave numbers
+        """
+        return self.values // 12
+
+    def getTransposed(self, interval):
+        """Transposes every tone by the given number of half-steps
+        
+        Args:
+            interval (int, array): The interval, or one interval per tone
+        
+        Returns:
+            ToneArray: The transposed tones
+        """
+        return ToneArray(self.values + interval, dtype=self.values.dtype)
+
+    def setOctave(self, octave):
+        """Moves every tone into the given octave, like Tone.setOctave
+        
+        Args:
+            octave (int, array): The octave number, or one octave number per tone
+        
+        Returns:
+            ToneArray: The transposed tones
+        """
+        return ToneArray(self.values % 12 + 12 * octave, dtype=self.values.dtype)
+
+    def foldOctave(self, low = 0):
+        """Folds every tone into the octave starting at the given tone (e.g. with low = G3, C5
+        becomes C4 and E3 becomes E4)
+        
+        Args:
+            low (Tone, str, int, optional): The lowest tone of the octave. Defaults to C0
+        
+        Returns:
+            ToneArray: The folded tones
+        """
+        low = Tone(low).value
+        return ToneArray(low + (self.values - low) % 12, dtype=self.values.dtype)
+
+    def getIntervals(self, other, octmod = False):
+        """Gets the interval from each tone to the corresponding tone in another array, like
+        Tone.getInterval
+        
+        Args:
+            other (ToneArray, array, int): The other tones
+            octmod (bool, optional): If true, octave differences are ignored
+        
+        Returns:
+            array: The intervals, in half-steps
+        """
+        other = ToneArray(other).values
+        if octmod:
+            return other % 12 - self.values % 12
+        return other - self.values
+
+    def getIntervalMatrix(self, octmod = False):
+        """Gets the interval between every pair of tones in a 1D array, where entry [i, j] is
+        tone i's interval to tone j
+        
+        Args:
+            octmod (bool, optional): If true, octave differences are ignored
+        
+        Returns:
+            array: A square matrix of intervals, in half-steps
+        """
+        values = self.values % 12 if octmod else self.values
+        return values[None, :] - values[:, None]
+
+    def getHistogram(self, weights = None):
+        """Counts the tones of each pitch class
+        
+        Args:
+            weights (array, optional): A weight (e.g. duration) for each tone
+        
+        Returns:
+            array: 12 counts, indexed by pitch class
+        """
+        np = _numpy()
+        return np.bincount(self.values.reshape(-1) % 12, weights=weights, minlength=12)
+
+    def getPitchClassMask(self):
+        """Gets the 12-bit pitch-class mask of the tones, as used by ToneCollection.pitchClassMask
+        
+        Returns:
+            int: The pitch-class mask
+        """
+        np = _numpy()
+        return int(np.bitwise_or.reduce(1 << (self.values.reshape(-1) % 12), initial=0))
+
+    def getFrequencies(self, a4 = 440.0, tuning = None):
+        """Gets the frequency of every tone in Hz, like Tone.getFrequency
+
+        Args:
+            a4 (float, optional): The frequency of A4
+            tuning ([float], optional): 12 offsets from equal temperament in cents, indexed by
+            pitch class (see Tone.getFrequency)
+
+        Returns:
+            array: The frequencies, as floats with the same shape as the values
+        """
+        np = _numpy()
+        cents = 100.0 * (self.values - 57)
+        if tuning is not None:
+            tuning = np.asarray(tuning, dtype=float)
+            cents += tuning[self.values % 12] - tuning[9]
+        return a4 * np.exp2(cents / 1200)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        values = self.values[i]
+        if values.ndim == 0:
+            return Tone(int(values))
+        return ToneArray(values, dtype=self.values.dtype)
+
+    def __iter__(self):
+        for v in self.values.reshape(-1):
+            yield Tone(int(v))
+
+    def __array__(self, dtype = None, copy = None):
+        if dtype is None:
+            return self.values
+        return self.values.astype(dtype)
+
+    def __str__(self):
+        return str(self.getNames(include_octaves=True).tolist())
+
+
 #=================================================================================================#
 
 
@@ -482,42 +1040,70 @@ class Scale(ToneCollection):
 
 
 
-    def smartParse(key, scaleName):
+    def stepsFor(scaleName):
+        """Gets the list of steps (in half-steps) for a diatonic mode or non-diatonic scale name
+        
+        Args:
+            scaleName (str): A name from DiatonicMode.modes or NonDiatonicScale.scales
+        
+        Returns:
+            [int]: The steps of the scale
+        """
         if scaleName in DiatonicMode.modes:
-            return DiatonicScale(key, scaleName)
+            return DiatonicMode.valueToSteps(DiatonicMode.modeToValue(scaleName))
         elif scaleName in NonDiatonicScale.scales:
-            return NonDiatonicScale(key, scaleName)
+            return NonDiatonicScale.scales[scaleName]
         else:
-            raise ValueError("Scale named", scaleName, "not recognized.") 
+            raise ValueError("Scale named", scaleName, "not recognized.")
+
+    def maskFor(scaleName):
+        """Gets the pitch-class mask of a scale with its root on C (see ToneCollection.mask)
+        
+        Args:
+            scaleName (str): A name from DiatonicMode.modes or NonDiatonicScale.scales
+        
+        Returns:
+            int: The mask
+        """
+        mask = 1
+        value = 0
+        for step in Scale.stepsFor(scaleName):
+            value += step
+            mask |= 1 << value % 12
+        return mask
+
+    def smartParse(key, scaleName):
+        """Looks up a diatonic or non-diatonic scale by name. Results come from ScaleTable and are
+        shared between callers, so they should not be modified."""
+        return ScaleTable.lookup(key, scaleName)
 
     def fuzzyParse(scaleName):
-    	allValidNames = list(DiatonicMode.modes.keys())\
-    					+ list(NonDiatonicScale.scales.keys())
     	if (scaleName.lower() in DiatonicMode.modes) or (scaleName.lower() in NonDiatonicScale.scales):
     		return [[scaleName.lower(), 100]]
     	else:
-    		options = fwp.extract(scaleName, allValidNames, limit=3)
-    		goodOptions = []
-    		for o in options:
-    			if o[1] > 75:
-    				goodOptions.append(o)
-    		return goodOptions
+    		if Stats.enabled:
+    			Stats.count("Scale.fuzzyParse.fuzzy")
+    		return list(FuzzyIndex.forScales().search(scaleName, 3, 75))
     				
 
 
 
     def cleanScale(tones, root=None):
-        if root is not None:
-            root = Tone(root)
-            root.setOctave(tones[0].getOctave())
-            if tones[0] != root:
-                tones[0] = tones[0].getEnharmonic()
-        if len(tones) is 8:        
-	        for i in range(0, len(tones)-1):
-	            if tones[i+1].getLetter() != tones[i].getNextLetter():
-	                tones[i+1].setLetter(tones[i].getNextLetter())
-
-        return tones
+        """Respells the tones of a scale so that each has the right letter for its degree, using
+        the Spelling table
+        
+        Args:
+            tones ([Tone]): The scale's tones, starting with the root
+            root (Tone, str, int, optional): The root, whose spelling the scale follows (e.g. C#
+            rather than Db). Defaults to the first tone
+        
+        Returns:
+            [Tone]: The respelled tones
+        """
+        rootName = tones[0].name if root is None else Tone(root).name
+        base = tones[0].value
+        names = Spelling.spell(rootName, tuple(tone.value - base for tone in tones))
+        return [Tone._intern(name, tone.value) for name, tone in zip(names, tones)]
 
 
 
@@ -596,37 +1182,793 @@ class NonDiatonicScale(Scale):
         super().__init__(key, steps=steps)           
 
 
+#=================================================================================================#
 
 
-#=================================================================================================#
+class ScaleTable:
+    """A table of the scales returned by Scale.smartParse, keyed by (root, scale name). Entries are
+    built the first time they are requested, or all at once with warm(), and are shared between
+    callers, so their tones are stored as tuples and should be treated as read-only. Diatonic mode
+    aliases ("major" and "ionian", "minor" and "aeolian") share an entry.
 
+    Setting maxsize bounds the table, evicting the least recently used entry when it is full. The
+    hits and misses counters are reported by stats() along with the hit rate, which can be used to
+    size it."""
 
-class Chord(ToneCollection):
+    table = OrderedDict()
+    maxsize = None
+    hits = 0
+    misses = 0
 
-    quality_intervals = {
-        '5'         :       (0, 7), 
-        'sus'       :       (0, 7),
-        ''          :       (0, 4, 7),
-        'maj'       :       (0, 4, 7),
-        'm'         :       (0, 3, 7),
-        'min'       :       (0, 3, 7),
-        'dim'       :       (0, 3, 6),
-        'aug'       :       (0, 4, 8),
-        'sus2'      :       (0, 2, 7),
-        'sus4'      :       (0, 5, 7),
-        '6'         :       (0, 4, 7, 9),
-        '7'         :       (0, 4, 7, 10),
-        '7-5'       :       (0, 4, 6, 10),
-        '7b5'       :       (0, 4, 6, 10),
-        '7+5'       :       (0, 4, 8, 10),
-        '7#5'       :       (0, 4, 8, 10),
-        '7sus4'     :       (0, 5, 7, 10),
-        'm6'        :       (0, 3, 7, 9),
-        'm7'        :       (0, 3, 7, 10),
-        'm7-5'      :       (0, 3, 6, 10),
-        'dim6'      :       (0, 3, 6, 9),
-        'M7'        :       (0, 4, 7, 11),
-        'maj7'      :       (0, 4, 7, 11),
+    def lookup(key, scaleName):
+        """Gets the scale with the given root and name, building it if it is not in the table
+        
+        Args:
+            key (Tone, str, int): The root of the scale
+            scaleName (str): A name from DiatonicMode.modes or NonDiatonicScale.scales
+        
+        Returns:
+            Scale: The shared DiatonicScale or NonDiatonicScale object
+        """
+        key = Tone(key)
+        if scaleName in DiatonicMode.modes:
+            entry = (key, DiatonicMode.valueToMode(DiatonicMode.modeToValue(scaleName)))
+        elif scaleName in NonDiatonicScale.scales:
+            entry = (key, scaleName)
+        else:
+            raise ValueError("Scale named", scaleName, "not recognized.")
+
+        scale = ScaleTable.table.get(entry)
+        if scale is not None:
+            ScaleTable.hits += 1
+            ScaleTable.table.move_to_end(entry)
+            return scale
+
+        ScaleTable.misses += 1
+        if entry[1] in DiatonicMode.modes:
+            scale = DiatonicScale(key, entry[1])
+        else:
+            scale = NonDiatonicScale(key, entry[1])
+        scale.tones = tuple(scale.tones)
+        ScaleTable.table[entry] = scale
+        while ScaleTable.maxsize is not None and len(ScaleTable.table) > ScaleTable.maxsize:
+            ScaleTable.table.popitem(last=False)
+        return scale
+
+    def names():
+        """Returns the scale names the table is keyed by: the canonical name of each diatonic mode
+        followed by every non-diatonic scale name
+        
+        Returns:
+            [str]: The scale names
+        """
+        return list(DiatonicMode.values.values()) + list(NonDiatonicScale.scales)
+
+    def warm(keys=None):
+        """Builds the table entries for every scale name in the given keys up front
+        
+        Args:
+            keys ([Tone, str, int], optional): The roots to build. Defaults to every tone name in
+            Tone.tones
+        
+        Returns:
+            int: The number of entries in the table
+        """
+        if keys is None:
+            keys = Tone.tones
+        for key in keys:
+            for scaleName in ScaleTable.names():
+                ScaleTable.lookup(key, scaleName)
+        return len(ScaleTable.table)
+
+    def stats():
+        """Reports the size of the table and how often lookups were served from it
+        
+        Returns:
+            dict: The size, maxsize, hits, misses and hit rate (between 0 and 1) of the table
+        """
+        lookups = ScaleTable.hits + ScaleTable.misses
+        return {
+            "size"      : len(ScaleTable.table),
+            "maxsize"   : ScaleTable.maxsize,
+            "hits"      : ScaleTable.hits,
+            "misses"    : ScaleTable.misses,
+            "hit_rate"  : ScaleTable.hits / lookups if lookups else 0.0,
+        }
+
+    def clear():
+        """Empties the table and resets its counters"""
+        ScaleTable.table.clear()
+        ScaleTable.hits = 0
+        ScaleTable.misses = 0
+
+
+#=================================================================================================#
+
+
+class Spelling:
+    """A table of note spellings for scales, keyed by (root name, interval pattern). The spelling
+    for each pair is worked out once, the first time it is needed, and reused from then on.
+
+    Spelling a scale means choosing a letter for each tone, which fixes it as a degree of the
+    root's major scale (e.g. Eb above C is a flattened third, D# a sharpened second). Scales with
+    seven tones to the octave use each letter once, as in Fb in C altered or Bbb in Fb major, unless
+    that would take triple accidentals. Other scales are spelled by a small dynamic program that
+    walks up the scale, giving each tone a letter at or above the previous tone's letter, and
+    minimizes a cost: common alterations of a degree (b3, #4, b7, ...) are cheaper than rare ones
+    (#3, b4, #7, ...), and so is reusing the previous tone's letter. So the blues scale is
+    C Eb F F# G Bb and the major pentatonic skips letters (C D E G A). Double accidentals only cost
+    extra on a degree that isn't the usual one for the interval, so scales on other roots keep the
+    degrees they have on C (Gb minor pentatonic is Gb Bbb Cb Db Fb, not Gb A Cb Db Fb).
+    """
+
+    table = {}
+
+    major = (0, 2, 4, 5, 7, 9, 11)
+
+    # The cost of lowering and raising each degree of the major scale by a half-step
+    alterationCosts = ((3, 3), (1, 1.5), (1, 3), (3, 1), (1, 1.1), (1, 1.5), (1, 3))
+    doubleAccidentalCost = 2
+    repeatCost = 3
+
+    # The usual degree (0 to 6) of each interval from 0 to 11, the one whose alteration is cheapest
+    # above: 1 is b2, 3 is b3, 6 is #4, 8 is b6 and 10 is b7
+    preferred = (0, 1, 1, 2, 2, 3, 3, 4, 5, 5, 6, 6)
+
+    def spell(rootName, intervals):
+        """Gets the names of the tones of a scale
+        
+        Args:
+            rootName (str): The name of the root, without an octave number (e.g. "Eb")
+            intervals ((int)): The interval of each tone above the root, in ascending order,
+            starting with 0
+        
+        Returns:
+            (str): The name of each tone
+        """
+        names = Spelling.table.get((rootName, intervals))
+        if names is None:
+            names = Spelling._solve(rootName, intervals)
+            Spelling.table[(rootName, intervals)] = names
+        return names
+
+    def _solve(rootName, intervals):
+        """Runs the dynamic program described in the class docstring"""
+        letter = Tone.letters.index(rootName[0])
+        rootAccidental = rootName.count("#") - rootName.count("b")
+        heptatonic = len(set(i % 12 for i in intervals)) == 7
+
+        # For the k-th letter above the root's: degrees[k] is the interval of that degree of the
+        # root's major scale, and naturals[k] the interval from the root's letter (without its
+        # accidentals) up to that letter
+        degrees = []
+        naturals = []
+        for k in range(7 * (max(intervals) // 12 + 2)):
+            name = Tone.letters[(letter + k) % 7]
+            octave = (letter + k) // 7
+            degrees.append(Spelling.major[k % 7] + 12 * (k // 7))
+            naturals.append(Tone.tones[name] + 12 * octave - Tone.tones[rootName[0]])
+
+        def accidental(k, interval):
+            return interval + rootAccidental - naturals[k]
+
+        def cost(k, interval):
+            difference = interval - degrees[k]
+            if difference == 0:
+                c = 0
+            elif abs(difference) == 1:
+                c = Spelling.alterationCosts[k % 7][difference > 0]
+            else:
+                c = 4 * abs(difference)
+            accidentals = abs(accidental(k, interval))
+            if accidentals == 2 and Spelling.preferred[interval % 12] != k % 7:
+                c += Spelling.doubleAccidentalCost
+            elif accidentals > 2:
+                c += 100 * accidentals
+            return c
+
+        # best[k] is the (cost, letters) of the cheapest spelling of the tones so far that ends
+        # with letter k
+        repeatCost = 1000 if heptatonic else Spelling.repeatCost
+        best = {0: (cost(0, intervals[0]), (0,))}
+        for interval in intervals[1:]:
+            step = {}
+            for k in range(len(degrees)):
+                options = [(c + (repeatCost if j == k else 0), path) for j, (c, path) in best.items()
+                           if j <= k]
+                if options:
+                    c, path = min(options, key=lambda option: option[0])
+                    step[k] = (c + cost(k, interval), path + (k,))
+            best = step
+        path = min(best.values(), key=lambda option: option[0])[1]
+
+        names = []
+        for k, interval in zip(path, intervals):
+            a = accidental(k, interval)
+            names.append(Tone.letters[(letter + k) % 7] + ("#" * a if a > 0 else "b" * -a))
+        return tuple(names)
+
+
+#=================================================================================================#
+
+
+class KeyTracker:
+    """Estimates the key of a stream of tones. Each candidate key (a root and a scale from
+    KeyTracker.scales, or from a list given to the constructor) is scored against the pitch
+    classes heard: every tone in the scale adds to the score and every tone outside it subtracts
+    from it, with a bonus for the root and the fifth, which separates keys sharing the same
+    notes (such as C major and A minor). Ties go to the scale listed first.
+
+    The scores are kept up to date as tones are added: each tone adds its precomputed row of
+    weights to the scores, and with a sliding window the tone that falls out of the window
+    subtracts its row, so each tone costs the same however long the window is. estimate scores a
+    whole sequence at once from its pitch-class histogram."""
+
+    scales = ["ionian", "aeolian", "dorian", "mixolydian", "lydian", "phrygian", "locrian",
+              "harmonic minor", "melodic minor"]
+
+    # The weights of a tone in the scale, outside it, and the bonuses for the root and the fifth
+    inScale = 2
+    outOfScale = -2
+    rootBonus = 2
+    fifthBonus = 1
+
+    _tables = {}
+
+    def __init__(self, window = None, scales = None):
+        """Initializes a KeyTracker object
+        
+        Args:
+            window (int, optional): The number of most recent tones to consider. Defaults to every
+            tone added
+            scales ([str], optional): The scale names to consider. Defaults to KeyTracker.scales
+        """
+        self.window = window
+        self.candidates, self.weights = KeyTracker.getTable(scales)
+        self.scores = [0] * len(self.candidates)
+        self.histogram = [0] * 12
+        self.recent = deque()
+
+    def getTable(scales = None):
+        """Gets the candidate keys and the weight of each pitch class for each, building them the
+        first time a list of scales is used
+        
+        Args:
+            scales ([str], optional): The scale names. Defaults to KeyTracker.scales
+        
+        Returns:
+            ([(int, str)], [(int)]): The (root pitch class, scale name) of each candidate, and for
+            each pitch class, its weight in every candidate's score
+        """
+        scales = tuple(KeyTracker.scales if scales is None else scales)
+        table = KeyTracker._tables.get(scales)
+        if table is None:
+            candidates = []
+            weights = [[] for pc in range(12)]
+            for name in scales:
+                shape = Scale.maskFor(name)
+                for root in range(12):
+                    candidates.append((root, name))
+                    for pc in range(12):
+                        interval = (pc - root) % 12
+                        if not shape >> interval & 1:
+                            weight = KeyTracker.outOfScale
+                        else:
+                            weight = KeyTracker.inScale
+                            if interval == 0:
+                                weight += KeyTracker.rootBonus
+                            elif interval == 7:
+                                weight += KeyTracker.fifthBonus
+                        weights[pc].append(weight)
+            table = KeyTracker._tables[scales] = (candidates, [tuple(w) for w in weights])
+        return table
+
+    def add(self, tone):
+        """Adds a tone to the stream, dropping the oldest tone if the window is full
+        
+        Args:
+            tone (Tone, str, int): The tone
+        """
+        pc = Tone(tone).value % 12
+        self.scores = list(map(add, self.scores, self.weights[pc]))
+        self.histogram[pc] += 1
+        if self.window is not None:
+            self.recent.append(pc)
+            if len(self.recent) > self.window:
+                old = self.recent.popleft()
+                self.scores = list(map(sub, self.scores, self.weights[old]))
+                self.histogram[old] -= 1
+
+    def extend(self, tones):
+        """Adds several tones to the stream, in order
+        
+        Args:
+            tones ([Tone, str, int]): The tones
+        """
+        for tone in tones:
+            self.add(tone)
+
+    def getKey(self):
+        """Gets the most likely key of the tones in the window
+        
+        Returns:
+            KeyEstimate: The key, or None if no tones have been added
+        """
+        if not any(self.histogram):
+            return None
+        scores = self.scores
+        best = scores.index(max(scores))
+        return KeyTracker._estimate(self.candidates[best], scores[best])
+
+    def getRanking(self, limit = None):
+        """Ranks the candidate keys
+        
+        Args:
+            limit (int, optional): The maximum number of keys to return
+        
+        Returns:
+            [KeyEstimate]: The keys, most likely first
+        """
+        ranked = sorted(range(len(self.scores)), key=lambda i: -self.scores[i])[:limit]
+        return [KeyTracker._estimate(self.candidates[i], self.scores[i]) for i in ranked]
+
+    def reset(self):
+        """Forgets every tone added"""
+        self.scores = [0] * len(self.candidates)
+        self.histogram = [0] * 12
+        self.recent.clear()
+
+    def estimate(tones, scales = None):
+        """Estimates the key of a whole sequence of tones
+        
+        Args:
+            tones ([Tone, str, int]): The tones, or a ToneCollection or ToneArray
+            scales ([str], optional): The scale names to consider. Defaults to KeyTracker.scales
+        
+        Returns:
+            KeyEstimate: The key, or None if there are no tones
+        """
+        candidates, weights = KeyTracker.getTable(scales)
+        if isinstance(tones, ToneArray):
+            histogram = [int(count) for count in tones.getHistogram()]
+        else:
+            histogram = [0] * 12
+            for tone in tones:
+                histogram[Tone(tone).value % 12] += 1
+        if not any(histogram):
+            return None
+        scores = [0] * len(candidates)
+        for pc, count in enumerate(histogram):
+            if count:
+                scores = [s + count * w for s, w in zip(scores, weights[pc])]
+        best = scores.index(max(scores))
+        return KeyTracker._estimate(candidates[best], scores[best])
+
+    def _estimate(candidate, score):
+        root, name = candidate
+        return KeyEstimate(Tone(root), name, score)
+
+
+class KeyEstimate(namedtuple("KeyEstimate", "root name score")):
+    """A key found by KeyTracker. root is a Tone, name is a scale name and score is the key's
+    score (higher is more likely)."""
+    __slots__ = ()
+
+    def getScale(self):
+        """Gets the key's scale
+        
+        Returns:
+            Scale: The shared scale object from Scale.smartParse
+        """
+        return Scale.smartParse(self.root, self.name)
+
+
+#=================================================================================================#
+
+
+class SetClass:
+    """A table of the set-class data of all 4096 pitch-class sets: the prime form, Forte name and
+    interval-class vector of each set, and the transposition or inversion that takes the prime
+    form to it. The table is built the first time it is used (which takes a few milliseconds)
+    and kept as arrays indexed by pitch-class mask (see ToneCollection.mask), so looking up a set
+    is a few array accesses.
+
+    Prime forms are Rahn's: of the 24 transpositions and inversions of a set, the one whose mask
+    is smallest. This differs from Forte's for 5-20, 6-Z29, 6-31, 7-Z18, 7-20 and 8-26. Forte
+    names are listed in forte (with a member of each set class) for sets of 3 to 6 pitch classes;
+    sets of 7 to 9 take the name of their complement. Sets of 2 and 10 pitch classes are named by
+    interval class (2-1 to 2-6) and the rest 0-1, 1-1, 11-1 and 12-1."""
+
+    forte = {
+        3: ["012", "013", "014", "015", "016", "024", "025", "026", "027", "036", "037", "048"],
+        4: ["0123", "0124", "0134", "0125", "0126", "0127", "0145", "0156", "0167", "0235",
+            "0135", "0236", "0136", "0237", "Z0146", "0157", "0347", "0147", "0148", "0158",
+            "0246", "0247", "0257", "0248", "0268", "0358", "0258", "0369", "Z0137"],
+        5: ["01234", "01235", "01245", "01236", "01237", "01256", "01267", "02346", "01246",
+            "01346", "02347", "Z01356", "01248", "01257", "01268", "01347", "Z01348", "Z01457",
+            "01367", "01378", "01458", "01478", "02357", "01357", "02358", "02458", "01358",
+            "02368", "01368", "01468", "01369", "01469", "02468", "02469", "02479", "Z01247",
+            "Z03458", "Z01258"],
+        6: ["012345", "012346", "Z012356", "Z012456", "012367", "Z012567", "012678", "023457",
+            "012357", "Z013457", "Z012457", "Z012467", "Z013467", "013458", "012458", "014568",
+            "Z012478", "012578", "Z013478", "014589", "023468", "012468", "Z023568", "Z013468",
+            "Z013568", "Z013578", "013469", "Z013569", "Z013689", "013679", "013589", "024579",
+            "023579", "013579", "02468A", "Z012347", "Z012348", "Z012378", "Z023458", "Z012358",
+            "Z012368", "Z012369", "Z012568", "Z012569", "Z023469", "Z012469", "Z012479",
+            "Z012579", "Z013479", "Z014679"],
+    }
+
+    _primes = None
+    _transforms = None
+    _classes = None
+    _names = None
+
+    def buildTable():
+        """Builds the table. This is called automatically the first time it is used."""
+        primes = array("H", [0]) * 4096
+        transforms = array("B", [0xFF]) * 4096
+        for mask in range(4096):
+            if transforms[mask] != 0xFF:
+                continue
+            prime = min(SetClass.transform(mask, n, inverted) for n in range(12)
+                        for inverted in (False, True))
+            for inverted in (False, True):
+                for n in range(12):
+                    image = SetClass.transform(prime, n, inverted)
+                    if transforms[image] == 0xFF:
+                        primes[image] = prime
+                        transforms[image] = n | inverted << 4
+        SetClass._primes = primes
+        SetClass._transforms = transforms
+
+        names = {}
+        for count, sets in SetClass.forte.items():
+            for number, s in enumerate(sets, 1):
+                z = s.startswith("Z")
+                mask = 0
+                for digit in s.lstrip("Z"):
+                    mask |= 1 << int(digit, 12)
+                prime = primes[mask]
+                names[prime] = "%d-%s%d" % (count, "Z" if z else "", number)
+                if count < 6:
+                    complement = primes[~mask & 0xFFF]
+                    names[complement] = "%d-%s%d" % (12 - count, "Z" if z else "", number)
+        for ic in range(1, 7):
+            names[primes[1 | 1 << ic]] = "2-%d" % ic
+            names[primes[0xFFF & ~(1 | 1 << ic)]] = "10-%d" % ic
+        for count, mask in ((0, 0), (1, 1), (11, 0x7FF), (12, 0xFFF)):
+            names[primes[mask]] = "%d-1" % count
+        SetClass._names = names
+
+        classes = {}
+        for prime in set(primes):
+            classes[prime] = SetClassInfo(names[prime], SetClass.maskToSet(prime),
+                                          SetClass.intervalVector(prime), None, 0, False)
+        byVector = {}
+        for prime, info in classes.items():
+            byVector.setdefault((_bitCount(prime), info.vector), []).append(prime)
+        for prime, info in classes.items():
+            partners = [p for p in byVector[(_bitCount(prime), info.vector)] if p != prime]
+            if partners:
+                classes[prime] = info._replace(zPartner=names[partners[0]])
+        SetClass._classes = classes
+
+    def lookup(tones):
+        """Gets the set-class data of a set of pitch classes
+        
+        Args:
+            tones ([Tone, str, int], int): The tones, a ToneCollection, or a pitch-class mask
+        
+        Returns:
+            SetClassInfo: The set class, with the transposition (and inversion) that takes the
+            prime form to the given set
+        """
+        if SetClass._primes is None:
+            SetClass.buildTable()
+        mask = tones if isinstance(tones, int) else ToneCollection.pitchClassMask(tones)
+        transform = SetClass._transforms[mask]
+        return SetClass._classes[SetClass._primes[mask]]._replace(
+            transposition=transform & 0xF, inverted=bool(transform >> 4))
+
+    def relation(a, b):
+        """Finds a transposition or inversion that takes one set of pitch classes to another
+        
+        Args:
+            a ([Tone, str, int], int): The first set (tones, a ToneCollection or a mask)
+            b ([Tone, str, int], int): The second set
+        
+        Returns:
+            (int, bool): n and whether the set is inverted, where b is a transposed up by n
+            semitones after inverting it (around C) if inverted is true, or None if the sets
+            belong to different set classes
+        """
+        a = SetClass.lookup(a)
+        b = SetClass.lookup(b)
+        if a.prime != b.prime:
+            return None
+        # b = Tb(prime) and a = Ta(prime), so b = Tb(Ta^-1(a)). Ta^-1 is T-n, or Ta itself for an
+        # inversion
+        if a.inverted:
+            n, inverted = a.transposition, True
+        else:
+            n, inverted = -a.transposition, False
+        if b.inverted:
+            n, inverted = b.transposition - n, not inverted
+        else:
+            n = n + b.transposition
+        return n % 12, inverted
+
+    def transform(mask, n, inverted = False):
+        """Transposes a pitch-class mask up by n semitones, after inverting it around C if
+        inverted is true"""
+        if inverted:
+            inverse = 0
+            for pc in range(12):
+                if mask >> pc & 1:
+                    inverse |= 1 << (-pc % 12)
+            mask = inverse
+        return _rotateMask(mask, n % 12)
+
+    def maskToSet(mask):
+        """Gets the pitch classes in a mask, lowest first"""
+        return tuple(pc for pc in range(12) if mask >> pc & 1)
+
+    def intervalVector(mask):
+        """Counts the pairs of pitch classes in a mask at each interval class from 1 to 6"""
+        pcs = SetClass.maskToSet(mask)
+        vector = [0] * 6
+        for i, a in enumerate(pcs):
+            for b in pcs[i + 1:]:
+                ic = min(b - a, 12 - (b - a))
+                vector[ic - 1] += 1
+        return tuple(vector)
+
+
+class SetClassInfo(namedtuple("SetClassInfo", "name prime vector zPartner transposition inverted")):
+    """A set class from SetClass.lookup. name is the Forte name (e.g. "4-Z15"), prime the prime form
+    as a tuple of pitch classes, vector the interval-class vector and zPartner the name of the set
+    class with the same vector (or None). The looked-up set is the prime form transposed up by
+    transposition semitones, after inverting it around C if inverted is true."""
+    __slots__ = ()
+
+
+#=================================================================================================#
+
+
+class FuzzyIndex:
+    """An n-gram index over a fixed vocabulary (such as scale names or chord qualities) for fuzzy
+    lookups. A query is broken into n-grams, the inverted index picks the few words sharing the
+    most n-grams with it, and only those are scored with fuzzywuzzy. Recent queries are kept in an
+    LRU cache, so repeated misspellings are answered without any scoring."""
+
+    _scales = None
+    _qualities = None
+
+    def __init__(self, vocabulary, n = 3, scorer = None, case_sensitive = False, shortlist = 8,
+                 cache_size = 1024):
+        """Initializes a FuzzyIndex
+        
+        Args:
+            vocabulary ([str]): The words to search
+            n (int, optional): The length of the n-grams
+            scorer (function, optional): A fuzzywuzzy scorer. Defaults to fuzzywuzzy's default
+            (WRatio), which ignores case and punctuation
+            case_sensitive (bool, optional): If true, n-grams keep the case of the words
+            shortlist (int, optional): The most candidates to score for each query. Only words sharing
+            at least half as many n-grams with the query as the best match are considered
+            cache_size (int, optional): The number of recent queries to cache
+        """
+        self.vocabulary = list(vocabulary)
+        self.n = n
+        self.scorer = scorer
+        self.case_sensitive = case_sensitive
+        self.shortlist = shortlist
+        self.postings = {}
+        self.sizes = []
+        for i, word in enumerate(self.vocabulary):
+            grams = self.getGrams(word)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(i)
+        self.search = lru_cache(maxsize=cache_size)(self._search)
+
+    def forScales():
+        """Gets the shared index over every scale name in DiatonicMode.modes and
+        NonDiatonicScale.scales
+        
+        Returns:
+            FuzzyIndex: The index
+        """
+        if FuzzyIndex._scales is None:
+            FuzzyIndex._scales = FuzzyIndex(list(DiatonicMode.modes) + list(NonDiatonicScale.scales))
+        return FuzzyIndex._scales
+
+    def forQualities():
+        """Gets the shared index over every chord quality in Chord.quality_intervals and every
+        alias the chord symbol parser accepts (ChordSymbol.aliases). Qualities are matched
+        case-sensitively (M7 and m7 differ) and with bigrams, since most are very short
+        
+        Returns:
+            FuzzyIndex: The index
+        """
+        if FuzzyIndex._qualities is None:
+            fuzz = _fuzzywuzzy()[0]
+            FuzzyIndex._qualities = FuzzyIndex(list(Chord.quality_intervals)
+                                               + list(ChordSymbol.aliases), n=2,
+                                               scorer=fuzz.ratio, case_sensitive=True)
+        return FuzzyIndex._qualities
+
+    def getGrams(self, word):
+        """Gets the set of n-grams of a word, padded with spaces at both ends
+        
+        Args:
+            word (str): The word
+        
+        Returns:
+            {str}: The n-grams
+        """
+        if not self.case_sensitive:
+            word = word.lower()
+        pad = " " * (self.n - 1)
+        word = pad + word + pad
+        return set(word[i:i+self.n] for i in range(len(word) - self.n + 1))
+
+    def _search(self, query, limit = 3, cutoff = 0):
+        """Finds the words most similar to the query. Use search, which caches the results
+        
+        Args:
+            query (str): The (possibly misspelled) word
+            limit (int, optional): The maximum number of results
+            cutoff (int, optional): Only results scoring above this (out of 100) are returned
+        
+        Returns:
+            ((str, int)): The words and their scores, best first
+        """
+        if Stats.enabled:
+            Stats.count("FuzzyIndex.scored")
+        grams = self.getGrams(query)
+        shared = {}
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        if not shared:
+            return ()
+        best = max(shared.values())
+        candidates = [i for i in shared if 2 * shared[i] >= best]
+        candidates.sort(key=lambda i: (-shared[i], abs(len(grams) - self.sizes[i])))
+        candidates = [self.vocabulary[i] for i in candidates[:self.shortlist]]
+        fwp = _fuzzywuzzy()[1]
+        if self.scorer is None:
+            options = fwp.extract(query, candidates, limit=limit)
+        else:
+            options = fwp.extract(query, candidates, processor=str, scorer=self.scorer, limit=limit)
+        return tuple((name, score) for name, score in options if score > cutoff)
+
+
+#=================================================================================================#
+
+
+class ScaleFinder:
+    """Answers "which scales contain these notes?" from an index of the pitch-class masks of every
+    scale in ScaleTable.names() at all 12 roots. Exact matches are a single dictionary lookup; the
+    ranked superset and overlap results for each distinct set of pitch classes are computed once
+    with a pass of bitwise operations over the index and cached."""
+
+    _shapes = None
+    _exact = None
+    _results = {}
+
+    def buildIndex():
+        """Builds the scale index. This is called automatically the first time find is used."""
+        shapes = []
+        exact = {}
+        for name in ScaleTable.names():
+            shape = Scale.maskFor(name)
+            for root in range(12):
+                mask = _rotateMask(shape, root)
+                shapes.append((mask, root, name))
+                exact.setdefault(mask, []).append((root, name))
+        ScaleFinder._shapes = shapes
+        ScaleFinder._exact = exact
+
+    def find(tones, match = "superset", limit = None):
+        """Finds the scales that fit a set of tones
+        
+        Args:
+            tones ([Tone, str, int]): The tones, or a ToneCollection
+            match (str, optional): "exact" finds scales made of exactly these pitch classes,
+            "superset" finds scales that contain all of them (fewest extra scale tones first), and
+            "overlap" ranks every scale by the number of tones it shares with them
+            limit (int, optional): The maximum number of results to return
+        
+        Returns:
+            [ScaleMatch]: The matching scales, best first
+        """
+        spelled = {}
+        mask = 0
+        for tone in tones:
+            tone = Tone(tone)
+            pc = tone.value % 12
+            mask |= 1 << pc
+            if pc not in spelled:
+                spelled[pc] = tone
+
+        ranked = ScaleFinder._results.get((mask, match))
+        if ranked is None:
+            ranked = ScaleFinder._rank(mask, match)
+            ScaleFinder._results[(mask, match)] = ranked
+
+        if limit is not None:
+            ranked = ranked[:limit]
+        return [ScaleMatch(spelled[root] if root in spelled else Tone(root), name, shared, missing,
+                           extra) for root, name, shared, missing, extra in ranked]
+
+    def _rank(mask, match):
+        """Computes the ranked (root, name, shared, missing, extra) tuples for ScaleFinder.find"""
+        if ScaleFinder._shapes is None:
+            ScaleFinder.buildIndex()
+        if match == "exact":
+            return tuple((root, name, _bitCount(mask), 0, 0)
+                         for root, name in ScaleFinder._exact.get(mask, ()))
+        elif match not in ("superset", "overlap"):
+            raise ValueError("Invalid match type:", match, "expected exact, superset or overlap")
+
+        ranked = []
+        for shape, root, name in ScaleFinder._shapes:
+            missing = mask & ~shape
+            if missing and match == "superset":
+                continue
+            shared = _bitCount(mask & shape)
+            if shared:
+                ranked.append((root, name, shared, _bitCount(missing), _bitCount(shape & ~mask)))
+        ranked.sort(key=lambda m: (-m[2], m[4]))
+        return tuple(ranked)
+
+
+class ScaleMatch(namedtuple("ScaleMatch", "root name shared missing extra")):
+    """A scale found by ScaleFinder.find. root is a Tone and name is a scale name; shared counts the
+    searched pitch classes in the scale, missing those not in it, and extra the scale's other
+    tones."""
+    __slots__ = ()
+
+    def getScale(self):
+        """Gets the matching scale
+        
+        Returns:
+            Scale: The shared scale object from Scale.smartParse
+        """
+        return Scale.smartParse(self.root, self.name)
+
+
+#=================================================================================================#
+
+
+class Chord(ToneCollection):
+
+    quality_intervals = {
+        '5'         :       (0, 7), 
+        'sus'       :       (0, 7),
+        ''          :       (0, 4, 7),
+        'maj'       :       (0, 4, 7),
+        'm'         :       (0, 3, 7),
+        'min'       :       (0, 3, 7),
+        'dim'       :       (0, 3, 6),
+        'aug'       :       (0, 4, 8),
+        'sus2'      :       (0, 2, 7),
+        'sus4'      :       (0, 5, 7),
+        '6'         :       (0, 4, 7, 9),
+        '7'         :       (0, 4, 7, 10),
+        '7-5'       :       (0, 4, 6, 10),
+        '7b5'       :       (0, 4, 6, 10),
+        '7+5'       :       (0, 4, 8, 10),
+        '7#5'       :       (0, 4, 8, 10),
+        '7sus4'     :       (0, 5, 7, 10),
+        'm6'        :       (0, 3, 7, 9),
+        'm7'        :       (0, 3, 7, 10),
+        'm7-5'      :       (0, 3, 6, 10),
+        'dim6'      :       (0, 3, 6, 9),
+        'M7'        :       (0, 4, 7, 11),
+        'maj7'      :       (0, 4, 7, 11),
         'M7+5'      :       (0, 4, 8, 11),
         'mM7'       :       (0, 3, 7, 11),
         'add9'      :       (0, 4, 7, 14),
@@ -673,19 +2015,2419 @@ class Chord(ToneCollection):
         '13#11'     :       (0, 4, 7, 10, 18, 21)
     }
 
-    def __init__(self, key, quality):
+    root = None
+    quality = None
+    bass = None
+
+    def __init__(self, key, quality, bass = None):
+        """Initializes a Chord object
+        
+        Args:
+            key (Tone, str, int): The root of the chord
+            quality (str): A key of Chord.quality_intervals
+            bass (Tone, str, int, optional): A bass note for slash chords (e.g. the E in C/E). If it
+            is a chord tone the chord is inverted so that tone is lowest; otherwise the bass note
+            is added below the root
+        """
         if quality not in Chord.quality_intervals:
             raise ValueError("Chord quality " + str(quality) + " not found")
         key = Tone(key)
         intervals = Chord.quality_intervals[quality]
-        self.tones = ToneCollection.generate(key, intervals=intervals)
+        tones = ToneCollection.generate(key, intervals=intervals).tones
+        if bass is not None:
+            bass = Tone(bass)
+            inverted = [t for t in tones if t.equals(bass, octmod=True)]
+            if inverted:
+                # Tones below the bass go up by as many octaves as they need to be above it
+                low = inverted[0].value
+                tones = sorted((t.setOctave(t.getOctave() + max(0, (low - t.value + 11) // 12))
+                                for t in tones), key=lambda t: t.value)
+            else:
+                below = (key.value - bass.value) % 12 or 12
+                if key.value < below:
+                    # Keep the bass note at or above C0 by moving the whole chord up an octave
+                    tones = [t.setOctave(t.getOctave() + 1) for t in tones]
+                tones = [Tone(bass.name, tones[0].value - below)] + tones
+        self.root = key
+        self.quality = quality
+        self.bass = bass
+        self.tones = tones
 
-class ChordProgression:
-    def __init__(self, s):
-        bars = list(chord.strip().split("/") for chord in s.split("|"))
-    
+    def fuzzyParse(quality):
+        """Suggests chord qualities similar to a possibly misspelled one, in the same format as
+        Scale.fuzzyParse
+        
+        Args:
+            quality (str): The chord quality (e.g. "maj9", "m7b5")
+        
+        Returns:
+            [(str, int)]: Up to three known qualities or aliases from ChordSymbol.aliases, with
+            their similarity scores (out of 100)
+        """
+        if quality in Chord.quality_intervals or quality in ChordSymbol.aliases:
+            return [[quality, 100]]
+        return list(FuzzyIndex.forQualities().search(quality, 3, 75))
+
+    _shapes = None
+    _index = None
+    _matches = {}
+    _identified = {}
+    identifyCacheSize = 100000
+
+    def buildIndex():
+        """Builds the pitch-class index used by identify. Each chord shape in quality_intervals is
+        transposed to all 12 roots and stored under its 12-bit pitch-class mask. Qualities with the
+        same pitch classes as one listed earlier (e.g. 'maj' and '') are aliases and are skipped.
+        This is called automatically the first time identify is used."""
+        shapes = []
+        index = {}
+        seen = set()
+        for quality, intervals in Chord.quality_intervals.items():
+            shape = ToneCollection.pitchClassMask(intervals)
+            if shape in seen:
+                continue
+            seen.add(shape)
+            for root in range(12):
+                mask = _rotateMask(shape, root)
+                shapes.append((mask, root, quality))
+                index.setdefault(mask, []).append((root, quality))
+        Chord._shapes = shapes
+        Chord._index = index
+
+    def identify(tones, partial = True):
+        """Names the chords formed by a set of tones. Matches are ranked with exact matches in root
+        position first, followed by inversions (where the lowest tone is not the root), then
+        partial matches that are missing one chord tone and/or have one extra tone. The ranking for
+        each distinct (pitch-class set, bass) pair is computed once and cached, and so are the
+        spelled results for recently seen tone sets (up to identifyCacheSize of them), so repeated
+        lookups are a dictionary hit.
+        
+        Args:
+            tones ([Tone, str, int]): The tones, or a ToneCollection. The lowest tone is the bass
+            partial (bool, optional): If false, only exact matches are returned
+        
+        Returns:
+            [ChordMatch]: The matching chords, best first
+        """
+        spelled = {}
+        mask = 0
+        bass = None
+        for tone in tones:
+            tone = Tone(tone)
+            pc = tone.value % 12
+            mask |= 1 << pc
+            if pc not in spelled:
+                spelled[pc] = tone
+            if bass is None or tone.value < bass.value:
+                bass = tone
+        if bass is None:
+            return []
+
+        spelling = (frozenset(spelled.values()), bass, partial)
+        matches = Chord._identified.get(spelling)
+        if matches is not None:
+            return list(matches)
+
+        bassPc = bass.value % 12
+        key = mask | (bassPc << 12) | (partial << 16)
+        ranked = Chord._matches.get(key)
+        if ranked is None:
+            ranked = Chord._rank(mask, bassPc, partial)
+            Chord._matches[key] = ranked
+
+        matches = []
+        for root, quality, missing, extra in ranked:
+            rootTone = spelled[root] if root in spelled else Tone(root)
+            symbol = rootTone.name + quality
+            if root != bassPc:
+                symbol += "/" + bass.name
+            matches.append(ChordMatch(symbol, rootTone, quality, bass, missing, extra))
+        if len(Chord._identified) >= Chord.identifyCacheSize:
+            Chord._identified.clear()
+        Chord._identified[spelling] = tuple(matches)
+        return matches
+
+    def _rank(mask, bassPc, partial):
+        """Computes the ranked (root, quality, missing, extra) tuples for Chord.identify"""
+        if Chord._index is None:
+            Chord.buildIndex()
+        ranked = [(root, quality, 0, 0) for root, quality in Chord._index.get(mask, ())]
+        if partial:
+            for shape, root, quality in Chord._shapes:
+                if shape == mask or _bitCount(shape & mask) < 2:
+                    continue
+                missing = _bitCount(shape & ~mask)
+                extra = _bitCount(mask & ~shape)
+                if missing <= 1 and extra <= 1:
+                    ranked.append((root, quality, missing, extra))
+        ranked.sort(key=lambda m: (m[2] + m[3], m[0] != bassPc, m[3]))
+        return tuple(ranked)
+
+
+class ChordMatch(namedtuple("ChordMatch", "symbol root quality bass missing extra")):
+    """A chord found by Chord.identify. symbol is the full chord name (e.g. "Am7/C"), root and bass
+    are Tones, quality is a key of Chord.quality_intervals, and missing and extra count the chord
+    tones absent from, and the tones not belonging to, the identified set."""
+    __slots__ = ()
+
+
+class ChordSymbolError(ValueError):
+    """Raised when a chord symbol can't be parsed. symbol is the symbol, and suggestions lists
+    known qualities and aliases similar to an unrecognized one (empty if the problem was
+    elsewhere)."""
+
+    def __init__(self, message, symbol, suggestions = ()):
+        super().__init__(message)
+        self.symbol = symbol
+        self.suggestions = list(suggestions)
+
+
+class ChordSymbol(namedtuple("ChordSymbol", "symbol root quality bass")):
+    """A parsed chord symbol (e.g. "Bbm7/F"). root and bass are Tones (bass is None unless the
+    symbol is a slash chord) and quality is a key of Chord.quality_intervals. Recently parsed
+    symbols are cached (up to parseCacheSize of them), so parsing the same string again returns the
+    same object.
+
+    Besides the qualities in Chord.quality_intervals, the parser accepts the common spellings in
+    aliases (e.g. "-7" and "min7" for "m7", "ø" for "m7-5", "Δ" for "maj7", and "6/9" for "69",
+    which is matched before any slash bass) and extensions in parentheses, which are added to the
+    quality in whatever order makes a known one ("C7(#5,b9)" is C7b9#5). Spaces are allowed between
+    the parts of a symbol."""
+    __slots__ = ()
+
+    aliases = {
+        "M"         : "maj",
+        "-"         : "m",
+        "mi"        : "m",
+        "-6"        : "m6",
+        "min6"      : "m6",
+        "-7"        : "m7",
+        "mi7"       : "m7",
+        "min7"      : "m7",
+        "-9"        : "m9",
+        "min9"      : "m9",
+        "-69"       : "m69",
+        "6/9"       : "69",
+        "m6/9"      : "m69",
+        "-6/9"      : "m69",
+        "min6/9"    : "m69",
+        "mmaj7"     : "mM7",
+        "-maj7"     : "mM7",
+        "minmaj7"   : "mM7",
+        "Δ"         : "maj7",
+        "Δ7"        : "maj7",
+        "^"         : "maj7",
+        "^7"        : "maj7",
+        "ma7"       : "maj7",
+        "Δ9"        : "maj9",
+        "^9"        : "maj9",
+        "ma9"       : "maj9",
+        "ø"         : "m7-5",
+        "ø7"        : "m7-5",
+        "m7b5"      : "m7-5",
+        "-7b5"      : "m7-5",
+        "min7b5"    : "m7-5",
+        "o"         : "dim",
+        "°"         : "dim",
+        "o7"        : "dim6",
+        "°7"        : "dim6",
+        "dim7"      : "dim6",
+        "+"         : "aug",
+        "+7"        : "7+5",
+        "aug7"      : "7+5",
+        "7aug"      : "7+5",
+        "7sus"      : "7sus4",
+        "9sus"      : "9sus4",
+        "add2"      : "add9",
+    }
+
+    _parsed = {}
+    parseCacheSize = 100000
+    _qualities = None
+    _extensions = None
+    _regex = None
+    _token = re.compile(r"(?:add|sus|maj|M)?[#b+-]?\d+")
+    _pattern = re.compile(r"([A-Ga-g])([#b]*)(.*?)(?:/([A-G][#b]*))?")
+
+    def compile():
+        """Builds the parser's regular expression, which matches the qualities and aliases longest
+        first. This is called automatically the first time a symbol is parsed."""
+        qualities = {quality: quality for quality in Chord.quality_intervals}
+        for alias, quality in ChordSymbol.aliases.items():
+            qualities.setdefault(alias, quality)
+        names = sorted((q for q in qualities if q), key=len, reverse=True)
 
+        # Every way of writing a quality as a shorter quality plus extensions, keyed by the shorter
+        # quality and the extensions in sorted order, so extensions can be looked up in any order
+        extensions = {}
+        for name, quality in qualities.items():
+            for i in range(len(name)):
+                tokens = ChordSymbol._tokens(name[i:])
+                if tokens is not None and name[:i] in qualities:
+                    extensions.setdefault((qualities[name[:i]], tokens), quality)
+        ChordSymbol._qualities = qualities
+        ChordSymbol._extensions = extensions
+        ChordSymbol._regex = re.compile(
+            r"\s*([A-Ga-g])([#b]*)\s*(" + "|".join(re.escape(q) for q in names) + r")?"
+            r"\s*(?:\(([^()]*)\))?\s*(?:/\s*([A-Ga-g][#b]*))?\s*")
 
+    def parse(symbol):
+        """Parses a chord symbol of the form <root><quality>[(<extensions>)][/<bass>]
+        
+        Args:
+            symbol (str): The chord symbol (e.g. "Eb7", "Am7b9#5", "C/E", "Bb-7", "G7(b9)")
+        
+        Returns:
+            ChordSymbol: The parsed symbol
+        
+        Raises:
+            ChordSymbolError: If the symbol can't be parsed
+        """
+        parsed = ChordSymbol._parsed.get(symbol)
+        if parsed is not None:
+            return parsed
+
+        if ChordSymbol._regex is None:
+            ChordSymbol.compile()
+        match = ChordSymbol._regex.fullmatch(symbol)
+        if match is None:
+            ChordSymbol._fail(symbol)
+        root, accidentals, quality, extensions, bass = match.groups()
+        quality = ChordSymbol._qualities[quality or ""]
+        if extensions is not None:
+            quality = ChordSymbol._extend(symbol, quality, extensions)
+        root = Tone(root.upper() + accidentals)
+        if bass is not None:
+            bass = Tone(bass[0].upper() + bass[1:])
+
+        parsed = ChordSymbol(symbol.strip(), root, quality, bass)
+        if len(ChordSymbol._parsed) >= ChordSymbol.parseCacheSize:
+            ChordSymbol._parsed.clear()
+        ChordSymbol._parsed[symbol] = parsed
+        return parsed
+
+    def _tokens(extensions):
+        """Splits extensions (e.g. "b9#5") into a sorted tuple, or returns None if they aren't
+        made of extensions"""
+        tokens = ChordSymbol._token.findall(extensions)
+        if "".join(tokens) != extensions:
+            return None
+        return tuple(sorted(tokens))
+
+    def _extend(symbol, quality, extensions):
+        """Adds parenthesized extensions, in any order, to a quality"""
+        joined = "".join(re.split(r"[\s,]+", extensions))
+        tokens = ChordSymbol._tokens(joined)
+        extended = ChordSymbol._extensions.get((quality, tokens)) if tokens else None
+        if extended is not None:
+            return extended
+        extended = quality + joined
+        raise ChordSymbolError("Chord quality " + extended + " not found in " + repr(symbol),
+                               symbol, [q for q, score in Chord.fuzzyParse(extended)])
+
+    def _fail(symbol):
+        """Raises a ChordSymbolError explaining why a symbol didn't parse"""
+        match = ChordSymbol._pattern.fullmatch(symbol.strip())
+        if match is None or not match.group(3):
+            raise ChordSymbolError("Invalid chord symbol: " + repr(symbol), symbol)
+        quality = match.group(3).strip()
+        raise ChordSymbolError("Chord quality " + quality + " not found in " + repr(symbol), symbol,
+                               [q for q, score in Chord.fuzzyParse(quality)])
+
+    def getChord(self):
+        """Builds the Chord the symbol names
+        
+        Returns:
+            Chord: The chord
+        """
+        return Chord(self.root, self.quality, self.bass)
+
+    def __str__(self):
+        return self.symbol
+
+
+class ChordProgression:
+    """A chord progression parsed from a lead-sheet string. Bars are separated by "|" and the
+    chords in a bar by whitespace or "/", e.g. "Dm7 / G7 | Cmaj7 |". A "/" followed directly by a
+    bare note name is read as a bass note instead, so "C/E" is one slash chord (and "C/D" is C over
+    D, not two chords), and one followed by a digit continues the chord, as in "C6/9". bars holds a tuple of ChordSymbols for each bar.
+
+    stream and streamFile parse one progression per line and yield them one at a time, so a corpus
+    of any size is parsed in constant memory; repeated chord symbols are interned by
+    ChordSymbol.parse. Parsing runs at roughly a million chords per second on a typical laptop."""
+
+    bars = ()
+
+    _bass = re.compile(r"[A-G][#b]*")
+
+    def __init__(self, s):
+        self.bars = tuple(ChordProgression.iterBars(s))
+
+    def fromBars(bars):
+        """Makes a progression from chords that are already parsed
+        
+        Args:
+            bars ([[ChordSymbol]]): The chords in each bar
+        
+        Returns:
+            ChordProgression: The progression
+        """
+        progression = ChordProgression.__new__(ChordProgression)
+        progression.bars = tuple(tuple(bar) for bar in bars if bar)
+        return progression
+
+    def iterBars(s):
+        """Parses a progression string one bar at a time. Empty bars are skipped
+        
+        Args:
+            s (str): The progression
+        
+        Yields:
+            (ChordSymbol): The chords in each bar
+        """
+        for bar in s.split("|"):
+            chords = []
+            for token in bar.split():
+                previous = None
+                for part in token.split("/"):
+                    if not part:
+                        continue
+                    if previous is not None and part[0].isdigit():
+                        previous += "/" + part
+                        chords[-1] = ChordSymbol.parse(previous)
+                    elif previous is not None and ChordProgression._bass.fullmatch(part):
+                        chords[-1] = ChordSymbol.parse(previous + "/" + part)
+                        previous = None
+                    else:
+                        chords.append(ChordSymbol.parse(part))
+                        previous = part
+            if chords:
+                yield tuple(chords)
+
+    def stream(source, strict = True):
+        """Parses progressions lazily, one per non-blank line
+        
+        Args:
+            source (str, file, [str]): A progression string, or an iterable of lines such as an
+            open file
+            strict (bool, optional): If false, lines that fail to parse are skipped instead of
+            raising a ValueError
+        
+        Yields:
+            ChordProgression: Each parsed progression
+        """
+        if isinstance(source, str):
+            source = source.splitlines()
+        for number, line in enumerate(source, 1):
+            if not line.strip():
+                continue
+            try:
+                yield ChordProgression(line)
+            except ValueError as e:
+                if strict:
+                    raise ValueError("Line " + str(number) + ": " + str(e))
+
+    def streamFile(path, strict = True, encoding = "utf-8"):
+        """Parses the progressions in a file lazily, one per non-blank line
+        
+        Args:
+            path (str): The path of the file
+            strict (bool, optional): If false, lines that fail to parse are skipped
+            encoding (str, optional): The file's text encoding
+        
+        Yields:
+            ChordProgression: Each parsed progression
+        """
+        with open(path, encoding=encoding) as f:
+            yield from ChordProgression.stream(f, strict)
+
+    def getChords(self):
+        """Gets every chord in the progression, in order
+        
+        Returns:
+            [ChordSymbol]: The chords
+        """
+        return [chord for bar in self.bars for chord in bar]
+
+    def __iter__(self):
+        for bar in self.bars:
+            yield from bar
+
+    def __len__(self):
+        return sum(len(bar) for bar in self.bars)
+
+    def __str__(self):
+        return " | ".join(" ".join(chord.symbol for chord in bar) for bar in self.bars)
+
+
+#=================================================================================================#
+
+
+class VoiceLeading:
+    """Voices chord progressions smoothly. Each chord can be played in many voicings: sets of
+    voices (distinct notes within a range) that cover the chord's tones, in any inversion unless a
+    slash chord fixes the bass. lead picks one voicing per chord so that the total movement of the
+    voices, in semitones, is as small as possible, using a dynamic program over the voicings of
+    consecutive chords.
+
+    Voicings follow the usual spacing and doubling rules, which also keep their number manageable
+    in wide ranges: adjacent voices above the bass are at most maxGap semitones apart, and only the
+    root or the bass note is doubled. When a chord has more tones than there are voices, its fifth
+    is left out first, then its lowest extensions.
+
+    The movement between two voicings is at least the difference of the sums of their notes, so
+    each step of the dynamic program looks at the previous chord's voicings in order of how close
+    their sums are to the next voicing's, and stops as soon as none of the rest could be cheaper,
+    rather than comparing every pair of voicings.
+
+    The voicings of each chord, and the transition table between the voicings of each pair of
+    consecutive chords (the sum order and the movements looked at so far), are cached for all
+    VoiceLeading objects with the same settings, so any progression that shares chord pairs with
+    one voiced before, or repeats a passage, reuses them."""
+
+    _voicings = {}
+    _transitions = {}
+    cacheSize = 10000
+    transitionCacheSize = 1000
+
+    def __init__(self, voices = 4, low = "C3", high = "C5", maxSpread = None, maxGap = 12):
+        """Initializes a VoiceLeading object
+        
+        Args:
+            voices (int, optional): The number of voices
+            low (Tone, str, int, optional): The lowest note any voice may play
+            high (Tone, str, int, optional): The highest note any voice may play
+            maxSpread (int, optional): The largest interval allowed between the lowest and highest
+            voices of a voicing, in semitones. Defaults to no limit besides the range
+            maxGap (int, optional): The largest interval allowed between adjacent voices above the
+            bass, in semitones, or None for no limit
+        """
+        low = Tone(low).value
+        high = Tone(high).value
+        if voices < 1 or high - low < voices - 1:
+            raise ValueError("Can't fit " + str(voices) + " voices between " + str(Tone(low))
+                             + " and " + str(Tone(high)))
+        self.voices = voices
+        self.low = low
+        self.high = high
+        self.maxSpread = high - low if maxSpread is None else maxSpread
+        self.maxGap = high - low if maxGap is None else maxGap
+        self.settings = (voices, low, high, self.maxSpread, self.maxGap)
+
+    def getVoicings(self, chord):
+        """Gets every voicing of a chord
+        
+        Args:
+            chord (Chord, ChordSymbol, str): The chord
+        
+        Returns:
+            [ToneCollection]: The voicings, each from lowest to highest voice
+        """
+        key, spelled = self._prepare(chord)
+        return [self._spell(voicing, spelled) for voicing in self._getVoicings(key)]
+
+    def lead(self, chords):
+        """Finds the voicings of a progression with the least total voice movement
+        
+        Args:
+            chords ([Chord, ChordSymbol, str]): The chords, or a ChordProgression
+        
+        Returns:
+            ([ToneCollection], int): The voicing chosen for each chord, from lowest to highest
+            voice, and the total movement in semitones
+        """
+        prepared = [self._prepare(chord) for chord in chords]
+        if not prepared:
+            return [], 0
+        voicings = [self._getVoicings(key) for key, spelled in prepared]
+
+        # costs[j] is the least total movement so far that ends with voicing j of the latest chord,
+        # and links[t][j] the voicing of chord t that leads to voicing j of chord t + 1
+        costs = [0] * len(voicings[0])
+        links = []
+        for (a, _), (b, _), sources, targets in zip(prepared, prepared[1:], voicings, voicings[1:]):
+            transition = VoiceLeading._transition(a, b, sources, targets)
+            costs, link = VoiceLeading._step(costs, sources, targets, transition)
+            links.append(link)
+
+        # Walk back through the links to recover the voicings that achieved the least cost
+        total = min(costs)
+        j = costs.index(total)
+        path = [j]
+        for link in reversed(links):
+            j = link[j]
+            path.append(j)
+        path.reverse()
+
+        return [self._spell(voicings[t][j], spelled)
+                for t, (j, (key, spelled)) in enumerate(zip(path, prepared))], total
+
+    def _transition(a, b, sources, targets):
+        """Gets the cached transition table from the voicings of one chord to those of the next,
+        given the keys from _prepare of both chords
+
+        Returns:
+            ([int], [int], [(int, int)], dict): The source voicings in order of the sums of their
+            notes, those sums, the sum of each target voicing and where it falls among them, and
+            the movement from source i to target j at i * len(targets) + j, filled as the
+            dynamic program needs it
+        """
+        transition = VoiceLeading._transitions.get((a, b))
+        if transition is None:
+            order = sorted(range(len(sources)), key=lambda i: sum(sources[i]))
+            sums = [sum(sources[i]) for i in order]
+            starts = [(sum(target), bisect_left(sums, sum(target))) for target in targets]
+            transition = order, sums, starts, {}
+            if len(VoiceLeading._transitions) >= VoiceLeading.transitionCacheSize:
+                VoiceLeading._transitions.clear()
+            VoiceLeading._transitions[a, b] = transition
+        return transition
+
+    def _step(costs, sources, targets, transition):
+        """Extends the dynamic program by one chord. For each target voicing, finds the source
+        voicing with the least cost plus movement to it, scanning sources outward from the
+        target's sum until the difference in sums alone rules out the rest
+
+        Returns:
+            ([int], [int]): The cost of each target voicing and the source it is reached from
+        """
+        order, sums, starts, moves = transition
+        least = min(costs)
+        count = len(order)
+        width = len(targets)
+        newCosts = []
+        link = []
+        for j, (total, high) in enumerate(starts):
+            low = high - 1
+            best = None
+            source = None
+            while low >= 0 or high < count:
+                if high >= count or (low >= 0 and total - sums[low] <= sums[high] - total):
+                    i = order[low]
+                    bound = total - sums[low]
+                    low -= 1
+                else:
+                    i = order[high]
+                    bound = sums[high] - total
+                    high += 1
+                if best is not None and least + bound >= best:
+                    break
+                if best is None or costs[i] + bound < best:
+                    move = moves.get(i * width + j)
+                    if move is None:
+                        move = moves[i * width + j] = sum(map(abs, map(sub, sources[i],
+                                                                        targets[j])))
+                    cost = costs[i] + move
+                    if best is None or cost < best:
+                        best = cost
+                        source = i
+            newCosts.append(best)
+            link.append(source)
+        return newCosts, link
+
+    def _prepare(self, chord):
+        """Gets the cache key of a chord's voicings and the names of its pitch classes"""
+        if isinstance(chord, str):
+            chord = ChordSymbol.parse(chord)
+        if isinstance(chord, ChordSymbol):
+            chord = chord.getChord()
+        if not isinstance(chord, Chord):
+            raise ValueError("Invalid Type: expected a Chord, ChordSymbol or string but instead was "
+                             + str(type(chord)))
+
+        spelled = {}
+        for tone in chord:
+            spelled.setdefault(tone.value % 12, tone.name)
+
+        # Pitch classes in order of importance: bass, root, chord tones within the octave, then
+        # extensions from the highest down, and the fifth last
+        root = chord.root.value
+        intervals = sorted(set(Chord.quality_intervals[chord.quality]) - {0},
+                           key=lambda i: (i % 12 == 7, i > 12, i if i < 12 else -i))
+        important = [root % 12] + [(root + i) % 12 for i in intervals]
+        bass = None
+        if chord.bass is not None:
+            bass = chord.bass.value % 12
+            important.insert(0, bass)
+        required = tuple(sorted(list(dict.fromkeys(important))[:self.voices]))
+        return (self.settings, required, bass, root % 12), spelled
+
+    def _getVoicings(self, key):
+        """Gets the cached voicings (tuples of values) for a key from _prepare"""
+        voicings = VoiceLeading._voicings.get(key)
+        if voicings is None:
+            (voices, low, high, maxSpread, maxGap), required, bass, root = key
+            pcs = set(required)
+            doubled = {root, bass}
+            values = [v for v in range(low, high + 1) if v % 12 in pcs]
+            voicings = []
+            for voicing in combinations(values, voices):
+                if voicing[-1] - voicing[0] > maxSpread:
+                    continue
+                if bass is not None and voicing[0] % 12 != bass:
+                    continue
+                if any(b - a > maxGap for a, b in zip(voicing[1:], voicing[2:])):
+                    continue
+                classes = [v % 12 for v in voicing]
+                if len(set(classes)) != len(pcs):
+                    continue
+                if len(classes) > len(pcs) and \
+                        any(classes.count(pc) > 1 for pc in pcs - doubled):
+                    continue
+                voicings.append(voicing)
+            voicings = tuple(voicings)
+            if not voicings:
+                raise ValueError("No voicing of the chord fits the range")
+            if len(VoiceLeading._voicings) >= VoiceLeading.cacheSize:
+                VoiceLeading._voicings.clear()
+            VoiceLeading._voicings[key] = voicings
+        return voicings
+
+    def _spell(self, voicing, spelled):
+        """Builds a ToneCollection from a voicing, naming each note as it is named in the chord"""
+        return ToneCollection([Tone._intern(spelled[v % 12], v) for v in voicing])
+
+
+#=================================================================================================#
+
+
+class ChordScale:
+    """A precomputed table of how well every scale fits every chord quality. Fit only depends on
+    the chord's quality, the scale and the interval from the chord's root up to the scale's root,
+    so the table has one entry per (quality, scale, interval) and covers every transposition. Each
+    entry packs four counts into an int:
+
+    - missing: chord tones that are not in the scale
+    - avoid: avoid notes, scale tones a half step above a chord tone (e.g. F over Cmaj7)
+    - passing: bebop passing tones, scale tones a half step below a chord tone and a half step
+      above another scale tone (e.g. Bb in bebop dominant, between A and Cmaj7's B)
+    - tensions: the scale's other tones, which are available as extensions (9ths, 11ths, 13ths)
+
+    The entries for each quality are also kept sorted by fit, so scalesFor is a lookup followed by
+    slicing. Chord qualities and scales with the same pitch classes as one listed earlier (e.g.
+    'maj' and '', or 'altered' and 'super locrian') share their entries."""
+
+    _degrees = ((3 << 3, 3 << 3), (7 << 6, 1 << 7), (3 << 10, 3 << 10))
+    _scales = None
+    _names = None
+    _rows = None
+    _matrix = None
+    _ranked = None
+
+    def buildMatrix():
+        """Builds the table. This is called automatically the first time it is used."""
+        scales = []
+        names = {}
+        seen = {}
+        for name in ScaleTable.names():
+            shape = Scale.maskFor(name)
+            if shape not in seen:
+                seen[shape] = len(scales)
+                scales.append((name, shape))
+            names[name] = seen[shape]
+
+        rows = {}
+        shapes = {}
+        matrix = array("H")
+        ranked = []
+        for quality, intervals in Chord.quality_intervals.items():
+            chord = ToneCollection.pitchClassMask(intervals)
+            if chord in shapes:
+                rows[quality] = shapes[chord]
+                continue
+            shapes[chord] = rows[quality] = len(ranked)
+
+            avoidable = _rotateMask(chord, 1) & ~chord
+            leading = _rotateMask(chord, 11) & ~chord & ~avoidable
+            natural = 1 << 2 | 1 << 5 | 1 << 9
+            for degree, tones in ChordScale._degrees:
+                if not chord & degree:
+                    natural |= tones
+            altered = ~chord & ~natural & 0xFFF
+            entries = []
+            for s, (name, shape) in enumerate(scales):
+                for offset in range(12):
+                    scale = _rotateMask(shape, offset)
+                    missing = _bitCount(chord & ~scale)
+                    avoid = _bitCount(scale & avoidable)
+                    passing = _bitCount(scale & leading & _rotateMask(scale, 1))
+                    extra = _bitCount(scale & ~chord)
+                    tensions = extra - avoid - passing
+                    matrix.append(missing | avoid << 4 | tensions << 8 | passing << 12)
+                    entries.append((missing, offset != 0, passing, _bitCount(scale & altered),
+                                    -extra, avoid, s * 12 + offset))
+            entries.sort()
+            ranked.append(array("H", (entry[-1] for entry in entries)))
+
+        ChordScale._scales = scales
+        ChordScale._names = names
+        ChordScale._rows = rows
+        ChordScale._matrix = matrix
+        ChordScale._ranked = ranked
+
+    def fit(chord, key, scaleName):
+        """Gets how well one scale fits a chord
+        
+        Args:
+            chord (Chord, ChordSymbol, str): The chord
+            key (Tone, str, int): The root of the scale
+            scaleName (str): The name of the scale
+        
+        Returns:
+            ScaleFit: The fit
+        """
+        root, quality = ChordScale._parse(chord)
+        key = Tone(key)
+        offset = (key.value - root.value) % 12
+        name = scaleName
+        if scaleName in DiatonicMode.modes:
+            name = DiatonicMode.valueToMode(DiatonicMode.modeToValue(scaleName))
+        if name not in ChordScale._names:
+            raise ValueError("Scale named " + str(scaleName) + " not recognized.")
+        s = ChordScale._names[name]
+        return ChordScale._entry(root, quality, s * 12 + offset, key)._replace(name=scaleName)
+
+    def scalesFor(chord, limit = None, partial = False):
+        """Lists the scales that fit a chord, best first: those built on the chord's root, then
+        those without bebop passing tones, then those with fewer altered tones (anything but chord
+        tones, the natural 9th, 11th and 13th and, if the chord has none, a 3rd, perfect 5th or
+        7th), then those with more tones, then those with fewer avoid notes. So Cm7 gets C dorian
+        first, C7 C mixolydian and Cmaj7 C ionian, and a scale doesn't rank higher just because
+        it has fewer tones.
+        
+        Args:
+            chord (Chord, ChordSymbol, str): The chord
+            limit (int, optional): The maximum number of results to return
+            partial (bool, optional): If true, scales missing some chord tones are included after
+            the others (fewest missing first)
+        
+        Returns:
+            [ScaleFit]: The scales
+        """
+        root, quality = ChordScale._parse(chord)
+        row = ChordScale._rows[quality]
+        matrix = ChordScale._matrix
+        base = row * len(ChordScale._scales) * 12
+        results = []
+        for index in ChordScale._ranked[row]:
+            if not partial and matrix[base + index] & 0xF:
+                break
+            results.append(ChordScale._entry(root, quality, index))
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def _parse(chord):
+        """Gets the root and quality of a chord given as a Chord, ChordSymbol or string"""
+        if ChordScale._matrix is None:
+            ChordScale.buildMatrix()
+        if isinstance(chord, str):
+            chord = ChordSymbol.parse(chord)
+        if isinstance(chord, (Chord, ChordSymbol)):
+            return Tone(chord.root), chord.quality
+        raise ValueError("Invalid Type: expected a Chord, ChordSymbol or string but instead was "
+                         + str(type(chord)))
+
+    def _entry(root, quality, index, key = None):
+        """Unpacks the table entry at an index (scale * 12 + offset) of a quality's row"""
+        row = ChordScale._rows[quality]
+        packed = ChordScale._matrix[row * len(ChordScale._scales) * 12 + index]
+        s, offset = divmod(index, 12)
+        if key is None:
+            key = root if offset == 0 else Tone((root.value + offset) % 12,
+                                                prefer_sharp="#" in root.name)
+        return ScaleFit(key, ChordScale._scales[s][0], packed & 0xF, packed >> 4 & 0xF,
+                        packed >> 8 & 0xF, packed >> 12)
+
+
+class ScaleFit(namedtuple("ScaleFit", "root name missing avoid tensions passing")):
+    """A scale's fit over a chord, from ChordScale. root is a Tone and name is a scale name;
+    missing counts the chord tones not in the scale, avoid the scale's avoid notes, passing its
+    bebop passing tones and tensions its other tones."""
+    __slots__ = ()
+
+    def getScale(self):
+        """Gets the scale
+        
+        Returns:
+            Scale: The shared scale object from Scale.smartParse
+        """
+        return Scale.smartParse(self.root, self.name)
+
+
+#=================================================================================================#
+
+
+class Corpus:
+    """The binary format written by CorpusWriter and read by CorpusReader, for storing large
+    numbers of chord progressions and tone collections compactly. All numbers are little-endian.
+
+    - A tone is a uint16: its value (as a 13-bit two's complement number) in the low bits and the
+      index of its letter in Tone.letters in the top 3. The accidentals follow from the two, so
+      the tone's spelling is kept (C## and D are stored differently).
+    - A chord is a 4-byte record: its root's spelled pitch class, the index of its quality in the
+      file's quality table, its bass's spelled pitch class (0xFF if it has none) and flags (bit 0
+      is set on the first chord of each bar). A spelled pitch class is a byte holding the letter
+      index in the high nibble and the number of sharps (negative for flats) plus 8 in the low one.
+
+    A file is a header followed by the chord records of every progression, a table of uint32
+    offsets where each progression's records start (with one more entry for the end), the packed
+    tones of every collection, a table of offsets where each collection's tones start, and the
+    chord qualities as UTF-8 text, one per line."""
+
+    magic = b"CLTR"
+    version = 1
+    header = struct.Struct("<4sHH10I")
+
+    _tones = {}
+
+    def packTone(tone):
+        """Packs a tone into its uint16 code
+        
+        Args:
+            tone (Tone, str, int): The tone
+        
+        Returns:
+            int: The code
+        """
+        tone = Tone(tone)
+        if not -0x1000 <= tone.value < 0x1000:
+            raise ValueError("Tone value " + str(tone.value) + " is out of range")
+        return (tone.value & 0x1FFF) | (Tone.letters.index(tone.name[0]) << 13)
+
+    def unpackTone(code):
+        """Gets the tone a uint16 code stands for
+        
+        Args:
+            code (int): The code
+        
+        Returns:
+            Tone: The tone
+        """
+        tone = Corpus._tones.get(code)
+        if tone is None:
+            value = code & 0x1FFF
+            if value & 0x1000:
+                value -= 0x2000
+            letter = code >> 13
+            if letter >= len(Tone.letters):
+                raise ValueError("Invalid tone code: " + str(code))
+            letter = Tone.letters[letter]
+            accidental = (value - Tone.tones[letter] + 6) % 12 - 6
+            name = letter + ("#" * accidental if accidental > 0 else "b" * -accidental)
+            tone = Corpus._tones[code] = Tone._intern(name, value)
+        return tone
+
+    def packPitchClass(tone):
+        """Packs the spelled pitch class of a tone (e.g. "Eb") into a byte"""
+        name = Tone(tone).name
+        accidental = name.count("#") - name.count("b")
+        if not -8 <= accidental < 8:
+            raise ValueError("Too many accidentals in " + name)
+        return (Tone.letters.index(name[0]) << 4) | (accidental + 8)
+
+    def unpackPitchClass(code):
+        """Gets the name of a spelled pitch class packed into a byte"""
+        accidental = (code & 0xF) - 8
+        return Tone.letters[code >> 4] + ("#" * accidental if accidental > 0 else "b" * -accidental)
+
+
+class CorpusWriter:
+    """Writes progressions and tone collections to a file in the Corpus format. Records are kept
+    packed in arrays until close() writes the file (4 bytes per chord and 2 per tone), so a writer
+    can be used as a context manager:
+
+        with CorpusWriter("corpus.bin") as writer:
+            for progression in ChordProgression.streamFile("corpus.txt"):
+                writer.addProgression(progression)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.qualities = list(Chord.quality_intervals)
+        self._qualityIds = {quality: i for i, quality in enumerate(self.qualities)}
+        self.chords = bytearray()
+        self.progressions = array("I", [0])
+        self.tones = array("H")
+        self.collections = array("I", [0])
+        self._records = {}
+
+    def addProgression(self, progression):
+        """Adds a chord progression
+        
+        Args:
+            progression (ChordProgression, str): The progression
+        """
+        if isinstance(progression, str):
+            progression = ChordProgression(progression)
+        chords = self.chords
+        for bar in progression.bars:
+            flags = 1
+            for chord in bar:
+                record = self._records.get(chord)
+                if record is None:
+                    bass = 0xFF if chord.bass is None else Corpus.packPitchClass(chord.bass)
+                    record = self._records[chord] = bytes((Corpus.packPitchClass(chord.root),
+                                                           self._qualityIds[chord.quality], bass))
+                chords += record
+                chords.append(flags)
+                flags = 0
+        self.progressions.append(len(chords) // 4)
+
+    def addCollection(self, tones):
+        """Adds a collection of tones, keeping their spelling
+        
+        Args:
+            tones ([Tone, str, int]): The tones, or a ToneCollection
+        """
+        self.tones.extend(Corpus.packTone(tone) for tone in tones)
+        self.collections.append(len(self.tones))
+
+    def close(self):
+        """Writes the file"""
+        progressions = self.progressions
+        tones = self.tones
+        collections = self.collections
+        if sys.byteorder != "little":
+            progressions, tones, collections = array("I", progressions), array("H", tones), \
+                array("I", collections)
+            for a in (progressions, tones, collections):
+                a.byteswap()
+        qualities = "\n".join(self.qualities).encode("utf-8")
+
+        chordsOffset = Corpus.header.size
+        progressionsOffset = chordsOffset + len(self.chords)
+        tonesOffset = progressionsOffset + 4 * len(progressions)
+        padding = b"\0" * (2 * len(tones) % 4)
+        collectionsOffset = tonesOffset + 2 * len(tones) + len(padding)
+        qualitiesOffset = collectionsOffset + 4 * len(collections)
+
+        with open(self.path, "wb") as f:
+            f.write(Corpus.header.pack(Corpus.magic, Corpus.version, 0, len(self.chords) // 4,
+                                       len(progressions) - 1, len(tones), len(collections) - 1,
+                                       chordsOffset, progressionsOffset, tonesOffset,
+                                       collectionsOffset, qualitiesOffset, len(qualities)))
+            f.write(self.chords)
+            f.write(progressions.tobytes())
+            f.write(tones.tobytes())
+            f.write(padding)
+            f.write(collections.tobytes())
+            f.write(qualities)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+
+
+class CorpusReader:
+    """Reads a file written by CorpusWriter. The file is memory-mapped and its tables are exposed
+    as memoryviews of the mapping, so opening even a very large corpus reads only the header and
+    the quality table, and records are decoded only when they are accessed. getChordRecords and
+    getToneCodes return the raw records without copying them.
+
+        with CorpusReader("corpus.bin") as corpus:
+            for progression in corpus:
+                ..."""
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a coltrane corpus: " + str(path))
+        self._view = memoryview(self._map)
+        self._views = []
+        if len(self._map) < Corpus.header.size:
+            self.close()
+            raise ValueError("Not a coltrane corpus: " + str(path))
+        (magic, version, reserved, chordCount, progressionCount, toneCount, collectionCount,
+         chordsOffset, progressionsOffset, tonesOffset, collectionsOffset, qualitiesOffset,
+         qualitiesLength) = Corpus.header.unpack_from(self._map)
+        if magic != Corpus.magic or version != Corpus.version:
+            self.close()
+            raise ValueError("Not a coltrane corpus (or an unsupported version): " + str(path))
+
+        self.progressionCount = progressionCount
+        self.collectionCount = collectionCount
+        try:
+            self.chords = self._table(chordsOffset, 4 * chordCount, "I")
+            self.progressions = self._table(progressionsOffset, 4 * (progressionCount + 1), "I")
+            self.tones = self._table(tonesOffset, 2 * toneCount, "H")
+            self.collections = self._table(collectionsOffset, 4 * (collectionCount + 1), "I")
+            self.qualities = bytes(self._table(qualitiesOffset, qualitiesLength, "B")) \
+                .decode("utf-8").split("\n")
+        except ValueError:
+            self.close()
+            raise
+        self._symbols = {}
+
+    def _table(self, offset, length, fmt):
+        """Gets a view of part of the file as an array of the given struct format"""
+        if offset + length > len(self._map) or offset % struct.calcsize(fmt):
+            raise ValueError("Corrupt or truncated coltrane corpus")
+        view = self._view[offset:offset + length].cast(fmt)
+        self._views.append(view)
+        if sys.byteorder != "little" and view.itemsize > 1:
+            view = array(fmt, view)
+            view.byteswap()
+        return view
+
+    def getChordRecords(self, i):
+        """Gets the raw chord records of a progression, without copying them
+        
+        Args:
+            i (int): The index of the progression
+        
+        Returns:
+            memoryview: The records as uint32s (root | quality << 8 | bass << 16 | flags << 24)
+        """
+        return self.chords[self.progressions[i]:self.progressions[i + 1]]
+
+    def getProgression(self, i):
+        """Decodes a progression
+        
+        Args:
+            i (int): The index of the progression
+        
+        Returns:
+            ChordProgression: The progression
+        """
+        if not 0 <= i < self.progressionCount:
+            raise IndexError("Progression index out of range")
+        chords = self.chords
+        symbols = self._symbols
+        bars = []
+        bar = None
+        for record in chords[self.progressions[i]:self.progressions[i + 1]]:
+            symbol = symbols.get(record & 0xFFFFFF)
+            if symbol is None:
+                bass = record >> 16 & 0xFF
+                s = Corpus.unpackPitchClass(record & 0xFF) + self.qualities[record >> 8 & 0xFF]
+                if bass != 0xFF:
+                    s += "/" + Corpus.unpackPitchClass(bass)
+                symbol = symbols[record & 0xFFFFFF] = ChordSymbol.parse(s)
+            if record >> 24 & 1 or bar is None:
+                bar = []
+                bars.append(bar)
+            bar.append(symbol)
+        return ChordProgression.fromBars(bars)
+
+    def getToneCodes(self, i):
+        """Gets the packed tones of a collection, without copying them
+        
+        Args:
+            i (int): The index of the collection
+        
+        Returns:
+            memoryview: The uint16 tone codes (see Corpus.packTone)
+        """
+        return self.tones[self.collections[i]:self.collections[i + 1]]
+
+    def getCollection(self, i):
+        """Decodes a tone collection
+        
+        Args:
+            i (int): The index of the collection
+        
+        Returns:
+            ToneCollection: The tones
+        """
+        if not 0 <= i < self.collectionCount:
+            raise IndexError("Collection index out of range")
+        return ToneCollection([Corpus.unpackTone(code) for code in self.getToneCodes(i)])
+
+    def getToneArray(self, i):
+        """Gets the values of a collection's tones as a ToneArray (requires NumPy)
+        
+        Args:
+            i (int): The index of the collection
+        
+        Returns:
+            ToneArray: The tone values
+        """
+        np = _numpy()
+        codes = np.frombuffer(self.getToneCodes(i), dtype=np.uint16).astype(np.int16)
+        return ToneArray((codes << 3) >> 3)
+
+    def __len__(self):
+        return self.progressionCount
+
+    def __iter__(self):
+        for i in range(self.progressionCount):
+            yield self.getProgression(i)
+
+    def close(self):
+        """Releases the memory map and closes the file. Views from getChordRecords or getToneCodes
+        that are still held stay valid: the mapping is then unmapped once the last of them is
+        released or garbage collected, instead of here"""
+        try:
+            for view in self._views:
+                view.release()
+            self._views = []
+            self.chords = self.progressions = self.tones = self.collections = None
+            self._view.release()
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+        finally:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+#=================================================================================================#
+
+
+class MidiFile:
+    """Reads the notes of a Standard MIDI File. The file is memory-mapped and each track is parsed
+    lazily by a generator, with the tracks' events merged in time order as they are read, so even
+    large files are read in memory proportional to the number of notes sounding at once. Times
+    are in beats (quarter notes) from the start of the file; getSeconds converts them using the
+    file's tempo changes.
+
+    Note values are tone values, with MIDI note 60 (middle C) as C4:
+
+        with MidiFile("tune.mid") as midi:
+            for window in midi.iterChords(window=2):
+                print(window.start, window.match.symbol if window.match else "-")"""
+
+    drumChannel = 9
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError("Not a MIDI file: " + str(path))
+        data = self._map
+        if len(data) < 14 or data[0:4] != b"MThd":
+            self.close()
+            raise ValueError("Not a MIDI file: " + str(path))
+        length, self.format, trackCount, division = struct.unpack_from(">IHHH", data, 4)
+        if division & 0x8000:
+            # SMPTE timing: frames per second (as a negative byte) and ticks per frame. Beats are
+            # taken to be half a second, MIDI's default tempo
+            self.ticksPerBeat = (256 - (division >> 8)) * (division & 0xFF) / 2
+        else:
+            self.ticksPerBeat = division
+
+        # Find the track chunks, skipping any other chunk types
+        self.tracks = []
+        p = 8 + length
+        while p + 8 <= len(data) and len(self.tracks) < trackCount:
+            kind = data[p:p + 4]
+            length = struct.unpack_from(">I", data, p + 4)[0]
+            if kind == b"MTrk":
+                self.tracks.append((p + 8, min(p + 8 + length, len(data))))
+            p += 8 + length
+        self._tempos = None
+
+    def _trackEvents(self, index):
+        """Parses one track lazily
+        
+        Yields:
+            (int, int, int, int, int): The tick, track index, status (with the channel cleared
+            for channel messages), channel (or meta type) and data of each note on, note off and
+            tempo event. Data is (note << 8 | velocity) for notes and microseconds per beat for
+            tempo changes
+        """
+        data = self._map
+        p, end = self.tracks[index]
+        tick = 0
+        running = None
+        try:
+            while p < end:
+                delta = 0
+                while True:
+                    byte = data[p]
+                    p += 1
+                    delta = delta << 7 | (byte & 0x7F)
+                    if byte < 0x80:
+                        break
+                tick += delta
+
+                status = data[p]
+                if status < 0x80:
+                    if running is None:
+                        raise ValueError("Data byte without a status in track " + str(index))
+                    status = running
+                else:
+                    p += 1
+
+                if status < 0xF0:
+                    running = status
+                    kind = status & 0xF0
+                    if kind in (0xC0, 0xD0):
+                        p += 1
+                        continue
+                    note, velocity = data[p], data[p + 1]
+                    p += 2
+                    if kind == 0x90 and velocity:
+                        yield tick, index, 0x90, status & 0x0F, note << 8 | velocity
+                    elif kind == 0x80 or kind == 0x90:
+                        yield tick, index, 0x80, status & 0x0F, note << 8
+                    continue
+
+                running = None
+                if status == 0xFF:
+                    meta = data[p]
+                    p += 1
+                length = 0
+                while True:
+                    byte = data[p]
+                    p += 1
+                    length = length << 7 | (byte & 0x7F)
+                    if byte < 0x80:
+                        break
+                if status == 0xFF and meta == 0x51 and length == 3:
+                    yield tick, index, 0xFF, 0x51, data[p] << 16 | data[p + 1] << 8 | data[p + 2]
+                elif status == 0xFF and meta == 0x2F:
+                    return
+                elif status not in (0xF0, 0xF7, 0xFF):
+                    raise ValueError("Invalid status byte " + hex(status) + " in track "
+                                     + str(index))
+                p += length
+        except IndexError:
+            raise ValueError("Track " + str(index) + " is truncated")
+
+    def iterEvents(self):
+        """Parses every track, merging their events in time order (see _trackEvents)"""
+        return heapq.merge(*(self._trackEvents(i) for i in range(len(self.tracks))))
+
+    def iterNotes(self, drums = False, maxLength = 64):
+        """Reads the file's notes in order of their start times. A note is held back only until
+        every note that started before it has ended, and notes longer than maxLength (such as
+        ones that are never turned off) are ended after maxLength, so memory use depends on how
+        many notes start within maxLength beats rather than on the length of the file
+        
+        Args:
+            drums (bool, optional): If true, notes on the drum channel (channel 10) are included
+            maxLength (float, optional): The longest a note can last, in beats
+        
+        Yields:
+            MidiNote: Each note
+        """
+        beat = self.ticksPerBeat
+        longest = maxLength * beat
+        sounding = {}
+        finished = []
+        order = 0
+        tick = 0
+        for tick, track, status, channel, data in self.iterEvents():
+            if status == 0xFF or (channel == MidiFile.drumChannel and not drums):
+                continue
+            note = data >> 8
+            if status == 0x90:
+                sounding.setdefault((channel, note), deque()).append((tick, data & 0xFF))
+            else:
+                starts = sounding.get((channel, note))
+                if starts:
+                    start, velocity = starts.popleft()
+                    if not starts:
+                        del sounding[(channel, note)]
+                    heapq.heappush(finished, (start, order, MidiNote(note - 12, velocity, channel,
+                                                                     start / beat, tick / beat)))
+                    order += 1
+
+            earliest = min((s[0][0] for s in sounding.values()), default=None)
+            if earliest is not None and earliest < tick - longest:
+                # End the notes that have lasted too long
+                for key, starts in list(sounding.items()):
+                    while starts and starts[0][0] < tick - longest:
+                        start, velocity = starts.popleft()
+                        heapq.heappush(finished, (start, order, MidiNote(
+                            key[1] - 12, velocity, key[0], start / beat, start / beat + maxLength)))
+                        order += 1
+                    if not starts:
+                        del sounding[key]
+                earliest = min((s[0][0] for s in sounding.values()), default=None)
+            while finished and (earliest is None or finished[0][0] <= earliest):
+                yield heapq.heappop(finished)[2]
+
+        # Notes still sounding at the end of the file end there
+        for (channel, note), starts in sounding.items():
+            for start, velocity in starts:
+                heapq.heappush(finished, (start, order, MidiNote(
+                    note - 12, velocity, channel, start / beat, min(tick, start + longest) / beat)))
+                order += 1
+        while finished:
+            yield heapq.heappop(finished)[2]
+
+    def iterChords(self, window = 1.0, drums = False, partial = True):
+        """Slices the file into windows of equal length and names the chord sounding in each
+        using Chord.identify
+        
+        Args:
+            window (float, optional): The length of each window, in beats
+            drums (bool, optional): If true, notes on the drum channel are included
+            partial (bool, optional): If false, only exact chord matches are used
+        
+        Yields:
+            MidiWindow: Each window, from the start of the file to the end of the last note
+        """
+        notes = self.iterNotes(drums)
+        upcoming = next(notes, None)
+        sounding = []
+        start = 0.0
+        while True:
+            end = start + window
+            while upcoming is not None and upcoming.start < end:
+                sounding.append(upcoming)
+                upcoming = next(notes, None)
+            sounding = [note for note in sounding if note.end > start]
+            if upcoming is None and not sounding:
+                return
+            values = tuple(sorted(set(note.value for note in sounding if note.start < end)))
+            matches = Chord.identify(values, partial) if values else []
+            yield MidiWindow(start, end, values, matches[0] if matches else None)
+            start = end
+
+    def getToneArray(self, drums = False):
+        """Gets the values of all the file's notes, in order of their start times (requires NumPy)
+        
+        Args:
+            drums (bool, optional): If true, notes on the drum channel are included
+        
+        Returns:
+            ToneArray: The note values
+        """
+        np = _numpy()
+        return ToneArray(np.fromiter((note.value for note in self.iterNotes(drums)), dtype=np.int64))
+
+    def getTempoMap(self):
+        """Gets the file's tempo changes
+        
+        Returns:
+            [(float, int)]: The beat of each tempo change and the new tempo in microseconds per
+            beat, starting with MIDI's default of 500000 (120 beats per minute) at beat 0
+        """
+        if self._tempos is None:
+            tempos = [(0.0, 500000)]
+            for tick, track, status, meta, tempo in self.iterEvents():
+                if status == 0xFF:
+                    if tick == 0:
+                        tempos[0] = (0.0, tempo)
+                    else:
+                        tempos.append((tick / self.ticksPerBeat, tempo))
+            self._tempos = tempos
+        return self._tempos
+
+    def getSeconds(self, beat):
+        """Converts a time in beats from the start of the file to seconds
+        
+        Args:
+            beat (float): The time in beats
+        
+        Returns:
+            float: The time in seconds
+        """
+        seconds = 0.0
+        tempos = self.getTempoMap()
+        for i, (start, tempo) in enumerate(tempos):
+            end = tempos[i + 1][0] if i + 1 < len(tempos) else beat
+            if beat <= start:
+                break
+            seconds += (min(beat, end) - start) * tempo / 1e6
+        return seconds
+
+    def close(self):
+        """Releases the memory map and closes the file"""
+        self._map.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MidiNote(namedtuple("MidiNote", "value velocity channel start end")):
+    """A note read by MidiFile. value is a tone value (MIDI note number - 12), channel is 0-15 and
+    start and end are times in beats."""
+    __slots__ = ()
+
+    def getTone(self):
+        """Gets the note's Tone
+        
+        Returns:
+            Tone: The tone, spelled with flats
+        """
+        return Tone(self.value)
+
+
+class MidiWindow(namedtuple("MidiWindow", "start end values match")):
+    """A window of time from MidiFile.iterChords. start and end are in beats, values holds the
+    distinct note values sounding during the window, lowest first, and match is the best
+    ChordMatch for them (or None)."""
+    __slots__ = ()
+
+
+#=================================================================================================#
+
+
+class AudioRenderer:
+    """Renders tones, scales, chords and progressions as audio, for auditioning them (requires
+    NumPy). Audio is described by notes: (value, start, end) tuples with times in seconds, sorted
+    by start time. scaleNotes, chordNotes and progressionNotes make notes from library objects, and
+    iterChunks, render and write turn notes into samples.
+
+    Samples are made one chunk at a time by a bank of oscillators with one row per sounding note,
+    so each chunk costs a few whole-array NumPy operations rather than a Python loop over samples,
+    and memory use depends on the chunk size and the number of overlapping notes rather than on the
+    length of the render. Each note is a sum of harmonics with a linear attack and release, and
+    harmonics above the Nyquist frequency are dropped. Chunks are not normalized (a long render
+    can't be), so every note has the same fixed volume and samples are clipped to [-1, 1]."""
+
+    def __init__(self, rate = 44100, a4 = 440.0, tuning = None, volume = 0.15,
+                 harmonics = (1.0, 0.5, 0.25), attack = 0.01, release = 0.05, low = "C3",
+                 chunkSize = 16384):
+        """Initializes an AudioRenderer
+
+        Args:
+            rate (int, optional): The sample rate, in samples per second
+            a4 (float, optional): The frequency of A4
+            tuning ([float], optional): 12 offsets from equal temperament in cents, indexed by
+            pitch class (see Tone.getFrequency)
+            volume (float, optional): The peak amplitude of one note
+            harmonics ([float], optional): The relative amplitude of each harmonic, starting with
+            the fundamental
+            attack (float, optional): The time each note takes to fade in, in seconds
+            release (float, optional): The time each note takes to fade out before its end
+            low (Tone, str, int, optional): Scales and chords lower than this (such as ones
+            generated in octave 0) are moved up by octaves until their lowest tone is at least this
+            chunkSize (int, optional): The number of samples rendered at once
+        """
+        np = _numpy()
+        self.rate = rate
+        self.a4 = a4
+        self.tuning = tuning
+        self.volume = volume
+        harmonics = np.asarray(harmonics, dtype=float)
+        self.harmonics = harmonics / harmonics.sum()
+        self.attack = attack
+        self.release = release
+        self.low = Tone(low).value
+        self.chunkSize = chunkSize
+
+    def getValues(self, tones):
+        """Gets the values of a scale or chord, moved up by octaves if it is lower than low
+
+        Args:
+            tones (ToneCollection, ChordSymbol, ToneArray, [Tone, str, int]): The tones
+
+        Returns:
+            array: The values
+        """
+        if isinstance(tones, ChordSymbol):
+            tones = tones.getChord()
+        values = ToneArray(tones).values.reshape(-1)
+        if len(values):
+            lowest = int(values.min())
+            if lowest < self.low:
+                values = values + 12 * -((lowest - self.low) // 12)
+        return values
+
+    def scaleNotes(self, tones, start = 0.0, length = 0.25):
+        """Makes notes that play tones one after another, e.g. a scale
+
+        Args:
+            tones (ToneCollection, ChordSymbol, ToneArray, [Tone, str, int]): The tones
+            start (float, optional): The time of the first note, in seconds
+            length (float, optional): The length of each note, in seconds
+
+        Returns:
+            [(int, float, float)]: The notes
+        """
+        return [(int(v), start + i * length, start + (i + 1) * length)
+                for i, v in enumerate(self.getValues(tones))]
+
+    def chordNotes(self, tones, start = 0.0, length = 1.0):
+        """Makes notes that play tones together, e.g. a chord
+
+        Args:
+            tones (ToneCollection, ChordSymbol, ToneArray, [Tone, str, int]): The tones
+            start (float, optional): The time the chord starts, in seconds
+            length (float, optional): The length of the chord, in seconds
+
+        Returns:
+            [(int, float, float)]: The notes
+        """
+        return [(int(v), start, start + length) for v in self.getValues(tones)]
+
+    def progressionNotes(self, progression, start = 0.0, barLength = 2.0):
+        """Makes notes that play a progression, with each bar's chords sharing the bar's length
+        equally. Notes are made as they are needed, so a progression of any length can be rendered
+
+        Args:
+            progression (ChordProgression, [ToneCollection]): The progression, or a list of
+            chords (e.g. voicings from VoiceLeading.lead), each of which is played for a bar
+            start (float, optional): The time the progression starts, in seconds
+            barLength (float, optional): The length of each bar, in seconds
+
+        Yields:
+            (int, float, float): Each note
+        """
+        bars = progression.bars if isinstance(progression, ChordProgression) else \
+            ((chord,) for chord in progression)
+        for i, bar in enumerate(bars):
+            length = barLength / len(bar)
+            for j, chord in enumerate(bar):
+                yield from self.chordNotes(chord, start + i * barLength + j * length, length)
+
+    def iterChunks(self, notes):
+        """Renders notes one chunk at a time. Every chunk but the last holds chunkSize samples;
+        the render ends when the last note does
+
+        Args:
+            notes ([(int, float, float)]): The notes, as (value, start, end) with times in seconds,
+            sorted by start time. Any iterable, including a generator, is read only as far as the
+            chunk being rendered
+
+        Yields:
+            array: The samples of each chunk, as float32 values between -1 and 1
+        """
+        np = _numpy()
+        rate = self.rate
+        size = self.chunkSize
+        attack = max(self.attack * rate, 1.0)
+        release = max(self.release * rate, 1.0)
+        orders = np.arange(1, len(self.harmonics) + 1)
+        notes = iter(notes)
+        upcoming = next(notes, None)
+        sounding = []
+        chunkStart = 0
+        while True:
+            chunkEnd = chunkStart + size
+            while upcoming is not None and round(upcoming[1] * rate) < chunkEnd:
+                value, start, end = upcoming
+                sounding.append((value, round(start * rate), round(end * rate)))
+                upcoming = next(notes, None)
+            sounding = [note for note in sounding if note[2] > chunkStart]
+            if upcoming is None:
+                if not sounding:
+                    return
+                chunkEnd = min(chunkEnd, max(note[2] for note in sounding))
+            if not sounding:
+                yield np.zeros(size, dtype=np.float32)
+                chunkStart = chunkEnd
+                continue
+
+            # Phases at the start of the chunk are reduced in float64, so the rest of the chunk can
+            # be computed in float32, where NumPy's sin is many times faster
+            values, starts, ends = (np.array(column) for column in zip(*sounding))
+            frequencies = ToneArray(values).getFrequencies(self.a4, self.tuning)
+            steps = (2 * np.pi / rate) * frequencies
+            offsets = chunkStart - starts
+            ramp = np.arange(chunkEnd - chunkStart, dtype=np.float32)
+            phase = ((steps * offsets) % (2 * np.pi)).astype(np.float32)[:, None] + \
+                steps.astype(np.float32)[:, None] * ramp
+            age = offsets.astype(np.float32)[:, None] + ramp
+            left = (ends - chunkStart).astype(np.float32)[:, None] - ramp
+            envelope = np.clip(np.minimum(age / attack, left / release), 0.0, 1.0)
+            amplitudes = (self.harmonics[None, :] * (frequencies[:, None] * orders < rate / 2) *
+                          self.volume).astype(np.float32)
+            samples = amplitudes[:, 0, None] * np.sin(phase)
+            for k in range(1, len(orders)):
+                samples += amplitudes[:, k, None] * np.sin((k + 1) * phase)
+            samples *= envelope
+            yield np.clip(samples.sum(axis=0), -1.0, 1.0)
+            chunkStart = chunkEnd
+
+    def render(self, notes):
+        """Renders notes into one array. For long renders, iterChunks and write use less memory
+
+        Args:
+            notes ([(int, float, float)]): The notes (see iterChunks)
+
+        Returns:
+            array: The samples, as float32 values between -1 and 1
+        """
+        np = _numpy()
+        return np.concatenate([np.zeros(0, dtype=np.float32)] + list(self.iterChunks(notes)))
+
+    def write(self, file, notes):
+        """Renders notes to a 16-bit mono WAV file, one chunk at a time
+
+        Args:
+            file (str, file): The path of the file, or a seekable binary file
+            notes ([(int, float, float)]): The notes (see iterChunks)
+
+        Returns:
+            int: The number of samples written
+        """
+        import wave
+        count = 0
+        with wave.open(file, "wb") as out:
+            out.setnchannels(1)
+            out.setsampwidth(2)
+            out.setframerate(self.rate)
+            for chunk in self.iterChunks(notes):
+                out.writeframesraw((chunk * 32767).astype("<i2").tobytes())
+                count += len(chunk)
+        return count
+
+
+class FrequencyQuantizer:
+    """Converts frequencies, such as the frames of a pitch tracker's output, to tone values in
+    bulk (requires NumPy). Each frame gets the nearest tone and its deviation from that tone in
+    cents; frames whose frequency is zero, negative or NaN are unvoiced. Everything is done with
+    whole-array operations, without making a Tone per frame.
+
+    With hysteresis, a frame only moves to a new tone once its pitch is more than 50 + hysteresis
+    cents from the tone being held, so a voice wavering around the boundary between two tones
+    doesn't flicker between them. Hysteresis is sequential by nature, but it only has to be
+    followed from one run of frames with the same nearest tone to the next, not frame by frame
+    (see hold)."""
+
+    def __init__(self, a4 = 440.0, tuning = None, hysteresis = 0.0, minLength = 1):
+        """Initializes a FrequencyQuantizer
+
+        Args:
+            a4 (float, optional): The frequency of A4
+            tuning ([float], optional): 12 offsets from equal temperament in cents, indexed by
+            pitch class (see Tone.getFrequency). Each offset must be less than 50 cents from A's
+            hysteresis (float, optional): The extra distance, in cents, a pitch must move past the
+            boundary between two tones before the held tone changes
+            minLength (int, optional): The fewest frames a note found by segment can have
+        """
+        np = _numpy()
+        self.a4 = a4
+        self.tuning = tuning
+        self.hysteresis = hysteresis
+        self.minLength = minLength
+        self.offsets = None
+        if tuning is not None:
+            self.offsets = (np.asarray(tuning, dtype=float) - tuning[9]) / 100
+
+    def getPitches(self, frequencies):
+        """Converts frequencies to fractional tone values (e.g. 440 Hz => 57.0, 445 Hz => 57.2)
+
+        Args:
+            frequencies (array): The frequencies in Hz, one per frame
+
+        Returns:
+            array: The pitches, with NaN for unvoiced frames
+        """
+        np = _numpy()
+        frequencies = np.asarray(frequencies, dtype=float).reshape(-1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            pitches = 57 + 12 * np.log2(frequencies / self.a4)
+        pitches[~np.isfinite(pitches)] = np.nan
+        return pitches
+
+    def getCenters(self, values):
+        """Gets the pitch each tone is tuned to, as a fractional tone value
+
+        Args:
+            values (array): The tone values
+
+        Returns:
+            array: The pitches
+        """
+        if self.offsets is None:
+            return values.astype(float)
+        return values + self.offsets[values % 12]
+
+    def quantize(self, frequencies):
+        """Finds the tone of every frame
+
+        Args:
+            frequencies (array): The frequencies in Hz, one per frame
+
+        Returns:
+            QuantizedPitches: The tone and deviation of every frame
+        """
+        np = _numpy()
+        pitches = self.getPitches(frequencies)
+        voiced = ~np.isnan(pitches)
+        pitches = np.where(voiced, pitches, 0.0)
+
+        # The nearest tone, from the candidates around the nearest equal-tempered tone
+        nearest = np.rint(pitches)
+        if self.offsets is not None:
+            candidates = nearest[:, None] + np.array([-1.0, 0.0, 1.0])
+            distances = np.abs(pitches[:, None] - self.getCenters(candidates.astype(np.int64)))
+            nearest = candidates[np.arange(len(pitches)), np.argmin(distances, axis=1)]
+        values = nearest.astype(np.int64)
+
+        if self.hysteresis > 0 and len(values):
+            values = self.hold(pitches, values, voiced)
+
+        cents = 100 * (pitches - self.getCenters(values))
+        values[~voiced] = -1
+        cents[~voiced] = np.nan
+        return QuantizedPitches(ToneArray(values), cents, voiced)
+
+    def hold(self, pitches, nearest, voiced):
+        """Applies hysteresis to the nearest tones of a run of frames. The frames are split into
+        runs with the same nearest tone. Each run either takes its own tone at its first frame more
+        than 50 + hysteresis cents from the tone held when it starts, or (if there is no such
+        frame) keeps holding that tone throughout. Assuming every run takes its own tone, so that
+        each run starts by holding the tone of the run before, the frame where every run switches
+        is found with whole-array operations. Only the runs that keep an older tone, and the runs
+        after them, are then followed one by one, each with at most one search of its own frames,
+        so the work stays linear in the number of frames
+
+        Args:
+            pitches (array): The pitch of every frame (see getPitches), with unvoiced frames at 0
+            nearest (array): The nearest tone value of every frame
+            voiced (array): Whether each frame is voiced
+
+        Returns:
+            array: The tone held at every frame
+        """
+        np = _numpy()
+        width = 0.5 + self.hysteresis / 100
+        count = len(nearest)
+        frames = np.arange(count)
+        starts = np.flatnonzero(np.concatenate(([True], (nearest[1:] != nearest[:-1]) |
+                                                (voiced[1:] != voiced[:-1]))))
+        lengths = np.diff(np.append(starts, count))
+        tones = nearest[starts]
+        sounding = voiced[starts]
+        fresh = sounding & np.concatenate(([True], ~sounding[:-1]))
+
+        # The frame where each run switches to its own tone if it starts holding the previous
+        # run's tone (count if it never does); runs after an unvoiced run start on their own tone
+        previous = np.concatenate((tones[:1], tones[:-1]))
+        far = np.abs(pitches - self.getCenters(np.repeat(previous, lengths))) > width
+        switches = np.minimum.reduceat(np.where(far, frames, count), starts)
+        switches[fresh] = starts[fresh]
+        entering = previous.copy()
+        held = tones.copy()
+
+        # Follow the runs that keep holding an older tone, and the runs after them until one
+        # switches to its own tone again
+        last = -1
+        for k in np.flatnonzero(sounding & (switches == count)).tolist():
+            if k <= last:
+                continue
+            while True:
+                tone = held[k - 1]
+                entering[k] = tone
+                if tone != tones[k] and tone != previous[k]:
+                    far = np.abs(pitches[starts[k]:starts[k] + lengths[k]] -
+                                 self.getCenters(np.array(tone))) > width
+                    switches[k] = starts[k] + np.argmax(far) if far.any() else count
+                elif tone == tones[k]:
+                    switches[k] = starts[k]
+                if switches[k] < count:
+                    break
+                held[k] = tone
+                k += 1
+                if k == len(starts) or fresh[k] or not sounding[k]:
+                    break
+            last = k
+
+        runs = np.repeat(np.arange(len(starts)), lengths)
+        return np.where(frames >= switches[runs], tones[runs], entering[runs])
+
+    def segment(self, frequencies, frameTime = None):
+        """Splits frames into notes: runs of voiced frames with the same tone. Notes shorter than
+        minLength frames are dropped, and the notes on either side of them are joined if they have
+        the same tone and no unvoiced frames between them
+
+        Args:
+            frequencies (array): The frequencies in Hz, one per frame
+            frameTime (float, optional): The time between frames in seconds. If given, start and
+            end are times in seconds instead of frame numbers
+
+        Returns:
+            PitchSegments: The notes
+        """
+        np = _numpy()
+        frames = self.quantize(frequencies)
+        values = frames.values.values
+        voiced = frames.voiced
+        cents = np.where(voiced, frames.cents, 0.0)
+        changes = np.flatnonzero(values[1:] != values[:-1]) + 1
+        starts = np.concatenate(([0], changes))[:len(values)]
+        ends = np.concatenate((changes, [len(values)]))[:len(values)]
+        totals = np.add.reduceat(cents, starts) if len(starts) else cents
+        keep = voiced[starts] & (ends - starts >= self.minLength)
+        starts, ends, totals = starts[keep], ends[keep], totals[keep]
+        lengths = ends - starts
+
+        if len(starts):
+            unvoiced = np.concatenate(([0], np.cumsum(~voiced)))
+            join = (values[starts[1:]] == values[starts[:-1]]) & \
+                (unvoiced[starts[1:]] == unvoiced[ends[:-1]])
+            first = np.flatnonzero(np.concatenate(([True], ~join)))
+            last = np.flatnonzero(np.concatenate((~join, [True])))
+            lengths = np.add.reduceat(lengths, first)
+            totals = np.add.reduceat(totals, first)
+            starts, ends = starts[first], ends[last]
+        cents = totals / np.maximum(lengths, 1)
+        tones = ToneArray(values[starts])
+
+        if frameTime is not None:
+            starts, ends = starts * frameTime, ends * frameTime
+        return PitchSegments(starts, ends, tones, cents)
+
+
+class QuantizedPitches(namedtuple("QuantizedPitches", "values cents voiced")):
+    """The tones of a run of frames, from FrequencyQuantizer.quantize. values is a ToneArray with
+    each frame's tone (-1 for unvoiced frames), cents holds each frame's deviation from its tone
+    (NaN for unvoiced frames) and voiced is a boolean array."""
+    __slots__ = ()
+
+    def getTones(self):
+        """Gets the tones of the voiced frames, e.g. for KeyTracker.estimate
+
+        Returns:
+            ToneArray: The tones
+        """
+        return ToneArray(self.values.values[self.voiced])
+
+    def getNames(self, prefer_sharp = False, include_octaves = True):
+        """Gets the name of every frame's tone, with "" for unvoiced frames
+
+        Args:
+            prefer_sharp (bool, optional): See Tone.valueToName
+            include_octaves (bool, optional): If true, octave numbers are appended (e.g. "C#4")
+
+        Returns:
+            array: The names
+        """
+        names = self.values.getNames(prefer_sharp, include_octaves)
+        names[~self.voiced] = ""
+        return names
+
+
+class PitchSegments(namedtuple("PitchSegments", "start end values cents")):
+    """The notes found by FrequencyQuantizer.segment. start and end are arrays of frame numbers
+    (end is exclusive) or times in seconds, values is a ToneArray with each note's tone and cents
+    holds each note's mean deviation from its tone."""
+    __slots__ = ()
+
+
+#=================================================================================================#
+
+
+class RomanNumerals:
+    """Roman numeral analysis of chords in a key. For each key (a root and a diatonic mode) a table
+    is built once, from DiatonicMode.valueToSteps, holding the scale and the diatonic triad and
+    seventh chord on each degree; each chord looked up in a key is then labelled once and the
+    label cached in the key's table, so analysing a progression is mostly dictionary lookups.
+
+    Chords are labelled, in order of preference, as:
+
+    - diatonic: every tone is in the key's scale and the root is a scale degree (e.g. ii7, V). In
+      minor modes, chords on V and vii may also use the raised leading tone of harmonic minor
+      (e.g. V7 and viio7 in aeolian)
+    - secondary dominant: a major triad or dominant chord (a major third and, if any, a minor
+      seventh) a fifth above a major or minor diatonic triad other than the tonic (e.g. V7/ii).
+      Augmented dominants (e.g. V+7/ii) count, but augmented triads and major sevenths don't
+    - secondary leading tone: a diminished chord a half step below one (e.g. viio7/V)
+    - borrowed: a diatonic chord of a parallel mode, preferring aeolian, then dorian, phrygian,
+      mixolydian, lydian, ionian and locrian (e.g. bVI, from aeolian, in a major key)
+    - chromatic: anything else
+
+    Degrees follow the root's letter, with accidentals relative to the key's own scale (so in C
+    minor Bb is VII and in C major it is bVII). Upper case means a major third, lower case a minor
+    one, and the quality is shown after the numeral (o for diminished, ø7 for half-diminished, +
+    for augmented)."""
+
+    numerals = ["I", "II", "III", "IV", "V", "VI", "VII"]
+
+    triads = {(4, 7): "", (3, 7): "m", (3, 6): "dim", (4, 8): "aug"}
+
+    sevenths = {(4, 7, 11): "maj7", (4, 7, 10): "7", (3, 7, 10): "m7", (3, 6, 10): "m7-5",
+                (3, 6, 9): "dim6", (3, 7, 11): "mM7", (4, 8, 11): "M7+5"}
+
+    suffixes = {
+        ""          : "",
+        "maj"       : "",
+        "m"         : "",
+        "min"       : "",
+        "dim"       : "o",
+        "aug"       : "+",
+        "m7-5"      : "ø7",
+        "dim6"      : "o7",
+        "mM7"       : "maj7",
+        "M7"        : "maj7",
+        "M9"        : "maj9",
+        "M7+5"      : "+maj7",
+        "7+5"       : "+7",
+        "7#5"       : "+7",
+    }
+
+    borrowing = ["aeolian", "dorian", "phrygian", "mixolydian", "lydian", "ionian", "locrian"]
+
+    _tables = {}
+
+    def getTable(key, mode = "major"):
+        """Gets the table for a key, building it the first time the key is used
+        
+        Args:
+            key (Tone, str, int, DiatonicScale): The key's root, or a diatonic scale (whose mode
+            is then used)
+            mode (str, int, DiatonicMode, optional): The key's mode
+        
+        Returns:
+            dict: The key's root name, mode name, the intervals of the scale degrees (and, in
+            minor modes, of harmonic minor's), the scale's pitch-class mask relative to the root,
+            the diatonic triad and seventh on each degree and the labels of the chords looked up
+            so far
+        """
+        if isinstance(key, DiatonicScale):
+            mask = _rotateMask(key.mask, -key[0].value % 12)
+            mode = next(v for v in DiatonicMode.values if Scale.maskFor(DiatonicMode.values[v]) == mask)
+            key = key[0]
+        root = Tone(key).name
+        if isinstance(mode, DiatonicMode):
+            mode = mode.value
+        elif isinstance(mode, str):
+            mode = DiatonicMode.modeToValue(mode)
+        table = RomanNumerals._tables.get((root, mode))
+        if table is None:
+            steps = DiatonicMode.valueToSteps(mode)
+            degrees = [sum(steps[:d]) for d in range(7)]
+            triads = []
+            sevenths = []
+            for d in range(7):
+                above = [(degrees[(d + k) % 7] - degrees[d]) % 12 for k in (2, 4, 6)]
+                triads.append(RomanNumerals.triads.get(tuple(above[:2])))
+                sevenths.append(RomanNumerals.sevenths.get(tuple(above)))
+            # Minor modes (with a minor third and seventh) also take the raised leading tone
+            raised = degrees[:6] + [11] if degrees[2] == 3 and degrees[6] == 10 else None
+            table = {
+                "root"      : root,
+                "mode"      : DiatonicMode.valueToMode(mode),
+                "degrees"   : degrees,
+                "raised"    : raised,
+                "mask"      : Scale.maskFor(DiatonicMode.valueToMode(mode)),
+                "triads"    : triads,
+                "sevenths"  : sevenths,
+                "labels"    : {},
+            }
+            RomanNumerals._tables[(root, mode)] = table
+        return table
+
+    def label(chord, key, mode = "major"):
+        """Labels a chord with a roman numeral
+        
+        Args:
+            chord (Chord, ChordSymbol, str): The chord
+            key (Tone, str, int, DiatonicScale): The key's root, or a diatonic scale
+            mode (str, int, DiatonicMode, optional): The key's mode
+        
+        Returns:
+            RomanNumeral: The label
+        """
+        table = RomanNumerals.getTable(key, mode)
+        if isinstance(chord, str):
+            chord = ChordSymbol.parse(chord)
+        if not isinstance(chord, (Chord, ChordSymbol)):
+            raise ValueError("Invalid Type: expected a Chord, ChordSymbol or string but instead was "
+                             + str(type(chord)))
+        root = Tone(chord.root)
+        labels = table["labels"]
+        numeral = labels.get((root.name, chord.quality))
+        if numeral is None:
+            numeral = RomanNumerals._label(table, root, chord.quality)
+            labels[(root.name, chord.quality)] = numeral
+        return numeral
+
+    def analyze(chords, key, mode = "major"):
+        """Labels every chord of a progression
+        
+        Args:
+            chords ([Chord, ChordSymbol, str]): The chords, or a ChordProgression
+            key (Tone, str, int, DiatonicScale): The key's root, or a diatonic scale
+            mode (str, int, DiatonicMode, optional): The key's mode
+        
+        Returns:
+            [RomanNumeral]: The label of each chord
+        """
+        return [RomanNumerals.label(chord, key, mode) for chord in chords]
+
+    def _label(table, root, quality):
+        """Works out the label of a chord in a key, for RomanNumerals.label"""
+        keyRoot = Tone(table["root"])
+        interval = (root.value - keyRoot.value) % 12
+        shape = ToneCollection.pitchClassMask(Chord.quality_intervals[quality])
+        chord = _rotateMask(shape, interval)
+        degrees = table["degrees"]
+
+        if not chord & ~table["mask"] and interval in degrees:
+            return RomanNumeral(RomanNumerals.numeral(table, root, quality), "diatonic", None)
+        raised = table["raised"]
+        if raised is not None and interval in (7, 11) and chord >> 11 & 1 \
+                and not chord & ~(table["mask"] & ~(1 << 10) | 1 << 11):
+            return RomanNumeral(RomanNumerals.numeral(table, root, quality, raised), "diatonic",
+                                None)
+
+        # Dominant-type chords: a major third, and a perfect fifth or a minor seventh, but no
+        # minor third or major seventh
+        major = shape >> 4 & 1 and not shape >> 3 & 1 and not shape >> 11 & 1 \
+            and (shape >> 7 & 1 or shape >> 10 & 1)
+        diminished = shape >> 3 & 1 and shape >> 6 & 1 and not shape >> 7 & 1
+        for kind, target, applies in (("secondary dominant", (interval + 5) % 12, major),
+                                      ("secondary leading tone", (interval + 1) % 12, diminished)):
+            if applies and target in degrees and target != 0:
+                d = degrees.index(target)
+                if table["triads"][d] in ("", "m"):
+                    numeral = RomanNumerals.numerals[d]
+                    if table["triads"][d] == "m":
+                        numeral = numeral.lower()
+                    base = "V" if kind == "secondary dominant" else "vii"
+                    return RomanNumeral(base + RomanNumerals.suffix(quality) + "/" + numeral, kind,
+                                        numeral)
+
+        for modeName in RomanNumerals.borrowing:
+            if modeName == table["mode"]:
+                continue
+            other = RomanNumerals.getTable(keyRoot, modeName)
+            if not chord & ~other["mask"] and interval in other["degrees"]:
+                return RomanNumeral(RomanNumerals.numeral(table, root, quality), "borrowed",
+                                    modeName)
+
+        return RomanNumeral(RomanNumerals.numeral(table, root, quality), "chromatic", None)
+
+    def numeral(table, root, quality, degrees = None):
+        """Writes the numeral of a chord: the degree of its root's letter in the key, with any
+        accidentals needed to reach the root from the key's scale (or from degrees, if given), in
+        upper case if the chord has a major third (or no third) and lower case if it has a minor
+        one, followed by its quality"""
+        keyRoot = Tone(table["root"])
+        interval = (root.value - keyRoot.value) % 12
+        degree = (Tone.letters.index(root.name[0]) - Tone.letters.index(keyRoot.name[0])) % 7
+        if degrees is None:
+            degrees = table["degrees"]
+        accidental = (interval - degrees[degree] + 6) % 12 - 6
+        numeral = RomanNumerals.numerals[degree]
+        intervals = Chord.quality_intervals[quality]
+        if 3 in intervals and 4 not in intervals:
+            numeral = numeral.lower()
+        prefix = "#" * accidental if accidental > 0 else "b" * -accidental
+        return prefix + numeral + RomanNumerals.suffix(quality)
+
+    def suffix(quality):
+        """Gets the part of a numeral that shows a chord's quality"""
+        if quality in RomanNumerals.suffixes:
+            return RomanNumerals.suffixes[quality]
+        if quality.startswith("min"):
+            return quality[3:]
+        if quality.startswith("m") and not quality.startswith("maj"):
+            return quality[1:]
+        return quality
+
+
+class RomanNumeral(namedtuple("RomanNumeral", "numeral kind source")):
+    """A chord's label from RomanNumerals. numeral is the roman numeral (e.g. "ii7", "V7/V",
+    "bVI"), kind is "diatonic", "secondary dominant", "secondary leading tone", "borrowed" or
+    "chromatic", and source is the target numeral of a secondary chord or the mode a borrowed
+    chord comes from (otherwise None)."""
+    __slots__ = ()
+
+    def __str__(self):
+        return self.numeral
+
+
+#=================================================================================================#
+
+
+class CorpusAnalysis:
+    """Analyses chord progressions, one tune at a time, optionally spread over a pool of worker
+    processes. For each tune this finds the tones of every chord, the scales that fit it (from
+    ChordScale), the tune's key (from KeyTracker, over all its chord tones) and each chord's roman
+    numeral in that key; results are plain dicts, ready to be written out as JSON.
+
+    analyzeCorpus sends tunes to the workers in chunks, as text, with a bounded number of chunks
+    in flight, so a corpus of any size is analysed in constant memory. Each worker builds the
+    lookup tables the analysis uses (ScaleTable, the Chord index, ChordScale and the KeyTracker
+    weights) once, when it starts, and reuses them for every tune it is given."""
+
+    def warm():
+        """Builds the lookup tables used by analyze. Each worker process calls this when it starts"""
+        ScaleTable.warm()
+        if Chord._index is None:
+            Chord.buildIndex()
+        if ChordScale._matrix is None:
+            ChordScale.buildMatrix()
+        KeyTracker.getTable()
+
+    def analyze(progression, scales = 3):
+        """Analyses one tune
+        
+        Args:
+            progression (ChordProgression, str): The tune
+            scales (int, optional): The number of scales to list for each chord
+        
+        Returns:
+            dict: The progression, its key, and each chord's symbol, tones, best-fitting scales
+            and roman numeral
+        """
+        if isinstance(progression, str):
+            progression = ChordProgression(progression)
+        chords = []
+        key = KeyTracker()
+        for symbol in progression:
+            chord = symbol.getChord()
+            key.extend(chord.tones)
+            chords.append({
+                "symbol"    : symbol.symbol,
+                "tones"     : [tone.name for tone in chord.tones],
+                "scales"    : [fit.root.name + " " + fit.name
+                               for fit in ChordScale.scalesFor(symbol, limit=scales)],
+            })
+        estimate = key.getKey()
+        if estimate is not None:
+            # Numerals are relative to a diatonic mode, so minor scales are analysed as aeolian
+            mode = estimate.name if estimate.name in DiatonicMode.modes else "aeolian"
+            for chord, symbol in zip(chords, progression):
+                chord["numeral"] = RomanNumerals.label(symbol, estimate.root, mode).numeral
+        return {
+            "progression"   : str(progression),
+            "key"           : estimate.root.name + " " + estimate.name if estimate else None,
+            "chords"        : chords,
+        }
+
+    def _analyzeChunk(chunk, scales):
+        """Analyses a chunk of (index, tune) pairs, returning a result dict for each. A tune that
+        fails to parse gets an error instead of an analysis"""
+        results = []
+        for index, line in chunk:
+            try:
+                result = CorpusAnalysis.analyze(line, scales)
+            except ValueError as e:
+                result = {"progression": line, "error": str(e)}
+            result["index"] = index
+            results.append(result)
+        return results
+
+    def analyzeCorpus(source, jobs = None, chunkSize = 256, ordered = True, scales = 3):
+        """Analyses every tune in a corpus
+        
+        Args:
+            source ([ChordProgression, str], file): The tunes, or a file with one per line. Blank
+            lines are skipped
+            jobs (int, optional): The number of worker processes. Defaults to the number of CPUs;
+            with 1 the tunes are analysed in this process
+            chunkSize (int, optional): The number of tunes sent to a worker at once
+            ordered (bool, optional): If false, results are yielded as soon as they are ready
+            rather than in the order of the tunes
+            scales (int, optional): The number of scales to list for each chord
+        
+        Yields:
+            dict: The result of CorpusAnalysis.analyze for each tune, with its index in the source
+            (counting from 0, skipping blank lines), or an error message if it couldn't be parsed
+        """
+        def chunks():
+            chunk = []
+            index = 0
+            for tune in source:
+                tune = tune if isinstance(tune, str) else str(tune)
+                if not tune.strip():
+                    continue
+                chunk.append((index, tune.strip()))
+                index += 1
+                if len(chunk) >= chunkSize:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+        if jobs is None:
+            import os
+            jobs = os.cpu_count() or 1
+        if jobs <= 1:
+            for chunk in chunks():
+                yield from CorpusAnalysis._analyzeChunk(chunk, scales)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+        CorpusAnalysis.warm()
+        with ProcessPoolExecutor(jobs, initializer=CorpusAnalysis.warm) as pool:
+            pending = deque()
+            for chunk in chunks():
+                pending.append(pool.submit(CorpusAnalysis._analyzeChunk, chunk, scales))
+                while len(pending) >= 2 * jobs:
+                    if ordered:
+                        yield from pending.popleft().result()
+                    else:
+                        done = wait(pending, return_when=FIRST_COMPLETED).done
+                        for future in done:
+                            pending.remove(future)
+                            yield from future.result()
+            while pending:
+                yield from pending.popleft().result()
+
+
+#=================================================================================================#
+
+
+class Stats:
+    """Opt-in instrumentation for the library. Once enabled, calls to the functions listed in
+    instrumented are timed into per-function histograms, and counters record events such as new
+    Tone objects being created (Tone.created), fuzzyParse misses that need fuzzy matching
+    (Scale.fuzzyParse.fuzzy) and fuzzy queries that weren't cached (FuzzyIndex.scored).
+
+    Timing works by replacing the instrumented functions with timing wrappers when enable() is
+    called and restoring the originals when disable() is called, so while instrumentation is off
+    the library runs its original functions with no overhead. Hooks added with addHook are called
+    with (name, seconds) for every timed call."""
+
+    enabled = False
+    counters = {}
+    timers = {}
+    hooks = []
+
+    buckets = (1e-6, 1e-5, 1e-4, 1e-3, 1e-2, 1e-1)
+    bucketNames = ("<1us", "<10us", "<100us", "<1ms", "<10ms", "<100ms", ">=100ms")
+
+    instrumented = [
+        ("Tone", "__new__"),
+        ("ToneCollection", "generate"),
+        ("Scale", "cleanScale"),
+        ("Scale", "smartParse"),
+        ("Scale", "fuzzyParse"),
+        ("ScaleFinder", "find"),
+        ("Chord", "__init__"),
+        ("Chord", "identify"),
+        ("Chord", "fuzzyParse"),
+        ("ChordSymbol", "parse"),
+        ("VoiceLeading", "lead"),
+    ]
+    _originals = {}
+
+    def enable():
+        """Starts timing the instrumented functions and recording counters"""
+        if Stats.enabled:
+            return
+        for className, attr in Stats.instrumented:
+            cls = globals()[className]
+            raw = cls.__dict__[attr]
+            Stats._originals[(cls, attr)] = raw
+            setattr(cls, attr, Stats._wrap(className + "." + attr, raw))
+        Stats.enabled = True
+
+    def disable():
+        """Stops recording and restores the original, uninstrumented functions. Recorded data is
+        kept until reset() is called"""
+        if not Stats.enabled:
+            return
+        for (cls, attr), raw in Stats._originals.items():
+            setattr(cls, attr, raw)
+        Stats._originals.clear()
+        Stats.enabled = False
+
+    def reset():
+        """Clears all counters and timings"""
+        Stats.counters.clear()
+        Stats.timers.clear()
+
+    def _wrap(name, raw):
+        """Wraps a function (or staticmethod) taken from a class's __dict__ so that calls to it are
+        recorded under the given name"""
+        static = isinstance(raw, staticmethod)
+        f = raw.__func__ if static else raw
+
+        @wraps(f)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return f(*args, **kwargs)
+            finally:
+                Stats.record(name, perf_counter() - start)
+
+        return staticmethod(timed) if static else timed
+
+    def count(name, n = 1):
+        """Adds n to the named counter
+        
+        Args:
+            name (str): The counter's name
+            n (int, optional): The amount to add
+        """
+        Stats.counters[name] = Stats.counters.get(name, 0) + n
+
+    def record(name, seconds):
+        """Records a timing in the named histogram and passes it to any hooks
+        
+        Args:
+            name (str): The name of the timed operation
+            seconds (float): How long it took
+        """
+        timer = Stats.timers.get(name)
+        if timer is None:
+            timer = Stats.timers[name] = [0, 0.0, seconds, seconds, [0] * len(Stats.bucketNames)]
+        timer[0] += 1
+        timer[1] += seconds
+        if seconds < timer[2]:
+            timer[2] = seconds
+        if seconds > timer[3]:
+            timer[3] = seconds
+        bucket = 0
+        while bucket < len(Stats.buckets) and seconds >= Stats.buckets[bucket]:
+            bucket += 1
+        timer[4][bucket] += 1
+        for hook in Stats.hooks:
+            hook(name, seconds)
+
+    def addHook(hook):
+        """Adds a function to be called with (name, seconds) after every timed call
+        
+        Args:
+            hook (function): The hook
+        """
+        Stats.hooks.append(hook)
+
+    def removeHook(hook):
+        """Removes a hook added with addHook
+        
+        Args:
+            hook (function): The hook
+        """
+        Stats.hooks.remove(hook)
+
+    def snapshot():
+        """Gets a copy of everything recorded so far
+        
+        Returns:
+            dict: "enabled", "counters" (name to count), "timers" (name to count, total, mean,
+            min and max seconds and a histogram of call counts by duration) and "gauges" (the
+            number of interned tones and the ScaleTable statistics)
+        """
+        timers = {}
+        for name, (calls, total, low, high, histogram) in Stats.timers.items():
+            timers[name] = {
+                "count"     : calls,
+                "total"     : total,
+                "mean"      : total / calls,
+                "min"       : low,
+                "max"       : high,
+                "histogram" : dict(zip(Stats.bucketNames, histogram)),
+            }
+        return {
+            "enabled"   : Stats.enabled,
+            "counters"  : dict(Stats.counters),
+            "timers"    : timers,
+            "gauges"    : {
+                "Tone.interned" : len(Tone._interned),
+                "ScaleTable"    : ScaleTable.stats(),
+            },
+        }
+
+    def export():
+        """Gets the snapshot as a JSON string
+        
+        Returns:
+            str: The JSON snapshot
+        """
+        import json
+        return json.dumps(Stats.snapshot(), indent=4)
 
 
 
@@ -0,0 +1,277 @@
+"""
+server.py
+A network server for the coltrane library. Clients connect over TCP and send one JSON request per
+line; the server answers each with one JSON line, in the order the requests were sent.
+
+Requests:
+    {"op": "scale", "key": "Eb", "scale": "major"}
+    {"op": "chord", "symbol": "Am7/C"}
+    {"op": "fuzzy", "scale": "dorain"}          or {"op": "fuzzy", "quality": "maj9"}
+    {"op": "identify", "tones": ["E4", "G4", "C5"], "partial": true}
+
+Any other fields (such as an "id") are copied into the response, which also holds either "result"
+or "error". Requests from all connections go through one queue and are answered in batches, and
+every lookup uses the library's shared caches, so a warm server answers most requests from a
+dictionary. The queue and the number of unanswered requests per connection are bounded: when
+either is full the server stops reading from the connection until it catches up, so a client that
+sends faster than the server answers (or doesn't read its answers) slows down instead of using up
+memory. Note names must be plain names like "Eb" or "C#4", and identify takes at most 64 tones.
+
+Usage:
+    python server.py [--host HOST] [--port PORT] [--batch-size N] [--queue-size N]
+                     [--max-pending N]
+"""
+
+import asyncio
+import json
+import re
+import sys
+
+import coltrane
+
+
+class Server:
+    """Serves coltrane lookups over TCP as line-delimited JSON"""
+
+    def __init__(self, host = "127.0.0.1", port = 7420, batch_size = 64, queue_size = 4096,
+                 max_pending = 256, max_line = 65536):
+        """Initializes a Server object
+
+        Args:
+            host (str, optional): The address to listen on
+            port (int, optional): The port to listen on, or 0 for any free port
+            batch_size (int, optional): The most requests answered in one batch
+            queue_size (int, optional): The most requests waiting to be answered, across all
+            connections
+            max_pending (int, optional): The most unanswered requests per connection
+            max_line (int, optional): The longest request line accepted, in bytes
+        """
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_pending = max_pending
+        self.max_line = max_line
+        self.requests = 0
+        self.batches = 0
+        self.server = None
+        self.queue = None
+        self.batcher = None
+        self.connections = {}
+
+    async def start(self):
+        """Starts listening. If port was 0, self.port is set to the port chosen"""
+        self.queue = asyncio.Queue(self.queue_size)
+        self.batcher = asyncio.ensure_future(self.runBatches())
+        self.server = await asyncio.start_server(self.handleConnection, self.host, self.port,
+                                                 limit=self.max_line)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def serveForever(self):
+        """Starts the server if needed and serves until cancelled"""
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        """Stops listening, closes every client connection and stops answering requests"""
+        self.server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+        self.batcher.cancel()
+        await asyncio.gather(self.batcher, return_exceptions=True)
+
+    async def runBatches(self):
+        """Answers queued requests. Waits for one request, then takes up to batch_size - 1 more
+        that are already queued and answers them all before yielding to the event loop"""
+        queue = self.queue
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < self.batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+            for request, future in batch:
+                if not future.cancelled():
+                    future.set_result(Server.answer(request))
+            self.requests += len(batch)
+            self.batches += 1
+
+    async def handleConnection(self, reader, writer):
+        """Reads the requests sent on one connection and queues them, while a second task writes
+        the answers back in order"""
+        loop = asyncio.get_running_loop()
+        pending = asyncio.Queue(self.max_pending)
+        responder = asyncio.ensure_future(Server.respond(pending, writer))
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # The line was longer than max_line
+                    await pending.put(Server.done({"error": "Request too long"}))
+                    break
+                except ConnectionError:
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                future = loop.create_future()
+                await pending.put(future)
+                try:
+                    request = json.loads(line)
+                except ValueError as e:
+                    future.set_result({"error": "Invalid JSON: " + str(e)})
+                    continue
+                await self.queue.put((request, future))
+            await pending.put(None)
+            await responder
+        finally:
+            del self.connections[writer]
+            responder.cancel()
+            writer.close()
+
+    def done(result):
+        """Makes a future that already holds a result"""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(result)
+        return future
+
+    async def respond(pending, writer):
+        """Writes answers to a connection as they are ready, in the order they were requested. If
+        the connection is lost, the rest of the answers are discarded, but they are still taken
+        from pending so the reading side never blocks on a full queue"""
+        connected = True
+        while True:
+            future = await pending.get()
+            if future is None:
+                break
+            result = await future
+            if not connected or writer.is_closing():
+                connected = False
+                continue
+            try:
+                writer.write(json.dumps(result).encode() + b"\n")
+                # Returns at once unless the client has stopped reading and the buffer is full
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+                writer.close()
+
+    def answer(request):
+        """Answers one request
+
+        Args:
+            request (dict): The decoded request
+
+        Returns:
+            dict: The request's other fields with either "result" or "error"
+        """
+        if not isinstance(request, dict):
+            return {"error": "Expected a JSON object"}
+        response = {k: v for k, v in request.items() if k not in Server.fields}
+        op = request.get("op")
+        handler = Server.handlers.get(op)
+        if handler is None:
+            response["error"] = "Unknown op: " + str(op)
+            return response
+        try:
+            response["result"] = handler(request)
+        except KeyError as e:
+            response["error"] = "Missing or invalid field: " + str(e)
+        except Exception as e:
+            response["error"] = "%s: %s" % (type(e).__name__, e)
+        return response
+
+    def lookupScale(request):
+        """Looks up a scale, as the shell's scale command does"""
+        key = Server.tone(request["key"])
+        name = request["scale"]
+        options = coltrane.Scale.fuzzyParse(name)
+        if len(options) == 1 and options[0][1] == 100:
+            scale = coltrane.Scale.smartParse(key, options[0][0])
+            return {"key": key.name, "scale": name, "tones": [tone.name for tone in scale]}
+        return {"key": key.name, "scale": name, "suggestions": [o[0] for o in options]}
+
+    def lookupChord(request):
+        """Looks up the tones of a chord symbol"""
+        symbol = coltrane.ChordSymbol.parse(request["symbol"])
+        return {"chord": symbol.symbol, "tones": [tone.name for tone in symbol.getChord()]}
+
+    def lookupFuzzy(request):
+        """Suggests scale names or chord qualities similar to a possibly misspelled one"""
+        if "scale" in request:
+            options = coltrane.Scale.fuzzyParse(request["scale"])
+        else:
+            options = coltrane.Chord.fuzzyParse(request["quality"])
+        return [[name, score] for name, score in options]
+
+    def identify(request):
+        """Names the chords formed by a set of tones"""
+        tones = request["tones"]
+        if not isinstance(tones, list) or not 0 < len(tones) <= Server.maxTones:
+            raise ValueError("Expected a list of 1 to " + str(Server.maxTones) + " tones")
+        tones = [Server.tone(tone) for tone in tones]
+        matches = coltrane.Chord.identify(tones, request.get("partial", True))
+        return [{
+            "symbol"    : m.symbol,
+            "root"      : m.root.name,
+            "quality"   : m.quality,
+            "bass"      : m.bass.name,
+            "missing"   : m.missing,
+            "extra"     : m.extra,
+        } for m in matches]
+
+    def tone(name):
+        """Builds a Tone from a note name sent by a client, checking the name first so that junk
+        never reaches Tone's cache"""
+        if not isinstance(name, str) or not Server.noteName.fullmatch(name):
+            raise ValueError("Invalid note name: " + json.dumps(name)[:20])
+        return coltrane.Tone(name)
+
+    noteName = re.compile(r"[A-G](?:#{1,3}|b{1,3})?[0-9]?")
+    maxTones = 64
+
+    handlers = {
+        "scale"     : lookupScale,
+        "chord"     : lookupChord,
+        "fuzzy"     : lookupFuzzy,
+        "identify"  : identify,
+    }
+
+    # Request fields that are not copied into the response
+    fields = ("op", "key", "scale", "symbol", "quality", "tones", "partial")
+
+
+def main(args):
+    """Runs the server until interrupted"""
+    import argparse
+    parser = argparse.ArgumentParser(description="Serves coltrane lookups as line-delimited JSON")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=7420, help="port to listen on")
+    parser.add_argument("--batch-size", type=int, default=64, help="requests answered per batch")
+    parser.add_argument("--queue-size", type=int, default=4096,
+                        help="requests waiting to be answered, across all connections")
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="unanswered requests per connection")
+    options = parser.parse_args(args)
+
+    server = Server(options.host, options.port, options.batch_size, options.queue_size,
+                    options.max_pending)
+
+    async def run():
+        await server.start()
+        print("Listening on %s:%d" % (server.host, server.port))
+        await server.serveForever()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
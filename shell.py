@@ -1,6 +1,14 @@
+import time
+_start = time.perf_counter()
+
 import cmd
+import json
+import sys
+from collections import deque
 import coltrane
 
+_imported = time.perf_counter()
+
 
 class Shell(cmd.Cmd):
     """The main interface for the Coltrane music theory library"""
@@ -9,20 +17,46 @@ class Shell(cmd.Cmd):
     
     def __init__(self):
         super(Shell, self).__init__()
+
+    def onecmd(self, line):
+        if not coltrane.Stats.enabled:
+            return super(Shell, self).onecmd(line)
+        command = self.parseline(line)[0]
+        start = time.perf_counter()
+        try:
+            return super(Shell, self).onecmd(line)
+        finally:
+            coltrane.Stats.record("Shell.do_" + str(command), time.perf_counter() - start)
         
-    def do_scale(self, s):
-        args = s.split(" ", 1)
-        args[0] = args[0][0].upper() + args[0][1:]
+    def lookupScale(self, s):
+        """Looks up the scale for the scale command. Returns a dict with the key, the scale name and
+        either the scale's tones or, if the name wasn't recognized, a list of similar names"""
+        args = s.split(None, 1)
+        if len(args) != 2:
+            raise ValueError("expected <key> <scale>, e.g. scale Eb major")
         key, name = args
+        key = key[0].upper() + key[1:]
         options = coltrane.Scale.fuzzyParse(name)
-        if len(options) == 0:
+        if len(options) == 1 and options[0][1] == 100:
+            scale = coltrane.Scale.smartParse(key, options[0][0])
+            return {"key": key, "scale": name, "tones": [tone.name for tone in scale]}
+        return {"key": key, "scale": name, "suggestions": [o[0] for o in options]}
+
+    def do_scale(self, s):
+        try:
+            result = self.lookupScale(s)
+        except ValueError as e:
+            print("Sorry,", e)
+            return
+        name = result["scale"]
+        if "tones" in result:
+            print(" ".join(result["tones"]))
+        elif len(result["suggestions"]) == 0:
             print("Sorry, scale name", name, "not found. No similar scale names found.")
-        elif len(options) == 1 and options[0][1] == 100:
-            print(coltrane.Scale.smartParse(*args).prettySequence())
         else:
             print("Sorry, scale name", name, "not found. Did you mean:")
-            for o in options:
-                print(o[0])
+            for o in result["suggestions"]:
+                print(o)
 
 
     def help_scale(self):
@@ -31,21 +65,33 @@ class Shell(cmd.Cmd):
             Examples: scale Eb major\n\
                       scale A ionian")
 
-    def do_chord(self, s, vertical=True):
-        root = s[0]
-        quality = s[1:]
-        while quality[0] in ("b", "#"):
-            root += quality[0]
-            quality = quality[1:]
+    def lookupChord(self, s):
+        """Looks up the chord for the chord command. Returns a dict with the chord symbol and its
+        tones, from lowest to highest"""
+        chord = coltrane.ChordSymbol.parse(s).getChord()
+        return {"chord": s, "tones": [tone.name for tone in chord]}
 
-        root = root[0].upper() + root[1:]
-        print(coltrane.Chord(root, quality).prettySequence(vertical=vertical))
+    def do_chord(self, s, vertical=True):
+        try:
+            tones = self.lookupChord(s)["tones"]
+        except coltrane.ChordSymbolError as e:
+            print("Sorry,", e)
+            if e.suggestions:
+                print("Did you mean:")
+                for o in e.suggestions:
+                    print(o)
+            return
+        if vertical:
+            print("\n".join(reversed(tones)))
+        else:
+            print(" ".join(tones))
 
     def help_chord(self):
         print("Prints the notes in a given chord.\n\
-            Syntax:   chord <root><quality>\n\
+            Syntax:   chord <root><quality>[(<extensions>)][/<bass>]\n\
             Examples: chord Eb7\n\
-                      chord Am7b9#5")
+                      chord Bb-7/F\n\
+                      chord G7(b9)")
 
     def do_c(self,s):
         self.do_chord(s)
@@ -74,6 +120,34 @@ class Shell(cmd.Cmd):
     def help_s(self):
         print("Shortcut for scale")
 
+    def do_stats(self, s):
+        s = s.strip()
+        if s == "on":
+            coltrane.Stats.enable()
+        elif s == "off":
+            coltrane.Stats.disable()
+        elif s == "reset":
+            coltrane.Stats.reset()
+        elif s == "json":
+            print(coltrane.Stats.export())
+        else:
+            snapshot = coltrane.Stats.snapshot()
+            print("Instrumentation is", "on" if snapshot["enabled"] else "off")
+            for name, count in sorted(snapshot["counters"].items()):
+                print("  %-28s %10d" % (name, count))
+            if snapshot["timers"]:
+                print("  %-28s %10s %12s %12s" % ("", "calls", "mean (us)", "max (us)"))
+            for name, timer in sorted(snapshot["timers"].items()):
+                print("  %-28s %10d %12.1f %12.1f" % (name, timer["count"], timer["mean"] * 1e6,
+                                                     timer["max"] * 1e6))
+
+    def help_stats(self):
+        print("Shows timings and counters recorded by the library's instrumentation.\n\
+            Syntax:   stats [on|off|reset|json]\n\
+            Examples: stats on       starts recording\n\
+                      stats          prints what has been recorded\n\
+                      stats json     prints it as JSON")
+
     def do_exit(self, s):
         return True
 
@@ -92,9 +166,105 @@ class Shell(cmd.Cmd):
             return False
         return True
 
+    def runCommand(self, line):
+        """Runs a scale, chord or chords command (or their shortcuts) for batch mode, returning
+        a JSON-serializable dict with the command and either its result or an error message"""
+        command, _, s = line.strip().partition(" ")
+        s = s.strip()
+        try:
+            if command in ("scale", "s"):
+                return {"command": line, "result": self.lookupScale(s)}
+            elif command in ("chord", "c"):
+                return {"command": line, "result": self.lookupChord(s)}
+            elif command in ("chords", "cc"):
+                return {"command": line, "result": [self.lookupChord(c) for c in s.split()]}
+            return {"command": line, "error": "Unknown command: " + command}
+        except Exception as e:
+            return {"command": line, "error": "%s: %s" % (type(e).__name__, e)}
+
+
+def runChunk(lines):
+    """Runs a list of batch commands and returns their results as JSON lines. This is what each
+    worker process runs in batch mode"""
+    shell = Shell()
+    return "".join(json.dumps(shell.runCommand(line)) + "\n" for line in lines)
+
+
+def runBatch(lines, out, jobs=1, chunk_size=1000):
+    """Runs commands in batch mode and writes one JSON line per command to out, in input order.
+    Blank lines are skipped. Commands are grouped into chunks of chunk_size; with more than one job
+    the chunks are spread across a pool of worker processes, with at most two chunks per worker in
+    flight so that arbitrarily long inputs are handled in bounded memory.
+
+    Args:
+        lines ([str]): The commands, e.g. an open file
+        out (file): Where to write the results
+        jobs (int, optional): The number of worker processes
+        chunk_size (int, optional): The number of commands sent to a worker at once
+    """
+    def chunks():
+        chunk = []
+        for line in lines:
+            line = line.strip()
+            if line:
+                chunk.append(line)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    if jobs <= 1:
+        for chunk in chunks():
+            out.write(runChunk(chunk))
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(jobs) as pool:
+        pending = deque()
+        for chunk in chunks():
+            pending.append(pool.submit(runChunk, chunk))
+            if len(pending) >= 2 * jobs:
+                out.write(pending.popleft().result())
+        while pending:
+            out.write(pending.popleft().result())
+
+
+def main(args):
+    """Runs the CLI. With no arguments this starts the interactive shell; otherwise the arguments
+    are run as a single command (e.g. python shell.py scale Eb major). --startup-time reports how
+    long importing coltrane and creating the shell took, then exits. --batch runs the commands in
+    a file (or stdin, with -) and prints the results as JSON lines."""
+    if args and args[0] == "--batch":
+        import argparse
+        parser = argparse.ArgumentParser(prog="shell.py --batch")
+        parser.add_argument("file", help="file of commands, one per line, or - for stdin")
+        parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="commands per chunk")
+        options = parser.parse_args(args[1:])
+        if options.file == "-":
+            runBatch(sys.stdin, sys.stdout, options.jobs, options.chunk_size)
+        else:
+            with open(options.file) as f:
+                runBatch(f, sys.stdout, options.jobs, options.chunk_size)
+        return
+
+    if args and args[0] == "--startup-time":
+        shell = Shell()
+        ready = time.perf_counter()
+        print("import: %.1f ms" % ((_imported - _start) * 1000))
+        print("ready:  %.1f ms" % ((ready - _start) * 1000))
+        return
+
+    shell = Shell()
+    if args:
+        shell.onecmd(" ".join(args))
+        return
+    try:
+        shell.cmdloop()
+    except KeyboardInterrupt as e:
+        print("exit")
 
 
-try:
-    Shell().cmdloop()
-except KeyboardInterrupt as e:
-    print("exit")
\ No newline at end of file
+if __name__ == "__main__":
+    main(sys.argv[1:])
\ No newline at end of file
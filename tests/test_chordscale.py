@@ -0,0 +1,61 @@
+import coltrane
+from coltrane import ChordScale
+
+
+def best(symbol, limit=2):
+    return [(fit.root.name, fit.name) for fit in ChordScale.scalesFor(symbol, limit=limit)]
+
+
+def test_dorian_first_for_minor_seventh():
+    for root in ("C", "F#", "Bb"):
+        assert best(root + "m7", 1) == [(root, "dorian")]
+
+
+def test_mixolydian_first_for_dominant_seventh():
+    for root in ("C", "E", "Ab"):
+        assert best(root + "7", 1) == [(root, "mixolydian")]
+
+
+def test_ionian_and_lydian_first_for_major_seventh():
+    assert best("Cmaj7") == [("C", "ionian"), ("C", "lydian")]
+    assert best("Ebmaj7") == [("Eb", "ionian"), ("Eb", "lydian")]
+
+
+def test_half_diminished_first_for_minor_seventh_flat_five():
+    assert best("Cm7b5", 1) == [("C", "half diminished")]
+
+
+def test_fewer_tones_do_not_rank_higher():
+    ranked = [fit.name for fit in ChordScale.scalesFor("Cm7") if fit.root.name == "C"]
+    assert ranked.index("dorian") < ranked.index("minor pentatonic")
+    assert ranked.index("dorian") < ranked.index("blues")
+    ranked = [fit.name for fit in ChordScale.scalesFor("C") if fit.root.name == "C"]
+    assert ranked.index("ionian") < ranked.index("major pentatonic")
+
+
+def test_avoid_notes_are_a_half_step_above_a_chord_tone():
+    fit = ChordScale.fit("Cmaj7", "C", "ionian")
+    assert (fit.missing, fit.avoid, fit.tensions, fit.passing) == (0, 1, 2, 0)
+    fit = ChordScale.fit("Cm7", "C", "dorian")
+    assert (fit.missing, fit.avoid, fit.tensions, fit.passing) == (0, 0, 3, 0)
+    fit = ChordScale.fit("Cmaj7", "C", "lydian")
+    assert (fit.avoid, fit.tensions) == (0, 3)
+
+
+def test_bebop_passing_tone():
+    fit = ChordScale.fit("Cmaj7", "C", "bebop dominant")
+    assert (fit.avoid, fit.passing, fit.tensions) == (1, 1, 2)
+    fit = ChordScale.fit("C7", "C", "bebop dominant")
+    assert (fit.avoid, fit.passing, fit.tensions) == (2, 0, 2)
+
+
+def test_fit_matches_ranked_entry():
+    for fit in ChordScale.scalesFor("G7", limit=20):
+        assert ChordScale.fit("G7", fit.root, fit.name) == fit
+
+
+def test_missing_chord_tones():
+    assert all(fit.missing == 0 for fit in ChordScale.scalesFor("Cmaj7"))
+    partial = ChordScale.scalesFor("Cmaj7", partial=True)
+    assert partial[-1].missing > 0
+    assert isinstance(partial[0].getScale(), coltrane.Scale)
@@ -0,0 +1,44 @@
+import pytest
+
+from coltrane import Chord, ChordProgression, ChordSymbol, FuzzyIndex
+
+
+def test_parse_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(ChordSymbol, "parseCacheSize", 10)
+    ChordSymbol._parsed.clear()
+    for spaces in range(50):
+        assert ChordSymbol.parse("Cm7" + " " * spaces).quality == "m7"
+    assert len(ChordSymbol._parsed) <= 10
+    assert ChordSymbol.parse("Cm7") is ChordSymbol.parse("Cm7")
+
+
+def test_fuzzy_parse_accepts_aliases():
+    assert Chord.fuzzyParse("m7b5") == [["m7b5", 100]]
+    assert Chord.fuzzyParse("m7-5") == [["m7-5", 100]]
+
+
+def test_fuzzy_qualities_include_aliases():
+    pytest.importorskip("fuzzywuzzy")
+    assert "m7b5" in FuzzyIndex.forQualities().vocabulary
+    assert {"m7b5", "min7b5"} & {q for q, score in Chord.fuzzyParse("mn7b5")}
+
+
+@pytest.mark.parametrize("symbol, root, quality, bass", [
+    ("C6/9", "C", "69", None),
+    ("C69", "C", "69", None),
+    ("Eb 6/9", "Eb", "69", None),
+    ("Cm6/9", "C", "m69", None),
+    ("C-6/9", "C", "m69", None),
+    ("C6/9/E", "C", "69", "E"),
+    ("C6/E", "C", "6", "E"),
+])
+def test_six_nine_chords(symbol, root, quality, bass):
+    parsed = ChordSymbol.parse(symbol)
+    assert (parsed.root.name, parsed.quality, parsed.bass.name if parsed.bass else None) == \
+        (root, quality, bass)
+
+
+def test_six_nine_chords_in_progressions():
+    progression = ChordProgression("| C6/9 / Am7 | Dm7 G7/F | C6/9/E Fm6/9 |")
+    assert [chord.symbol for chord in progression] == ["C6/9", "Am7", "Dm7", "G7/F", "C6/9/E",
+                                                       "Fm6/9"]
@@ -0,0 +1,68 @@
+import pytest
+
+from coltrane import ChordProgression, CorpusReader, CorpusWriter
+
+
+def chords(progression):
+    return [[(c.root.name, c.quality, c.bass.name if c.bass else None) for c in bar]
+            for bar in progression.bars]
+
+
+def writeCorpus(path):
+    progressions = ["| C#m7 F#7 | Bmaj7 | Gb7/Db Ebm7-5 Ab7b9 | Dbmaj7 |",
+                    "| Cmaj7 | C/E | F#m7-5 B7 | Em |",
+                    "| Bb7 |"]
+    collections = [["C##4", "Fb3", "Eb4", "B#4"], ["C4"], [], ["Cb0", "G8"]]
+    with CorpusWriter(str(path)) as writer:
+        for progression in progressions:
+            writer.addProgression(progression)
+        for tones in collections:
+            writer.addCollection(tones)
+    return progressions, collections
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / "corpus.bin"
+    progressions, collections = writeCorpus(path)
+    with CorpusReader(str(path)) as corpus:
+        assert len(corpus) == len(progressions)
+        for read, written in zip(corpus, progressions):
+            assert chords(read) == chords(ChordProgression(written))
+        assert corpus.collectionCount == len(collections)
+        for i, tones in enumerate(collections):
+            assert [tone.getFullName() for tone in corpus.getCollection(i)] == tones
+        with pytest.raises(IndexError):
+            corpus.getProgression(len(progressions))
+
+
+def test_bars_and_spellings_are_kept(tmp_path):
+    path = tmp_path / "corpus.bin"
+    writeCorpus(path)
+    with CorpusReader(str(path)) as corpus:
+        bars = chords(corpus.getProgression(0))
+    assert [len(bar) for bar in bars] == [2, 1, 3, 1]
+    assert bars[2][0] == ("Gb", "7", "Db")
+    assert bars[0][0] == ("C#", "m7", None)
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    b"CLTR",
+    b"NOPE" + bytes(60),
+])
+def test_bad_headers_raise_value_error(tmp_path, data):
+    path = tmp_path / "bad.bin"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        CorpusReader(str(path))
+
+
+def test_truncated_file_raises_value_error(tmp_path):
+    path = tmp_path / "corpus.bin"
+    writeCorpus(path)
+    data = path.read_bytes()
+    for length in (len(data) - 1, len(data) // 2, 60):
+        truncated = tmp_path / "truncated.bin"
+        truncated.write_bytes(data[:length])
+        with pytest.raises(ValueError):
+            CorpusReader(str(truncated))
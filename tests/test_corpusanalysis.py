@@ -0,0 +1,43 @@
+from coltrane import CorpusAnalysis
+
+
+TUNES = ["| Dm7 G7 | Cmaj7 | Am7 D7 | Gmaj7 |",
+         "| Cm7 F7 | Bbmaj7 | Ebmaj7 | Am7-5 D7b9 | Gm |",
+         "",
+         "| Am7 | E7 | Am7 | Dm7 G7 |",
+         "| Cmaj7 | Q7 |",
+         "| F7 | Bb7 | F7 | C7 Bb7 | F7 C7 |"] * 5
+
+
+def expected():
+    tunes = [tune for tune in TUNES if tune]
+    results = []
+    for index, tune in enumerate(tunes):
+        try:
+            result = CorpusAnalysis.analyze(tune)
+        except ValueError as e:
+            result = {"progression": tune, "error": str(e)}
+        result["index"] = index
+        results.append(result)
+    return results
+
+
+def test_single_process_matches_analyze():
+    results = list(CorpusAnalysis.analyzeCorpus(TUNES, jobs=1, chunkSize=4))
+    assert results == expected()
+    errors = [r for r in results if "error" in r]
+    assert len(errors) == 5 and all(r["progression"] == "| Cmaj7 | Q7 |" for r in errors)
+
+
+def test_process_pool_ordered_and_unordered():
+    ordered = list(CorpusAnalysis.analyzeCorpus(TUNES, jobs=2, chunkSize=3))
+    assert ordered == expected()
+    unordered = list(CorpusAnalysis.analyzeCorpus(TUNES, jobs=2, chunkSize=3, ordered=False))
+    assert sorted(unordered, key=lambda r: r["index"]) == expected()
+
+
+def test_analyze():
+    result = CorpusAnalysis.analyze("| Dm7 G7 | Cmaj7 |")
+    assert result["key"] == "C ionian"
+    assert [chord["numeral"] for chord in result["chords"]] == ["ii7", "V7", "Imaj7"]
+    assert result["chords"][1]["tones"] == ["G", "B", "D", "F"]
@@ -0,0 +1,29 @@
+import pytest
+
+from coltrane import FuzzyIndex
+
+
+def scoring(scored):
+    fuzz = pytest.importorskip("fuzzywuzzy.fuzz")
+
+    def scorer(a, b):
+        scored.append(b)
+        return fuzz.ratio(a, b)
+    return scorer
+
+
+def test_search_scores_only_close_candidates():
+    scored = []
+    index = FuzzyIndex(FuzzyIndex.forScales().vocabulary, scorer=scoring(scored))
+    assert index.search("mixolidian", limit=1)[0][0] == "mixolydian"
+    assert 0 < len(scored) < 8
+    assert "minor pentatonic" not in scored
+
+
+def test_shortlist_caps_scored_candidates():
+    scored = []
+    vocabulary = ["minor", "minor blues", "minor pentatonic", "minor bebop", "harmonic minor"]
+    index = FuzzyIndex(vocabulary, scorer=scoring(scored), shortlist=2)
+    index.search("minr")
+    assert len(scored) == 2
+    assert "minor" in scored
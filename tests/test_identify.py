@@ -0,0 +1,39 @@
+import pytest
+
+from coltrane import Chord
+
+
+def rank(match):
+    return (match.missing + match.extra, match.root.value % 12 != match.bass.value % 12,
+            match.extra)
+
+
+@pytest.mark.parametrize("tones", [["C4", "E4", "G4"], ["E4", "G4", "C5"],
+                                   ["C4", "E4", "G4", "A4"], ["C4", "E4", "Bb4"],
+                                   ["C4", "Eb4", "Gb4", "A4"], ["F#3", "A#3", "C#4", "E4"]])
+def test_exact_before_inversions_before_partial(tones):
+    matches = Chord.identify(tones)
+    assert matches
+    assert [rank(m) for m in matches] == sorted(rank(m) for m in matches)
+    assert all(m.missing <= 1 and m.extra <= 1 for m in matches)
+
+
+def test_root_position_and_inversions():
+    assert Chord.identify(["C4", "E4", "G4"])[0].symbol == "C"
+    assert Chord.identify(["E4", "G4", "C5"])[0].symbol == "C/E"
+    assert [m.symbol for m in Chord.identify(["C4", "E4", "G4", "A4"])[:2]] == ["C6", "Am7/C"]
+    exact = Chord.identify(["C4", "Eb4", "Gb4", "A4"], partial=False)
+    assert [m.symbol for m in exact] == ["Cdim6", "Ebdim6/C", "Gbdim6/C", "Adim6/C"]
+
+
+def test_spelling_follows_the_tones():
+    match = Chord.identify(["F#3", "A#3", "C#4", "E4"])[0]
+    assert (match.symbol, match.quality, match.root.name) == ("F#7", "7", "F#")
+    assert Chord.identify(["Gb3", "Bb3", "Db4", "Fb4"])[0].symbol == "Gb7"
+
+
+def test_partial_matches():
+    matches = Chord.identify(["C4", "E4", "Bb4"])
+    assert matches[0].symbol == "C7" and matches[0].missing == 1
+    assert Chord.identify(["C4", "E4", "Bb4"], partial=False) == []
+    assert Chord.identify([]) == []
@@ -0,0 +1,36 @@
+import random
+
+from coltrane import KeyTracker, Scale
+
+
+def test_sliding_window_matches_estimate():
+    rand = random.Random(0)
+    tones = []
+    for root, name in (("C", "major"), ("Eb", "major"), ("A", "harmonic minor"), ("F#", "major")):
+        scale = [tone.value for tone in Scale.smartParse(root, name)]
+        tones.extend(rand.choice(scale) + 12 * rand.randrange(3, 6) for _ in range(40))
+
+    for window in (1, 7, 24):
+        tracker = KeyTracker(window)
+        for i, tone in enumerate(tones):
+            tracker.add(tone)
+            expected = KeyTracker.estimate(tones[max(0, i + 1 - window):i + 1])
+            assert tracker.getKey() == expected
+            assert sum(tracker.histogram) == min(i + 1, window)
+
+
+def test_unbounded_tracker_matches_estimate():
+    tones = [tone.value for tone in Scale.smartParse("D", "dorian")] * 3
+    tracker = KeyTracker()
+    tracker.extend(tones)
+    assert tracker.getKey() == KeyTracker.estimate(tones)
+    assert tracker.getRanking(1) == [tracker.getKey()]
+    tracker.reset()
+    assert tracker.getKey() is None
+
+
+def test_relative_keys_are_separated_by_the_root():
+    key = KeyTracker.estimate(["A3", "C4", "E4", "A4", "B4", "D5", "E5", "A4", "F4", "G4"])
+    assert (key.root.name, key.name) == ("A", "aeolian")
+    key = KeyTracker.estimate(["C4", "E4", "G4", "C5", "D4", "F4", "A4", "B4", "C4"])
+    assert (key.root.name, key.name) == ("C", "ionian")
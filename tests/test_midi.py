@@ -0,0 +1,44 @@
+import struct
+
+from coltrane import MidiFile
+
+
+def writeMidi(path, events, ticksPerBeat = 96):
+    """Writes a one-track MIDI file from (delta, status, note, velocity) events"""
+    track = bytearray()
+    for delta, status, note, velocity in events:
+        var = [delta & 0x7F]
+        delta >>= 7
+        while delta:
+            var.insert(0, delta & 0x7F | 0x80)
+            delta >>= 7
+        track += bytes(var) + bytes([status, note, velocity])
+    track += b"\x00\xff\x2f\x00"
+    path.write_bytes(b"MThd" + struct.pack(">IHHH", 6, 0, 1, ticksPerBeat)
+                     + b"MTrk" + struct.pack(">I", len(track)) + bytes(track))
+    return str(path)
+
+
+def test_notes_are_paired_in_order(tmp_path):
+    path = writeMidi(tmp_path / "a.mid", [(0, 0x90, 60, 100), (0, 0x90, 60, 90),
+                                          (96, 0x80, 60, 0), (96, 0x90, 60, 0)])
+    with MidiFile(path) as midi:
+        notes = list(midi.iterNotes())
+    assert [(n.start, n.end, n.velocity) for n in notes] == [(0, 1, 100), (0, 2, 90)]
+
+
+def test_unended_notes_are_yielded_while_reading(tmp_path):
+    count = 2000
+    path = writeMidi(tmp_path / "b.mid", [(0 if i == 0 else 96, 0x90, 40 + i % 40, 100)
+                                          for i in range(count)])
+    read = []
+    with MidiFile(path) as midi:
+        events = midi.iterEvents
+        midi.iterEvents = lambda: (read.append(event) or event for event in events())
+        notes = midi.iterNotes(maxLength=4)
+        first = next(notes)
+        assert first.start == 0 and first.end == 4
+        assert len(read) < 10
+        rest = list(notes)
+    assert len(rest) == count - 1
+    assert all(note.end - note.start <= 4 for note in rest)
@@ -0,0 +1,45 @@
+import pytest
+
+from coltrane import ChordProgression
+
+
+LINES = ["| Dm7 / G7 | Cmaj7 |",
+         "",
+         "| Cmaj7 | Q7 |",
+         "   ",
+         "| C/E F | G7/F C |",
+         "| H7 |",
+         "| Bb-7 Eb7 | Abmaj7 |"]
+
+
+def symbols(progression):
+    return [[chord.symbol for chord in bar] for bar in progression.bars]
+
+
+def test_bars_and_slash_chords():
+    progression = ChordProgression("| Dm7 / G7 | Cmaj7 || C/E F/D |")
+    assert symbols(progression) == [["Dm7", "G7"], ["Cmaj7"], ["C/E", "F/D"]]
+    assert len(progression) == 5
+    assert str(progression) == "Dm7 G7 | Cmaj7 | C/E F/D"
+    assert [c.symbol for c in ChordProgression("Dm7/G7")] == ["Dm7", "G7"]
+
+
+def test_stream_skips_bad_lines_unless_strict():
+    parsed = [symbols(p) for p in ChordProgression.stream(LINES, strict=False)]
+    assert parsed == [[["Dm7", "G7"], ["Cmaj7"]],
+                      [["C/E", "F"], ["G7/F", "C"]],
+                      [["Bb-7", "Eb7"], ["Abmaj7"]]]
+
+
+def test_strict_stream_reports_the_line():
+    stream = ChordProgression.stream(LINES)
+    assert symbols(next(stream)) == [["Dm7", "G7"], ["Cmaj7"]]
+    with pytest.raises(ValueError, match="^Line 3: "):
+        next(stream)
+
+
+def test_stream_file(tmp_path):
+    path = tmp_path / "tunes.txt"
+    path.write_text("\n".join(LINES), encoding="utf-8")
+    assert len(list(ChordProgression.streamFile(str(path), strict=False))) == 3
+    assert [len(p) for p in ChordProgression.stream("| C | F |\n| G7 |")] == [2, 1]
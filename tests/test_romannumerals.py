@@ -0,0 +1,35 @@
+import pytest
+
+from coltrane import RomanNumerals
+
+
+@pytest.mark.parametrize("chord, key, mode, label", [
+    ("D7", "C", "major", ("V7/V", "secondary dominant", "V")),
+    ("A7", "C", "major", ("V7/ii", "secondary dominant", "ii")),
+    ("E", "C", "major", ("V/vi", "secondary dominant", "vi")),
+    ("E7+5", "C", "major", ("V+7/vi", "secondary dominant", "vi")),
+    ("Dmaj7", "C", "major", ("IImaj7", "chromatic", None)),
+    ("Emaj7", "C", "major", ("IIImaj7", "chromatic", None)),
+    ("E+", "C", "major", ("III+", "chromatic", None)),
+    ("Amaj7", "A", "aeolian", ("Imaj7", "borrowed", "lydian")),
+])
+def test_only_dominant_chords_are_secondary_dominants(chord, key, mode, label):
+    assert tuple(RomanNumerals.label(chord, key, mode)) == label
+
+
+@pytest.mark.parametrize("chord, key, mode, numeral", [
+    ("E7", "A", "aeolian", "V7"),
+    ("E", "A", "aeolian", "V"),
+    ("G7", "C", "aeolian", "V7"),
+    ("G#dim", "A", "aeolian", "viio"),
+    ("G#dim6", "A", "aeolian", "viio7"),
+    ("E9", "A", "dorian", "V9"),
+    ("G", "A", "aeolian", "VII"),
+])
+def test_raised_leading_tone_is_diatonic_in_minor(chord, key, mode, numeral):
+    assert tuple(RomanNumerals.label(chord, key, mode)) == (numeral, "diatonic", None)
+
+
+def test_raised_leading_tone_only_applies_to_minor_modes():
+    assert RomanNumerals.label("G#dim6", "A", "major").kind != "diatonic"
+    assert RomanNumerals.label("E7", "A", "mixolydian").kind == "borrowed"
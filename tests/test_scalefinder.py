@@ -0,0 +1,45 @@
+import pytest
+
+from coltrane import Scale, ScaleFinder, ToneCollection
+
+
+def pcs(match):
+    return ToneCollection.pitchClassMask(Scale.smartParse(match.root, match.name))
+
+
+def test_exact():
+    matches = ScaleFinder.find(["C", "D", "E", "F", "G", "A", "B"], "exact")
+    names = [(m.root.name, m.name) for m in matches]
+    assert names[:7] == [("C", "ionian"), ("D", "dorian"), ("E", "phrygian"), ("F", "lydian"),
+                         ("G", "mixolydian"), ("A", "aeolian"), ("B", "locrian")]
+    assert all(pcs(m) == 0xAB5 for m in matches)
+    assert ScaleFinder.find(["C", "C#", "D"], "exact") == []
+
+
+def test_superset_ranks_fewest_extra_tones_first():
+    tones = ["C", "E", "G", "Bb"]
+    mask = ToneCollection.pitchClassMask(tones)
+    matches = ScaleFinder.find(tones)
+    assert matches
+    assert all(pcs(m) & mask == mask and m.missing == 0 for m in matches)
+    assert [m.extra for m in matches] == sorted(m.extra for m in matches)
+    assert ("F", "ionian") in [(m.root.name, m.name) for m in matches]
+    assert len(ScaleFinder.find(tones, limit=3)) == 3
+
+
+def test_overlap_ranks_by_shared_tones():
+    tones = ["C", "C#", "D", "E"]
+    matches = ScaleFinder.find(tones, "overlap")
+    assert [(-m.shared, m.extra) for m in matches] == sorted((-m.shared, m.extra) for m in matches)
+    assert all(m.shared + m.missing == 4 for m in matches)
+    assert any(m.missing for m in matches)
+
+
+def test_roots_follow_the_given_spelling():
+    match = ScaleFinder.find(["Gb", "Ab", "Bb", "Cb", "Db", "Eb", "F"], "exact")[0]
+    assert (match.root.name, match.name) == ("Gb", "ionian")
+
+
+def test_invalid_match_type():
+    with pytest.raises(ValueError):
+        ScaleFinder.find(["C"], "partial")
@@ -0,0 +1,46 @@
+import pytest
+
+from coltrane import Scale, ScaleTable, Tone
+
+
+@pytest.fixture
+def table():
+    ScaleTable.clear()
+    yield ScaleTable
+    ScaleTable.clear()
+
+
+def test_lookups_are_shared_and_counted(table):
+    first = Scale.smartParse("Eb", "dorian")
+    assert Scale.smartParse("Eb", "dorian") is first
+    assert ScaleTable.lookup("D", "major") is ScaleTable.lookup("D", "ionian")
+    stats = ScaleTable.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (2, 2, 2)
+    assert stats["hit_rate"] == 0.5
+    assert [tone.name for tone in first] == ["Eb", "F", "Gb", "Ab", "Bb", "C", "Db", "Eb"]
+
+
+def test_maxsize_evicts_least_recently_used(table, monkeypatch):
+    monkeypatch.setattr(ScaleTable, "maxsize", 2)
+    a = ScaleTable.lookup("C", "major")
+    ScaleTable.lookup("D", "major")
+    assert ScaleTable.lookup("C", "major") is a
+    ScaleTable.lookup("E", "major")
+    assert list(ScaleTable.table) == [(Tone("C"), "ionian"), (Tone("E"), "ionian")]
+    ScaleTable.lookup("D", "major")
+    assert ScaleTable.stats()["misses"] == 4
+    assert ScaleTable.stats()["size"] == 2
+
+
+def test_warm_and_clear(table):
+    count = ScaleTable.warm(["C", "F#"])
+    assert count == 2 * len(ScaleTable.names())
+    assert ScaleTable.stats()["misses"] == count
+    ScaleTable.clear()
+    assert ScaleTable.stats() == {"size": 0, "maxsize": None, "hits": 0, "misses": 0,
+                                  "hit_rate": 0.0}
+
+
+def test_unknown_scale():
+    with pytest.raises(ValueError):
+        ScaleTable.lookup("C", "nonsense")
@@ -0,0 +1,85 @@
+import asyncio
+import json
+import socket
+
+from coltrane import Tone
+from server import Server
+
+
+async def request(server, lines):
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    for line in lines:
+        writer.write(json.dumps(line).encode() + b"\n")
+    await writer.drain()
+    responses = [json.loads(await reader.readline()) for _ in lines]
+    writer.close()
+    return responses
+
+
+def test_answers_in_order():
+    async def run():
+        server = Server(port=0)
+        await server.start()
+        try:
+            return await request(server, [{"op": "chord", "symbol": "Am7/C", "id": 1},
+                                          {"op": "nope", "id": 2},
+                                          {"op": "identify", "tones": ["C4", "E4", "G4"], "id": 3}])
+        finally:
+            await server.close()
+
+    first, second, third = asyncio.run(run())
+    assert first == {"id": 1, "result": {"chord": "Am7/C", "tones": ["C", "E", "G", "A"]}}
+    assert second == {"id": 2, "error": "Unknown op: nope"}
+    assert third["id"] == 3 and third["result"][0]["symbol"] == "C"
+
+
+def test_client_that_never_reads_does_not_grow_write_buffer():
+    async def run():
+        server = Server(port=0, max_pending=16)
+        await server.start()
+        sock = socket.socket()
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        sock.connect(("127.0.0.1", server.port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+        line = json.dumps({"op": "chord", "symbol": "Cmaj7"}).encode() + b"\n"
+
+        async def send():
+            for _ in range(60000):
+                writer.write(line)
+                await writer.drain()
+
+        sender = asyncio.ensure_future(send())
+        largest = 0
+        settled = 0
+        answered = 0
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            for connection in server.connections:
+                largest = max(largest, connection.transport.get_write_buffer_size())
+            # Stop once the server has stopped answering, either because it's waiting for the
+            # client to read or because every request has been answered
+            settled = settled + 1 if server.requests == answered else 0
+            answered = server.requests
+            if settled > 20:
+                break
+        sender.cancel()
+        writer.close()
+        await server.close()
+        return largest
+
+    # The transport's default high-water mark is 64 KiB
+    assert asyncio.run(run()) <= 65536 + 1024
+
+
+def test_invalid_tones_are_rejected_before_reaching_the_cache():
+    size = len(Tone._interned)
+    for request in ({"op": "scale", "key": "C" + "#" * 100, "scale": "major"},
+                    {"op": "scale", "key": "H", "scale": "major"},
+                    {"op": "scale", "key": 7, "scale": "major"},
+                    {"op": "identify", "tones": ["C4", "E4", "Gb#"]},
+                    {"op": "identify", "tones": "C4 E4 G4"},
+                    {"op": "identify", "tones": []},
+                    {"op": "identify", "tones": ["C4"] * (Server.maxTones + 1)}):
+        assert "ValueError" in Server.answer(request)["error"]
+    assert len(Tone._interned) == size
+    assert Server.answer({"op": "identify", "tones": ["E4", "G4", "C5"]})["result"][0]["root"] == "C"
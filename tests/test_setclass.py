@@ -0,0 +1,57 @@
+from collections import Counter
+
+import pytest
+
+from coltrane import SetClass
+
+
+def mask(pcs):
+    return sum(1 << pc for pc in pcs)
+
+
+def classes():
+    SetClass.lookup(0)
+    return SetClass._classes.values()
+
+
+def test_class_counts():
+    counts = Counter(len(info.prime) for info in classes())
+    assert [counts[n] for n in range(13)] == [1, 1, 6, 12, 29, 38, 50, 38, 29, 12, 6, 1, 1]
+    assert sum(counts.values()) == 224
+    assert len(set(info.name for info in classes())) == 224
+
+
+def test_z_pairs():
+    zCounts = Counter(len(info.prime) for info in classes() if info.zPartner)
+    assert dict(zCounts) == {4: 2, 5: 6, 6: 30, 7: 6, 8: 2}
+    for info in classes():
+        assert (info.zPartner is not None) == ("Z" in info.name)
+
+
+@pytest.mark.parametrize("pcs, name, prime, vector, partner", [
+    ((0, 4, 7), "3-11", (0, 3, 7), (0, 0, 1, 1, 1, 0), None),
+    ((0, 1, 4, 6), "4-Z15", (0, 1, 4, 6), (1, 1, 1, 1, 1, 1), "4-Z29"),
+    ((0, 1, 3, 7), "4-Z29", (0, 1, 3, 7), (1, 1, 1, 1, 1, 1), "4-Z15"),
+    ((0, 1, 2, 4, 7, 8), "6-Z17", (0, 1, 2, 4, 7, 8), (3, 2, 2, 3, 3, 2), "6-Z43"),
+    ((0, 2, 4, 5, 7, 9, 11), "7-35", (0, 1, 3, 5, 6, 8, 10), (2, 5, 4, 3, 6, 1), None),
+    ((0, 1, 3, 4, 6, 7, 9, 10), "8-28", (0, 1, 3, 4, 6, 7, 9, 10), (4, 4, 8, 4, 4, 4), None),
+    ((0, 4), "2-4", (0, 4), (0, 0, 0, 1, 0, 0), None),
+])
+def test_known_set_classes(pcs, name, prime, vector, partner):
+    info = SetClass.lookup(mask(pcs))
+    assert (info.name, info.prime, info.vector, info.zPartner) == (name, prime, vector, partner)
+
+
+def test_complements_share_numbers():
+    for info in classes():
+        if 3 <= len(info.prime) <= 5:
+            complement = SetClass.lookup(~mask(info.prime) & 0xFFF)
+            assert complement.name == "%d-%s" % (12 - len(info.prime), info.name.split("-")[1])
+
+
+def test_lookup_transform_and_relation():
+    info = SetClass.lookup(["A", "C", "E"])
+    assert info.name == "3-11"
+    assert SetClass.transform(mask(info.prime), info.transposition, info.inverted) == \
+        mask((9, 0, 4))
+    assert SetClass.relation(["C", "E", "G"], ["A", "C", "E"]) == (4, True)
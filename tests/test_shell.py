@@ -0,0 +1,19 @@
+import pytest
+
+from shell import Shell
+
+
+@pytest.mark.parametrize("line", ["scale", "scale Eb", "scale   "])
+def test_scale_without_name_reports_usage(line):
+    result = Shell().runCommand(line)
+    assert result["error"] == "ValueError: expected <key> <scale>, e.g. scale Eb major"
+
+
+def test_scale_lookup():
+    result = Shell().runCommand("scale eb major")["result"]
+    assert result["tones"] == ["Eb", "F", "G", "Ab", "Bb", "C", "D", "Eb"]
+
+
+def test_do_scale_prints_usage(capsys):
+    Shell().do_scale("Eb")
+    assert "expected <key> <scale>" in capsys.readouterr().out
@@ -0,0 +1,37 @@
+import pytest
+
+from coltrane import Scale
+
+
+def spell(root, scale):
+    return " ".join(tone.name for tone in Scale.smartParse(root, scale))
+
+
+@pytest.mark.parametrize("root, scale, names", [
+    ("C", "minor pentatonic", "C Eb F G Bb C"),
+    ("Gb", "minor pentatonic", "Gb Bbb Cb Db Fb Gb"),
+    ("Cb", "minor pentatonic", "Cb Ebb Fb Gb Bbb Cb"),
+    ("Db", "minor pentatonic", "Db Fb Gb Ab Cb Db"),
+    ("F#", "minor pentatonic", "F# A B C# E F#"),
+    ("E#", "minor pentatonic", "E# G# A# B# D# E#"),
+    ("Gb", "major pentatonic", "Gb Ab Bb Db Eb Gb"),
+    ("E#", "major pentatonic", "E# F## G## B# C## E#"),
+    ("C", "blues", "C Eb F F# G Bb C"),
+    ("Gb", "blues", "Gb Bbb Cb C Db Fb Gb"),
+    ("Cb", "blues", "Cb Ebb Fb F Gb Bbb Cb"),
+    ("Db", "blues", "Db Fb Gb G Ab Cb Db"),
+    ("F#", "blues", "F# A B B# C# E F#"),
+    ("E#", "blues", "E# G# A# A## B# D# E#"),
+    ("C", "whole tone", "C D E F# Ab Bb C"),
+    ("Gb", "whole tone", "Gb Ab Bb C Ebb Fb Gb"),
+    ("Db", "whole tone", "Db Eb F G Bbb Cb Db"),
+    ("F#", "whole tone", "F# G# A# B# D E F#"),
+    ("E#", "whole tone", "E# F## G## A## C# D# E#"),
+])
+def test_scales_keep_their_degrees_on_every_root(root, scale, names):
+    assert spell(root, scale) == names
+
+
+def test_heptatonic_scales_use_every_letter():
+    assert spell("Fb", "major") == "Fb Gb Ab Bbb Cb Db Eb Fb"
+    assert spell("C", "altered") == "C Db Eb Fb Gb Ab Bb C"
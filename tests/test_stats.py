@@ -0,0 +1,57 @@
+import json
+
+import pytest
+
+import coltrane
+from coltrane import Chord, Stats, Tone
+
+
+@pytest.fixture
+def stats():
+    Stats.reset()
+    yield Stats
+    Stats.disable()
+    Stats.reset()
+
+
+def test_enable_and_disable_restore_the_originals(stats):
+    originals = {(className, attr): getattr(coltrane, className).__dict__[attr]
+                 for className, attr in Stats.instrumented}
+    Stats.enable()
+    Stats.enable()
+    for (className, attr), raw in originals.items():
+        assert getattr(coltrane, className).__dict__[attr] is not raw
+    Stats.disable()
+    for (className, attr), raw in originals.items():
+        assert getattr(coltrane, className).__dict__[attr] is raw
+    assert not Stats.enabled
+
+
+def test_calls_are_timed_while_enabled(stats):
+    Stats.enable()
+    Chord.identify(["C4", "E4", "G4"])
+    Chord.identify(["C4", "E4", "G4"])
+    Stats.disable()
+    Chord.identify(["C4", "E4", "G4"])
+    timer = Stats.snapshot()["timers"]["Chord.identify"]
+    assert timer["count"] == 2
+    assert timer["min"] <= timer["mean"] <= timer["max"]
+    assert sum(timer["histogram"].values()) == 2
+
+
+def test_counters_hooks_and_export(stats):
+    calls = []
+    hook = lambda name, seconds: calls.append(name)
+    Stats.addHook(hook)
+    try:
+        Stats.enable()
+        Tone("Fbb7")
+        Stats.disable()
+    finally:
+        Stats.removeHook(hook)
+    assert "Tone.__new__" in calls
+    snapshot = json.loads(Stats.export())
+    assert snapshot["enabled"] is False
+    assert snapshot["gauges"]["Tone.interned"] == len(Tone._interned)
+    Stats.count("custom", 3)
+    assert Stats.snapshot()["counters"]["custom"] == 3
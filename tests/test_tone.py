@@ -0,0 +1,33 @@
+import pytest
+
+from coltrane import Tone
+
+
+def test_tones_are_interned():
+    assert Tone("C#4") is Tone("C#4")
+    assert Tone(49, prefer_sharp=True) is Tone("C#4")
+    assert Tone("Db4") is not Tone("C#4")
+
+
+def test_names_with_too_many_accidentals_are_rejected():
+    assert Tone("C###").value == 3
+    size = len(Tone._interned)
+    for count in range(Tone.maxAccidentals + 1, 50):
+        with pytest.raises(ValueError):
+            Tone("C" + "#" * count)
+    assert len(Tone._interned) == size
+
+
+def test_values_out_of_range_are_rejected():
+    assert Tone(Tone.minValue).value == Tone.minValue
+    assert Tone(Tone.maxValue).value == Tone.maxValue
+    high = Tone("B9")
+    size = len(Tone._interned)
+    for value in (Tone.minValue - 1, Tone.maxValue + 1, 10 ** 9):
+        with pytest.raises(ValueError):
+            Tone(value)
+        with pytest.raises(ValueError):
+            Tone("B", value)
+    with pytest.raises(ValueError):
+        high.getTransposed(10 ** 6)
+    assert len(Tone._interned) == size
@@ -0,0 +1,45 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from coltrane import Tone, ToneArray, ToneCollection
+
+
+def test_tone_collection_round_trip():
+    collection = ToneCollection(["C4", "Eb4", "G4", "Bb4", "D5"])
+    tones = ToneArray(collection)
+    assert tones.values.tolist() == [tone.value for tone in collection]
+    assert tones.toToneCollection() == collection
+    assert ToneArray(tones.toToneCollection()).values.tolist() == tones.values.tolist()
+
+
+def test_names_round_trip():
+    names = ["C4", "C#4", "D4", "Eb4", "E4", "F4", "F#4", "G4", "Ab4", "A4", "Bb4", "B4", "C5"]
+    tones = ToneArray.fromNames(names)
+    assert tones.values.tolist() == [Tone(name).value for name in names]
+    assert ToneArray(np.array(names)).values.tolist() == tones.values.tolist()
+    assert tones.getNames(include_octaves=True).tolist() == [Tone(v).getFullName()
+                                                              for v in tones.values.tolist()]
+    sharps = tones.getNames(prefer_sharp=True)
+    assert sharps.tolist()[3] == "D#" and sharps.tolist()[0] == "C"
+    assert ToneArray.fromNames(tones.getNames(include_octaves=True)).values.tolist() == \
+        tones.values.tolist()
+
+
+def test_names_keep_shape():
+    names = [["C4", "E4"], ["G4", "C4"]]
+    tones = ToneArray.fromNames(names)
+    assert tones.values.shape == (2, 2)
+    assert tones.getNames().tolist() == [["C", "E"], ["G", "C"]]
+
+
+def test_matches_tone_operations():
+    tones = ToneArray(list(range(40, 60)))
+    assert [t.value for t in tones.getTransposed(7)] == \
+        [Tone(v).getTransposed(7).value for v in range(40, 60)]
+    assert tones.foldOctave("G3").values.tolist() == \
+        [43 + (v - 43) % 12 for v in range(40, 60)]
+    assert tones.getPitchClassMask() == ToneCollection.pitchClassMask(list(range(40, 60)))
+    assert tones.getHistogram().tolist() == [1] * 4 + [2] * 8
+    assert ToneArray.generate(["C4", "F4"], intervals=[0, 4, 7]).values.tolist() == \
+        [[48, 52, 55], [53, 57, 60]]
@@ -0,0 +1,31 @@
+import pytest
+
+from coltrane import Tone, ToneCollection
+
+
+def test_index_matches_name_and_value_unless_octmod():
+    tones = ToneCollection(["C4", "Eb4", "G4", "C#5"])
+    assert tones.index("Eb4") == 1
+    assert tones.index(Tone("C#5")) == 3
+    with pytest.raises(ValueError):
+        tones.index("D#4")
+    with pytest.raises(ValueError):
+        tones.index("Db5")
+    assert tones.index("D#4", octmod=True) == 1
+    assert tones.index("C1", octmod=True) == 0
+    assert tones.index("Db", octmod=True) == 3
+
+
+def test_bits_cover_the_whole_tone_range():
+    low = Tone(Tone.minValue)
+    high = Tone(Tone.maxValue)
+    tones = ToneCollection([low, Tone("C4"), high])
+    assert tones.bits == (1 << 0) | (1 << (48 - Tone.minValue)) | (1 << (Tone.maxValue - Tone.minValue))
+    assert low in tones and high in tones
+    assert Tone(Tone.minValue + 1) not in tones
+
+
+def test_membership():
+    a = ToneCollection(["C4", "E4", "G4"])
+    assert "E4" in a and "E5" not in a
+    assert a.contains("E5", octmod=True)
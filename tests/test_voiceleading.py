@@ -0,0 +1,68 @@
+import random
+
+from coltrane import VoiceLeading
+
+
+SYMBOLS = ["Dm7", "G7", "Cmaj7", "A7", "Fmaj7", "Bb7", "Em7-5", "E7b9", "Am7", "C/E", "G7/F", "Cm",
+           "F#m7-5", "B7", "Ebmaj7", "D13"]
+
+
+def movement(a, b):
+    return sum(abs(x.value - y.value) for x, y in zip(a, b))
+
+
+def bruteForce(leading, chords):
+    voicings = [leading._getVoicings(leading._prepare(chord)[0]) for chord in chords]
+    costs = [0] * len(voicings[0])
+    for sources, targets in zip(voicings, voicings[1:]):
+        costs = [min(cost + sum(abs(x - y) for x, y in zip(source, target))
+                     for cost, source in zip(costs, sources)) for target in targets]
+    return min(costs)
+
+
+def test_lead_matches_brute_force():
+    rand = random.Random(0)
+    for leading in (VoiceLeading(), VoiceLeading(3, "C3", "C5"), VoiceLeading(5, "C2", "C5")):
+        for trial in range(10):
+            chords = [rand.choice(SYMBOLS) for _ in range(rand.randint(2, 6))]
+            voicings, total = leading.lead(chords)
+            assert total == bruteForce(leading, chords)
+            assert total == sum(movement(a, b) for a, b in zip(voicings, voicings[1:]))
+
+
+def test_lead_reuses_cached_transitions():
+    chords = ["Dm7", "G7", "Cmaj7", "A7"] * 8
+    VoiceLeading._transitions.clear()
+    first = VoiceLeading(5, "C2", "C5").lead(chords)
+    cached = len(VoiceLeading._transitions)
+    assert 0 < cached < len(chords)
+    assert VoiceLeading(5, "C2", "C5").lead(chords) == first
+    assert len(VoiceLeading._transitions) == cached
+    assert VoiceLeading(4, "C2", "C5").lead(chords)[1] == bruteForce(VoiceLeading(4, "C2", "C5"),
+                                                                      chords)
+
+
+def test_transition_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(VoiceLeading, "transitionCacheSize", 3)
+    VoiceLeading._transitions.clear()
+    leading = VoiceLeading()
+    chords = ["Dm7", "G7", "Cmaj7", "A7", "Fmaj7", "Bb7"]
+    assert leading.lead(chords)[1] == bruteForce(leading, chords)
+    assert len(VoiceLeading._transitions) <= 3
+
+
+def test_single_and_empty_progressions():
+    leading = VoiceLeading()
+    assert leading.lead([]) == ([], 0)
+    voicings, total = leading.lead(["C"])
+    assert total == 0 and len(voicings) == 1 and len(voicings[0]) == 4
+
+
+def test_shared_pairs_hit_the_cache_in_other_tunes():
+    VoiceLeading._transitions.clear()
+    leading = VoiceLeading()
+    leading.lead(["Dm7", "G7", "Cmaj7"])
+    assert len(VoiceLeading._transitions) == 2
+    chords = ["F", "Dm7", "G7", "Cmaj7"]
+    assert leading.lead(chords)[1] == bruteForce(leading, chords)
+    assert len(VoiceLeading._transitions) == 3